@@ -1,50 +1,110 @@
 ﻿# app/launcher/infra/orchestrator_loop.py
 from __future__ import annotations
 import threading
-from typing import Any, Dict, List
+import time
+from typing import Any, Dict, List, Optional, Tuple
 
 from core.orchestrators.runtime import orchestrator_tick
+from core.state.pool import pool_subscribe, pool_unsubscribe
 from core.logging import console   # <-- добавлено: чтобы не ловить NameError в except
 
 
 class OrchestratorLoop:
-    def __init__(self, state: Dict[str, Any], ps_adapter, rules: List[Any], scheduler, period_ms: int = 2000):
+    """
+    Тик оркестратора на собственном потоке.
+
+    Тик запускается сразу, как только в пуле меняется то, на что смотрят
+    правила (смерть, фокус, причины пауз, включение фич), а также к моменту
+    окончания кулдауна правила (rule.wake_at()). period_ms — редкий «пульс»
+    на случай изменений, которые мимо пула не проходят. Подряд идущие
+    пробуждения сливаются: тики не чаще min_gap_ms.
+    """
+
+    # пути пула, изменение которых может поменять решение правил
+    WAKE_PATHS: Tuple[str, ...] = (
+        "player.alive",
+        "focus.is_focused",
+        "window.found",
+        "runtime.pauses.reasons",
+        "pipeline.paused",
+        "pipeline.order",
+        "features.respawn.enabled",
+        "features.macros.enabled",
+        "features.buff.enabled",
+        "features.teleport.enabled",
+        "features.autofarm.enabled",
+        "features.ui_guard.busy",
+        "features.ui_guard.paused",
+    )
+
+    def __init__(self, state: Dict[str, Any], ps_adapter, rules: List[Any], period_ms: int = 2000,
+                 min_gap_ms: int = 50):
         self._state = state
         self._ps_adapter = ps_adapter
         self._rules = rules
-        self._scheduler = scheduler
-        self._period = max(0.0, float(period_ms) / 1000.0)
+        self._period = max(0.05, float(period_ms) / 1000.0)
+        self._min_gap = max(0.0, float(min_gap_ms) / 1000.0)
         self._running = False
+        self._thr: Optional[threading.Thread] = None
+        self._wake = threading.Event()
+        self._subs: List = []
 
     def start(self):
         if self._running:
             return
         self._running = True
-        self._schedule_next()
+        self._subs = [pool_subscribe(p, self._on_pool_change, state=self._state) for p in self.WAKE_PATHS]
+        self._thr = threading.Thread(target=self._loop, name="OrchestratorLoop", daemon=True)
+        self._thr.start()
 
-    def stop(self):
+    def stop(self, timeout: float = 0.5):
         self._running = False
+        self._wake.set()
+        for sub in self._subs:
+            pool_unsubscribe(sub)
+        self._subs = []
+        thr, self._thr = self._thr, None
+        if thr and thr is not threading.current_thread():
+            thr.join(timeout)
 
-    def _schedule_next(self):
-        if not self._running:
-            return
-        # используем внешний планировщик из UI (ui.schedule)
-        try:
-            self._scheduler(self._tick, int(self._period * 1000))
-        except Exception:
-            # запасной вариант на threading.Timer
-            t = threading.Timer(self._period, self._tick)
-            t.daemon = True
-            t.start()
+    def wake(self):
+        """Внеочередной тик (например, после ручного действия из UI)."""
+        self._wake.set()
+
+    def _on_pool_change(self, paths: List[str], version: int):
+        self._wake.set()
+
+    def _next_deadline(self, now: float) -> float:
+        deadline = now + self._period
+        for rule in self._rules:
+            fn = getattr(rule, "wake_at", None)
+            if fn is None:
+                continue
+            try:
+                t = float(fn() or 0.0)
+            except Exception:
+                continue
+            if now < t < deadline:
+                deadline = t
+        return deadline
+
+    def _loop(self):
+        last = 0.0
+        while self._running:
+            gap = last + self._min_gap - time.time()
+            if gap > 0:
+                time.sleep(gap)
+            self._wake.clear()
+            last = time.time()
+            self._tick()
+            if not self._running:
+                break
+            now = time.time()
+            self._wake.wait(max(0.0, self._next_deadline(now) - now))
 
     def _tick(self):
-        #для будущей глобал версии ui.schedule
-        # if not self._running:
-        #     return
         try:
             orchestrator_tick(self._state, self._ps_adapter, self._rules)
         except Exception as e:
             # Был NameError из-за отсутствия импорта console — фиксим
             console.log(f"[orchestrator_loop.py] tick error: {e}")
-        finally:
-            self._schedule_next()
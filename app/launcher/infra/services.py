@@ -41,6 +41,7 @@ class PSAdapter:
             "alive": p.get("alive"),
             "hp_ratio": p.get("hp_ratio"),
             "cp_ratio": p.get("cp_ratio"),
+            "mp_ratio": p.get("mp_ratio"),
             "ts": p.get("ts"),
         }
 
@@ -115,7 +116,7 @@ class ServicesBundle:
 
         def _mask_hp_unknown_and_hud():
             """Пока экран перекрыт или UI-страж занят — HP/CP считаем неизвестными ('--')."""
-            pool_write(self.state, "player", {"alive": None, "hp_ratio": None, "cp_ratio": None})
+            pool_write(self.state, "player", {"alive": None, "hp_ratio": None, "cp_ratio": None, "mp_ratio": None})
             console.log(f"HP = None services.py 119")
             try:
                 if self.hud_window:
@@ -152,7 +153,7 @@ class ServicesBundle:
             """
             # 0) Пауза сервиса — маска и выход
             if data.get("paused"):
-                pool_write(self.state, "player", {"alive": None, "hp_ratio": None, "cp_ratio": None})
+                pool_write(self.state, "player", {"alive": None, "hp_ratio": None, "cp_ratio": None, "mp_ratio": None})
                 console.log(f"HP = None services.py 156")
                 try:
                     if self.hud_window and self.hud_window.evaluate_js(
@@ -165,12 +166,13 @@ class ServicesBundle:
 
             hp = data.get("hp_ratio")
             cp = data.get("cp_ratio")
+            mp = data.get("mp_ratio")
             console.log(f"HP: {hp}")
             console.log(f"HP: {hp}")
             console.log(f"HP: {hp}")
             # 0.5) Эвристика «жив» от фолбэка HP (мигающий низкий HP)
             if bool(data.get("fallback_alive", False)):
-                pool_write(self.state, "player", {"alive": True, "hp_ratio": None, "cp_ratio": None})
+                pool_write(self.state, "player", {"alive": True, "hp_ratio": None, "cp_ratio": None, "mp_ratio": None})
                 console.log(f"HP = None services.py 174")
                 try:
                     if self.hud_window and self.hud_window.evaluate_js(
@@ -209,6 +211,10 @@ class ServicesBundle:
                 cp_n = None if cp is None else max(0.0, min(1.0, float(cp)))
             except Exception:
                 cp_n = None
+            try:
+                mp_n = None if mp is None else max(0.0, min(1.0, float(mp)))
+            except Exception:
+                mp_n = None
 
             if pool_get(self.state, "services.player_state.paused", False):
                 return
@@ -218,6 +224,7 @@ class ServicesBundle:
                 "alive": alive,
                 "hp_ratio": hp_n,
                 "cp_ratio": cp_n,
+                "mp_ratio": mp_n,
                 "ts": data.get("ts"),
             })
 
@@ -287,15 +294,14 @@ class ServicesBundle:
             set_busy=lambda b: pool_write(self.state, "features.autofarm", {"busy": bool(b)}),
         )
 
-        # ---------- 6) Регистрация сервисов в state["_services"] ----------
+        # ---------- 6) Регистрация сервисов в пуле (_services) ----------
         try:
-            self.state.setdefault("_services", {})
-            self.state["_services"].update({
+            pool_write(self.state, "_services", {
                 "player_state": self.ps_service,
                 "autofarm": self.autofarm_service,
                 "macros_repeat": self.macros_repeat_service,
                 # "window_focus": self.wf_service,  # при необходимости
-            })
+            }, add_ts=False)
         except Exception:
             pass
 
@@ -351,11 +357,11 @@ class ServicesBundle:
         pool_write(self.state, "services.player_state_rules", {"running": False})
 
         try:
-            self.state["_services"].update({
+            pool_write(self.state, "_services", {
                 "coordinator": self.coordinator_service,
                 "coordinator_runner": self.coordinator_runner,
                 "player_state_rules": self.ps_rules_runner,
-            })
+            }, add_ts=False)
         except Exception:
             pass
 
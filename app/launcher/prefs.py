@@ -43,6 +43,7 @@ PREF_KEYS: List[str] = [
     "features.teleport.enabled", "features.teleport.method", "features.teleport.category", "features.teleport.location",
     "features.autofarm.enabled", "features.autofarm.mode", "features.autofarm.config",
     "features.record.enabled", "features.record.current_record",   # если решишь — добавь
+    "runtime.vision",
 ]
 
 def load_prefs() -> Dict[str, Any]:
@@ -130,6 +131,23 @@ def _norm_autofarm_cfg(cfg_any: Any) -> Dict[str, Any]:
     mons = [str(x) for x in (cfg.get("monsters") or [])]
     return {"profession": prof, "skills": skills, "zone": zone, "monsters": mons}
 
+VISION_KEYS: Dict[str, type] = {
+    "frame_ttl_ms": int,
+    "frame_small_fraction": float,
+    "pyramid_levels": int,
+    "pyramid_min_area": int,
+}
+
+def _norm_vision_cfg(cfg_any: Any) -> Dict[str, Any]:
+    out: Dict[str, Any] = {}
+    for key, cast in VISION_KEYS.items():
+        val = (cfg_any or {}).get(key)
+        try:
+            out[key] = None if val is None else cast(val)
+        except Exception:
+            out[key] = None
+    return out
+
 def resolve_initial_with_prefs(prefs: Dict[str, Any]) -> Dict[str, Any]:
     resolved: Dict[str, Any] = {}
 
@@ -242,6 +260,10 @@ def resolve_initial_with_prefs(prefs: Dict[str, Any]) -> Dict[str, Any]:
         if path in prefs:
             resolved[path] = prefs[path]
 
+    # тюнинг захвата/матчинга: только известные ключи
+    if isinstance(prefs.get("runtime.vision"), dict):
+        resolved["runtime.vision"] = _norm_vision_cfg(prefs["runtime.vision"])
+
     # Нормализация макросов и автофарма из prefs
     if "features.macros.rows" in prefs:
         resolved["features.macros.rows"] = _norm_macros_rows(prefs["features.macros.rows"])
@@ -7,6 +7,7 @@ from ..base import BaseSection
 
 from core.arduino.connection import ReviveController
 from core.vision.capture.gdi import find_window, get_window_info
+from core.vision.capture.backends import get_capture_backend
 from core.arduino.connection_test import run_test_command
 from core.updater import get_remote_version, is_newer_version
 
@@ -17,6 +18,9 @@ from core.config.servers import (
 )
 
 from core.state.pool import pool_write, pool_get, ensure_pool
+from core.vision.matching.template_cache import warm_up_templates
+from core.vision.matching.resolver_cache import invalidate_resolver_cache
+from core.logging import console
 
 
 def _schedule(fn, ms: int):
@@ -137,12 +141,25 @@ class SystemSection(BaseSection):
         # авто-поиск окна + периодическая проверка апдейта
         _schedule(self._autofind_tick, 10)
         _schedule(self._periodic_update_check, 2_000)
+        self._warm_up_templates()
 
         # account init
         if not pool_get(self.s, "account.login", None):
             pool_write(self.s, "account", {"login": "", "password": "", "pin": ""})
 
     # ---------- helpers ----------
+    def _warm_up_templates(self):
+        """Фоново декодировать шаблоны текущего сервера/языка в общий кэш."""
+        server = pool_get(self.s, "config.server", "")
+        lang = pool_get(self.s, "config.language", "rus")
+
+        def _run():
+            try:
+                warm_up_templates(server, lang)
+            except Exception as e:
+                console.log(f"[templates] warm-up error: {e}")
+        _schedule(_run, 0)
+
     def _apply_server(self, server: str):
         server = (server or "").lower()
         pool_write(self.s, "config", {"server": server})
@@ -213,7 +230,7 @@ class SystemSection(BaseSection):
 
     # ---------- auto-find window ----------
     def _autofind_tick(self):
-        if self.s.get("_autofind_stop") or pool_get(self.s, "window.found", False):
+        if pool_get(self.s, "runtime.autofind_stop", False) or pool_get(self.s, "window.found", False):
             return
         self.find_window()
         if not pool_get(self.s, "window.found", False):
@@ -295,17 +312,21 @@ class SystemSection(BaseSection):
     def set_language(self, lang: str):
         lang = (lang or "rus").lower()
         pool_write(self.s, "config", {"language": lang})
+        invalidate_resolver_cache()
         try:
             self.ps.set_language(lang)
         except Exception:
             pass
+        self._warm_up_templates()
 
     def set_server(self, server: str):
         self._apply_server(server)
+        invalidate_resolver_cache()
         try:
             self.ps.set_server(pool_get(self.s, "config.server", server))
         except Exception:
             pass
+        self._warm_up_templates()
 
         # ui: обновить методы/режимы бафа через событие
         methods = pool_get(self.s, "features.buff.methods", [])
@@ -323,6 +344,13 @@ class SystemSection(BaseSection):
             pass
 
     def find_window(self) -> Dict[str, Any]:
+        # replay-бэкенд захвата (REVIVE_CAPTURE_BACKEND=replay:...) — окно берётся из записи
+        replay_info = get_capture_backend().window_info()
+        if replay_info:
+            pool_write(self.s, "window", {"info": replay_info, "found": True, "title": "replay"})
+            self.emit("window", "[✓] Окно replay", True)
+            return {"found": True, "title": "replay", "info": replay_info}
+
         titles = ["Lineage", "Lineage II", "L2MAD", "L2", "BOHPTS"]
         for t in titles:
             hwnd = find_window(t)
@@ -370,13 +398,16 @@ class SystemSection(BaseSection):
             st = self.ps.last() or {}
             hp_ratio = st.get("hp_ratio")
             if hp_ratio is None:
-                return {"hp": None, "cp": None, "alive": None}
+                return {"hp": None, "cp": None, "mp": None, "alive": None}
             hp = max(0, min(100, int(round(float(hp_ratio) * 100))))
+            cp_ratio, mp_ratio = st.get("cp_ratio"), st.get("mp_ratio")
+            cp = None if cp_ratio is None else max(0, min(100, int(round(float(cp_ratio) * 100))))
+            mp = None if mp_ratio is None else max(0, min(100, int(round(float(mp_ratio) * 100))))
             alive_val = st.get("alive")
             alive = bool(alive_val) if alive_val is not None else (hp > 0)
-            return {"hp": hp, "cp": 100, "alive": alive}
+            return {"hp": hp, "cp": cp, "mp": mp, "alive": alive}
         except Exception:
-            return {"hp": None, "cp": None, "alive": None}
+            return {"hp": None, "cp": None, "mp": None, "alive": None}
 
     def run_update_check(self) -> Dict[str, Any]:
         try:
@@ -390,7 +421,7 @@ class SystemSection(BaseSection):
 
     def shutdown(self) -> None:
         try:
-            self.s["_autofind_stop"] = True
+            pool_write(self.s, "runtime", {"autofind_stop": True}, add_ts=False)
             if hasattr(self.ps, "stop"):
                 self.ps.stop()
         except Exception:
@@ -32,7 +32,7 @@ from .sections.record import RecordSection
 from core.orchestrators.pipeline_rule import make_pipeline_rule
 
 # пул
-from core.state.pool import ensure_pool, pool_get, pool_write, dump_pool
+from core.state.pool import ensure_pool, pool_get, pool_write, dump_pool, dump_pool_since
 
 # новые хелперы
 from app.launcher.infra.ui_bridge import UIBridge
@@ -45,6 +45,11 @@ from app.launcher.prefs import load_prefs, save_prefs, resolve_initial_with_pref
 # новый логгер
 from core.logging import console
 
+from core.vision.capture.window_bgr_capture import release_capture_resources
+from core.vision.matching.executor import shutdown_match_executor
+from core.vision.capture.frame_cache import configure_frame_cache
+from core.vision.matching.pyramid import configure_pyramid
+
 try:
     from pynput import keyboard as _hk_keyboard
     from pynput import mouse as _hk_mouse
@@ -53,6 +58,16 @@ except Exception as _e:
     _HK_AVAILABLE = False
 
 
+def _apply_vision_config(state: Dict[str, Any]) -> None:
+    """runtime.vision → configure_* модулей захвата/матчинга (None — оставить дефолт)."""
+    cfg = pool_get(state, "runtime.vision", {}) or {}
+    try:
+        configure_frame_cache(ttl_ms=cfg.get("frame_ttl_ms"), small_fraction=cfg.get("frame_small_fraction"))
+        configure_pyramid(levels=cfg.get("pyramid_levels"), min_area=cfg.get("pyramid_min_area"))
+    except Exception as e:
+        console.log(f"[wiring] vision config error: {e}")
+
+
 def build_container(window, local_version: str, hud_window=None) -> Dict[str, Any]:
     controller = ReviveController()
 
@@ -152,6 +167,11 @@ def build_container(window, local_version: str, hud_window=None) -> Dict[str, An
         "status": "idle",
     })
 
+    # --- runtime.vision: тюнинг захвата/матчинга (из prefs.json)
+    if resolved.get("runtime.vision"):
+        pool_write(state, "runtime.vision", resolved["runtime.vision"])
+    _apply_vision_config(state)
+
     # === UI-мост ===
     ui = UIBridge(window, state, hud_window)
 
@@ -203,6 +223,14 @@ def build_container(window, local_version: str, hud_window=None) -> Dict[str, An
             return {"ok": False, "error": str(e)}
     exposed["pool_dump"] = pool_dump_api
 
+    # дельта пула с версии-курсора (pywebview.api.pool_dump_since)
+    def pool_dump_since_api(version: int = 0):
+        try:
+            return {"ok": True, **dump_pool_since(state, int(version or 0), compact=True)}
+        except Exception as e:
+            return {"ok": False, "error": str(e)}
+    exposed["pool_dump_since"] = pool_dump_since_api
+
     # отдать API в pywebview
     try:
         expose_api(window, exposed)
@@ -217,7 +245,8 @@ def build_container(window, local_version: str, hud_window=None) -> Dict[str, An
         }),
     ]
 
-    loop = OrchestratorLoop(state, ps_adapter, rules, ui.schedule, period_ms=1500)
+    # тикает по изменениям пула; period_ms — пульс-страховка
+    loop = OrchestratorLoop(state, ps_adapter, rules, period_ms=1500)
 
     # старт сервисов + оркестратора
     services.start()
@@ -254,4 +283,14 @@ def build_container(window, local_version: str, hud_window=None) -> Dict[str, An
         except Exception as e:
             console.log(f"[shutdown] controller.close(): {e}")
 
+        try:
+            release_capture_resources()
+        except Exception as e:
+            console.log(f"[shutdown] release_capture_resources(): {e}")
+
+        try:
+            shutdown_match_executor()
+        except Exception as e:
+            console.log(f"[shutdown] shutdown_match_executor(): {e}")
+
     return {"sections": sections, "shutdown": shutdown, "exposed": exposed}
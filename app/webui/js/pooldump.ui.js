@@ -83,11 +83,54 @@
     if (el) el.textContent = text || "";
   }
 
+  // локальная копия пула + курсор версии: с бэкенда приходят только изменения
+  let _tree = null;
+  let _version = 0;
+
+  function applyChanges(changes, deleted) {
+    const gone = new Set(deleted || []);
+    for (const [path, value] of Object.entries(changes || {})) {
+      if (!path) { _tree = value; continue; }
+      const keys = path.split(".");
+      let cur = _tree;
+      for (const k of keys.slice(0, -1)) {
+        if (cur[k] === null || typeof cur[k] !== "object") {
+          if (gone.has(path)) { cur = null; break; }  // удалять нечего
+          cur[k] = {};
+        }
+        cur = cur[k];
+      }
+      if (!cur) continue;
+      const last = keys[keys.length - 1];
+      if (gone.has(path)) delete cur[last];
+      else cur[last] = value;
+    }
+  }
+
+  async function refreshDelta(pre) {
+    const res = await pywebview.api.pool_dump_since(_tree ? _version : 0);
+    if (!res || res.ok === false) {
+      pre.textContent = `ERROR: ${res && res.error ? res.error : "нет данных"}`;
+      setStatus("Ошибка");
+      return;
+    }
+    if (res.full) _tree = {};
+    applyChanges(res.changes, res.deleted);
+    _version = res.version;
+    const n = Object.keys(res.changes || {}).length;  // deleted входят в changes
+    if (res.full || n) pre.textContent = JSON.stringify(_tree, null, 2);
+    setStatus(res.full ? `Обновлено (v${_version})` : `Обновлено (v${_version}, изменений: ${n})`);
+  }
+
   async function refreshDump() {
     const pre = document.getElementById("poolDumpPre");
     if (!pre) return;
     try {
       setStatus("Загрузка…");
+      if (window.pywebview?.api?.pool_dump_since) {
+        await refreshDelta(pre);
+        return;
+      }
       if (!window.pywebview?.api?.pool_dump) {
         pre.textContent = "pywebview.api.pool_dump недоступен";
         setStatus("Нет API");
@@ -47,6 +47,11 @@ if exist "%ICON%" set "ICON_OPT=--icon %ICON%"
 
 set "DATA_OPTS="
 
+rem Атлас шаблонов (GRAY/BGR заранее декодированы; без него читаются PNG)
+"%PY%" tools\build_template_atlas.py || echo [WARN] template atlas build failed
+if exist core\engines\templates.atlas.bin set "DATA_OPTS=!DATA_OPTS! --add-data core\engines\templates.atlas.bin;core\engines"
+if exist core\engines\templates.atlas.json set "DATA_OPTS=!DATA_OPTS! --add-data core\engines\templates.atlas.json;core\engines"
+
 rem Базовые ассеты/UI/документы
 if exist assets                        set "DATA_OPTS=!DATA_OPTS! --add-data assets;assets"
 if exist core\servers                  set "DATA_OPTS=!DATA_OPTS! --add-data core\servers;core\servers"
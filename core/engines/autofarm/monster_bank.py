@@ -0,0 +1,105 @@
+# core/engines/autofarm/monster_bank.py
+"""
+Банк шаблонов имён монстров зоны автофарма.
+
+Собирается один раз на (server, lang, zone, разрешённые монстры): шаблоны
+декодируются заранее, а на пробу приходится один захват окна, один GRAY и
+по matchTemplate на имя (в пуле матчинга). Результат — все попадания,
+отсортированные по score (лучшее первым).
+
+Exports:
+- MonsterHit(score, name, rect)              # rect = (x, y, w, h) в клиентских координатах окна
+- MonsterBank(entries)                       # entries: [(name, template_path)]
+- get_monster_bank(key, build) -> MonsterBank  # банк текущей зоны; build() вызывается при смене key
+- reset_monster_bank()
+"""
+from __future__ import annotations
+
+import threading
+from typing import Callable, Dict, Hashable, List, NamedTuple, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from core.logging import console
+from core.vision.capture.frame_cache import capture_window_region_cached
+from core.vision.matching.executor import map_jobs
+from core.vision.matching.pyramid import match_template_best
+from core.vision.matching.template_cache import load_template
+
+
+class MonsterHit(NamedTuple):
+    score: float
+    name: str
+    rect: Tuple[int, int, int, int]
+
+
+class MonsterBank:
+    def __init__(self, entries: Sequence[Tuple[str, Optional[str]]]):
+        self.names: List[str] = []
+        self._templates: List[Tuple[str, np.ndarray]] = []
+        for name, path in entries:
+            if not path:
+                continue
+            tpl = load_template(path, cv2.IMREAD_GRAYSCALE)
+            if tpl is None or tpl.size == 0:
+                continue
+            self.names.append(name)
+            self._templates.append((name, tpl))
+
+    def __len__(self) -> int:
+        return len(self._templates)
+
+    def match_gray(self, gray: np.ndarray, threshold: float = 0.84) -> List[MonsterHit]:
+        """Все имена с score >= threshold на кадре gray, лучшие первыми."""
+        gh, gw = gray.shape[:2]
+
+        def _one(item: Tuple[str, np.ndarray]) -> Optional[MonsterHit]:
+            name, tpl = item
+            th, tw = tpl.shape[:2]
+            if th > gh or tw > gw:
+                return None
+            score, (x, y) = match_template_best(gray, tpl, threshold=float(threshold))
+            if float(score) < float(threshold):
+                return None
+            return MonsterHit(float(score), name, (int(x), int(y), int(tw), int(th)))
+
+        hits = [h for h in map_jobs(_one, self._templates) if h is not None]
+        hits.sort(key=lambda h: h.score, reverse=True)
+        return hits
+
+    def match_bgr(self, frame: np.ndarray, threshold: float = 0.84) -> List[MonsterHit]:
+        """Кадр окна целиком (BGR) → match_gray."""
+        if not self._templates or frame is None or frame.size == 0:
+            return []
+        return self.match_gray(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), threshold)
+
+    def match(self, win: Dict, threshold: float = 0.84) -> List[MonsterHit]:
+        """Один захват окна целиком → match_gray."""
+        if not self._templates:
+            return []
+        frame = capture_window_region_cached(win, (0, 0, int(win["width"]), int(win["height"])))
+        return self.match_bgr(frame, threshold)
+
+
+_lock = threading.Lock()
+_current: Optional[Tuple[Hashable, MonsterBank]] = None
+
+
+def get_monster_bank(key: Hashable, build: Callable[[], Sequence[Tuple[str, Optional[str]]]]) -> MonsterBank:
+    """Банк для key; при смене key (другая зона/язык/список монстров) собирается заново."""
+    global _current
+    with _lock:
+        if _current is not None and _current[0] == key:
+            return _current[1]
+    bank = MonsterBank(build())
+    console.log(f"[autofarm] monster bank: {len(bank)} templates for {key!r}")
+    with _lock:
+        _current = (key, bank)
+    return bank
+
+
+def reset_monster_bank() -> None:
+    global _current
+    with _lock:
+        _current = None
@@ -90,7 +90,7 @@ def run_step(
 
     # auto: даём команду сервису (если подключён)
     try:
-        svc = (state.get("_services") or {}).get("autofarm")
+        svc = pool_get(state, "_services.autofarm")
         if hasattr(svc, "run_once_now"):
             svc.run_once_now()
             pool_merge(state, "features.autofarm", {"status": "kicked"})
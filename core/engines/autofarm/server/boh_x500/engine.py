@@ -1,7 +1,7 @@
 ﻿# core/engines/autofarm/server/boh/engine.py
 from __future__ import annotations
 import time
-import os, re, json, ctypes
+import os, re, json
 from typing import Dict, Any, List, Tuple, Optional
 
 import cv2
@@ -9,8 +9,12 @@ import numpy as np
 from pathlib import Path
 import sys
 
-from core.vision.capture.window_bgr_capture import capture_window_region_bgr
-from core.vision.utils.colors import mask_for_colors_bgr, biggest_horizontal_band
+from core.vision.capture.frame_cache import capture_window_region_cached
+from core.vision.utils.colors import mask_for_colors_bgr, masks_for_palettes_bgr, biggest_horizontal_band
+from core.vision.utils.palette_lut import compile_palettes
+from core.vision.matching.template_cache import load_template
+from core.vision.matching.pyramid import match_template_best
+from core.engines.autofarm.monster_bank import get_monster_bank
 # ↓ было: from _archive.core.runtime.flow_ops import FlowCtx, FlowOpExecutor, run_flow
 from core.engines.flow.ops import FlowCtx, FlowOpExecutor, run_flow
 from core.logging import console
@@ -23,8 +27,6 @@ _RESTART_STREAK_LIMIT = 10
 # список исключенных целей в рамках одного цикла
 excluded_targets: set[str] = set()
 
-USER32 = ctypes.windll.user32
-
 # -------- helpers (чисто низкоуровневые) --------
 def _res_path(*parts):
     base = getattr(sys, "_MEIPASS", os.path.abspath("."))
@@ -60,19 +62,20 @@ def _hp_palettes(server: str) -> Tuple[List[Tuple[int,int,int]], List[Tuple[int,
     tol = 2
     return monster_alive_rgb, monster_dead_rgb, tol
 
-def _detect_target_bands(win: Dict, server: str):
+def _detect_target_bands(win: Dict, server: str, img: Optional[np.ndarray] = None):
     """Возвращает (rect_alive, rect_any) в локальных коорд. зоны."""
-    l, t, r, b = _target_zone_ltrb(win)
-    img = capture_window_region_bgr(win, (l, t, r, b))
+    if img is None:
+        img = capture_window_region_cached(win, _target_zone_ltrb(win))
     if img is None or img.size == 0:
         return None, None
 
     alive_rgb, dead_rgb, tol = _hp_palettes(server)
-    mask_alive = mask_for_colors_bgr(img, colors_rgb=alive_rgb, tol=tol)
     if dead_rgb:
-        mask_dead  = mask_for_colors_bgr(img, colors_rgb=dead_rgb, tol=tol)
-        mask_any = np.bitwise_or(mask_alive, mask_dead)
+        masks = masks_for_palettes_bgr(img, {"alive": alive_rgb, "dead": dead_rgb}, tol=tol)
+        mask_alive = masks["alive"]
+        mask_any = np.bitwise_or(mask_alive, masks["dead"])
     else:
+        mask_alive = mask_for_colors_bgr(img, colors_rgb=alive_rgb, tol=tol)
         mask_any = mask_alive.copy()
 
     rect_alive = biggest_horizontal_band(mask_alive)
@@ -93,13 +96,13 @@ def _has_target_by_hp(win: Dict, server: str, tries: int = 3, delay_ms: int = 20
         time.sleep(delay_ms / 1000.0)
     return False
 
-def _target_alive_by_hp(win: Dict, server: str) -> Optional[bool]:
+def _target_alive_by_hp(win: Dict, server: str, img: Optional[np.ndarray] = None) -> Optional[bool]:
     """
     Живой, если найдено >= N пикселей из палитры 'alive'.
     False — если меньше; None — если кадр пустой/ошибка.
     """
-    l, t, r, b = _target_zone_ltrb(win)
-    img = capture_window_region_bgr(win, (l, t, r, b))
+    if img is None:
+        img = capture_window_region_cached(win, _target_zone_ltrb(win))
     if img is None or img.size == 0:
         return None
 
@@ -113,6 +116,18 @@ def _target_alive_by_hp(win: Dict, server: str) -> Optional[bool]:
     alive = (alive_px >= 5)
     return alive
 
+def _target_hp_state(win: Dict, server: str) -> Tuple[bool, Optional[bool]]:
+    """
+    (has_any, alive) по ОДНОМУ захвату зоны цели — вместо пары
+    _has_target_by_hp(tries=1) + _target_alive_by_hp, каждая со своим кадром.
+    """
+    img = capture_window_region_cached(win, _target_zone_ltrb(win))
+    if img is None or img.size == 0:
+        return False, None
+    _, rect_any = _detect_target_bands(win, server, img=img)
+    has_any = bool(rect_any) and rect_any[2] >= 40 and rect_any[3] >= 3
+    return has_any, _target_alive_by_hp(win, server, img=img)
+
 def _zone_monsters_raw(server: str, zone_id: str):
     try:
         data = _read_zones_map(server) or {}
@@ -218,15 +233,15 @@ def _resolve_monster_template(server: str, lang: str, zone_id: str, name: str) -
 def _match_template_on_window(win: Dict, tpl_path: str, threshold: float = 0.84) -> Optional[Tuple[int,int,int,int]]:
     if not (tpl_path and os.path.isfile(tpl_path)):
         return None
-    tpl = cv2.imread(tpl_path, cv2.IMREAD_GRAYSCALE)
+    tpl = load_template(tpl_path, cv2.IMREAD_GRAYSCALE)
     if tpl is None or tpl.size == 0:
         return None
     th, tw = tpl.shape[:2]
-    frame = capture_window_region_bgr(win, (0, 0, int(win["width"]), int(win["height"])))
+    frame = capture_window_region_cached(win, (0, 0, int(win["width"]), int(win["height"])))
     if frame is None or frame.size == 0:
         return None
     gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-    _, maxVal, _, maxLoc = cv2.minMaxLoc(cv2.matchTemplate(gray, tpl, cv2.TM_CCOEFF_NORMED))
+    maxVal, maxLoc = match_template_best(gray, tpl, threshold=float(threshold))
     if float(maxVal) < float(threshold):
         return None
     x, y = int(maxLoc[0]), int(maxLoc[1])
@@ -282,13 +297,25 @@ def _press_key(ex: FlowOpExecutor, key_digit: str) -> bool:
 def _press_esc(ex: FlowOpExecutor) -> bool:
     return bool(run_flow([{"op": "send_arduino", "cmd": "esc", "delay_ms": 0}], ex))
 
+# цвета точки-маркера возле имени монстра
+_DOT_PALETTES = {
+    "friend": [(16, 69, 131), (21, 74, 136), (25, 77, 138), (32, 82, 143), (32, 85, 147), (46, 99, 161)],
+    "enemy": [(169, 30, 0), (183, 58, 23), (196, 69, 32), (204, 89, 58), (221, 100, 73), (239, 138, 114)],
+    "neutral": [(66, 61, 57), (75, 70, 66), (91, 86, 82), (107, 103, 98), (121, 116, 112), (132, 128, 123)],
+}
+
 def _has_dot_colors_near_rect(
     win: Dict,
     rect: Tuple[int, int, int, int],
     pad: int = 20,
     tol: int = 3,
     min_px: int = 30,
+    frame: Optional[np.ndarray] = None,
 ) -> Tuple[bool, bool, int, int, bool]:
+    """
+    Точки friend/enemy/neutral вокруг rect — все три счётчика за один проход LUT.
+    frame — уже снятый кадр окна целиком (BGR); тогда ROI берётся из него view без захвата.
+    """
     x, y, w, h = rect
     W, H = int(win["width"]), int(win["height"])
     l = max(0, x - pad)
@@ -298,30 +325,17 @@ def _has_dot_colors_near_rect(
     if r <= l or b <= t:
         return (False, False, 0, 0, False)
 
-    roi = capture_window_region_bgr(win, (l, t, r, b))
+    if frame is not None and frame.ndim == 3 and frame.shape[0] >= b and frame.shape[1] >= r:
+        roi = frame[t:b, l:r]
+    else:
+        roi = capture_window_region_cached(win, (l, t, r, b))
     if roi is None or roi.size == 0:
         return (False, False, 0, 0, False)
 
-    def _mask_for_rgb_pool(img_bgr: np.ndarray, pool_rgb: List[Tuple[int, int, int]], tol: int) -> np.ndarray:
-        img_rgb = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2RGB)
-        R, G, B = img_rgb[:, :, 0], img_rgb[:, :, 1], img_rgb[:, :, 2]
-        mask = np.zeros(img_rgb.shape[:2], dtype=np.uint8)
-        for (r, g, b) in pool_rgb:
-            m = (np.abs(R - r) <= tol) & (np.abs(G - g) <= tol) & (np.abs(B - b) <= tol)
-            mask |= m.astype(np.uint8)
-        return mask
-
-    FRIEND_RGB = [(16, 69, 131), (21, 74, 136), (25, 77, 138), (32, 82, 143), (32, 85, 147), (46, 99, 161)]
-    ENEMY_RGB = [(169, 30, 0), (183, 58, 23), (196, 69, 32), (204, 89, 58), (221, 100, 73), (239, 138, 114)]
-    NEUTRAL_RGB = [(66, 61, 57), (75, 70, 66), (91, 86, 82), (107, 103, 98), (121, 116, 112), (132, 128, 123)]
-
-    m_friend = _mask_for_rgb_pool(roi, FRIEND_RGB, tol)
-    m_enemy = _mask_for_rgb_pool(roi, ENEMY_RGB, tol)
-    m_neutral = _mask_for_rgb_pool(roi, NEUTRAL_RGB, tol)
-
-    friend_px = int(np.count_nonzero(m_friend))
-    enemy_px = int(np.count_nonzero(m_enemy))
-    neutral_px = int(np.count_nonzero(m_neutral))
+    counts = compile_palettes(_DOT_PALETTES, tol).counts(roi)
+    friend_px = counts["friend"]
+    enemy_px = counts["enemy"]
+    neutral_px = counts["neutral"]
 
     has_friend = friend_px >= min_px
     has_enemy = enemy_px >= min_px
@@ -329,53 +343,60 @@ def _has_dot_colors_near_rect(
 
     return (has_friend, has_enemy, friend_px, enemy_px, has_neutral)
 
-
-def _template_probe_click(ctx_base: Dict[str, Any], server: str, lang: str, win: Dict, cfg: Dict[str, Any]) -> bool:
-    zone_id = (cfg or {}).get("zone") or ""
-    if not zone_id:
-        return False
-
-    def _zone_monster_full_names(server: str, zone_id: str, lang: str) -> List[str]:
-        raw = _zone_monsters_raw(server, zone_id) or {}
-        for key in (f"{(lang or 'eng').lower()}_full", "eng_full", "rus_full", (lang or 'eng').lower(), "eng", "rus"):
-            arr = raw.get(key)
-            if isinstance(arr, list) and arr:
-                return [str(x) for x in arr if x]
-        return []
-
-    full_names = _zone_monster_full_names(server, zone_id, lang)
+def _zone_probe_names(server: str, lang: str, zone_id: str, cfg: Dict[str, Any]) -> List[str]:
+    """Полные имена монстров зоны с учётом фильтра monsters из UI."""
+    raw = _zone_monsters_raw(server, zone_id) or {}
+    full_names: List[str] = []
+    for key in (f"{(lang or 'eng').lower()}_full", "eng_full", "rus_full", (lang or 'eng').lower(), "eng", "rus"):
+        arr = raw.get(key)
+        if isinstance(arr, list) and arr:
+            full_names = [str(x) for x in arr if x]
+            break
     if not full_names:
-        return False
+        return []
 
     allowed_ui = set((cfg or {}).get("monsters") or [])
     if allowed_ui:
         allowed_short = _normalize_allowed_slugs(server, zone_id, lang, allowed_ui)
         full2short = _full_to_short_map(server, zone_id, lang)
         full_names = [nm for nm in full_names if full2short.get(_slugify_name_py(nm), "") in allowed_short]
-        if not full_names:
-            return False
+    return full_names
+
+def _zone_monster_bank(server: str, lang: str, zone_id: str, cfg: Dict[str, Any]):
+    """Банк шаблонов имён зоны: собирается при выборе зоны (смене зоны/языка/фильтра), дальше — из памяти."""
+    key = (server, lang, zone_id, tuple(sorted(str(x) for x in ((cfg or {}).get("monsters") or []))))
+    return get_monster_bank(key, lambda: [
+        (nm, _resolve_monster_template(server, lang, zone_id, nm))
+        for nm in _zone_probe_names(server, lang, zone_id, cfg)
+    ])
+
+def _template_probe_click(ctx_base: Dict[str, Any], server: str, lang: str, win: Dict, cfg: Dict[str, Any]) -> bool:
+    zone_id = (cfg or {}).get("zone") or ""
+    if not zone_id:
+        return False
+
+    bank = _zone_monster_bank(server, lang, zone_id, cfg)
+    if not len(bank):
+        return False
 
     controller = ctx_base["controller"]
 
-    for nm in full_names:
+    # один кадр — все имена зоны (лучшие совпадения первыми) и проверка точек до наведения
+    frame = capture_window_region_cached(win, (0, 0, int(win["width"]), int(win["height"])))
+    hits = bank.match_bgr(frame, threshold=0.84)
+
+    for hit in hits:
         if _abort(ctx_base):
             return False
         _wait_if_paused(ctx_base)  # ← уважаем паузу
         if _abort(ctx_base):
             return False
 
+        nm, rect = hit.name, hit.rect
         if nm in excluded_targets:
             continue
 
-        tpl = _resolve_monster_template(server, lang, zone_id, nm)
-        if not tpl:
-            continue
-
-        rect = _match_template_on_window(win, tpl, threshold=0.84)
-        if not rect:
-            continue
-
-        has_friend, has_enemy, _, _, _ = _has_dot_colors_near_rect(win, rect, pad=20, tol=3, min_px=20)
+        has_friend, has_enemy, _, _, _ = _has_dot_colors_near_rect(win, rect, pad=20, tol=3, min_px=20, frame=frame)
         if has_friend or has_enemy:
             continue
 
@@ -411,11 +432,11 @@ def _press_silent_cancel(ex: FlowOpExecutor):
 def _check_target_visibility(ex: FlowOpExecutor, server: str, lang: str, win: Dict, zone_id: str) -> bool:
     img_path = _res_path("core", "engines", "autofarm", "server", server, "templates", lang, "sys_messages",
                          "target_unvisible.png")
-    target_img = cv2.imread(img_path, cv2.IMREAD_GRAYSCALE)
+    target_img = load_template(img_path, cv2.IMREAD_GRAYSCALE)
     if target_img is None:
         return False
     l, t, r, b = _target_sys_message_zone_ltrb(win)
-    search_zone = capture_window_region_bgr(win, (l, t, r, b))
+    search_zone = capture_window_region_cached(win, (l, t, r, b))
     if search_zone is None or search_zone.size == 0 or search_zone.ndim != 3:
         return False
     search_zone_gray = cv2.cvtColor(search_zone, cv2.COLOR_BGR2GRAY)
@@ -468,6 +489,9 @@ def start(ctx_base: Dict[str, Any], cfg: Dict[str, Any]) -> bool:
     )
     ex = FlowOpExecutor(ctx)
 
+    if (cfg or {}).get("zone"):
+        _zone_monster_bank(server, lang, (cfg or {}).get("zone"), cfg)  # шаблоны зоны — заранее
+
     start_ts = time.time()
 
     while True:
@@ -484,8 +508,7 @@ def start(ctx_base: Dict[str, Any], cfg: Dict[str, Any]) -> bool:
         if _abort(ctx_base):
             return False
 
-        has_any = _has_target_by_hp(win, server, tries=1, delay_ms=150, should_abort=lambda: _abort(ctx_base))
-        current_alive = _target_alive_by_hp(win, server)
+        has_any, current_alive = _target_hp_state(win, server)
 
         if current_alive is None:
             for _ in range(10):
@@ -508,8 +531,7 @@ def start(ctx_base: Dict[str, Any], cfg: Dict[str, Any]) -> bool:
         if not (has_any and current_alive) and zone_id:
             if _template_probe_click(ctx_base, server, lang, win, cfg):
                 time.sleep(0.35)
-                has_any = _has_target_by_hp(win, server, tries=1, delay_ms=150, should_abort=lambda: _abort(ctx_base))
-                current_alive = _target_alive_by_hp(win, server)
+                has_any, current_alive = _target_hp_state(win, server)
 
         if has_any and current_alive:
             console.log("[autofarm] цель получена /targetnext")
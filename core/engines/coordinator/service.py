@@ -4,7 +4,7 @@ from typing import Dict, List, Optional, Tuple, Set, Callable
 import threading
 import time
 
-from core.state.pool import pool_get, pool_write
+from core.state.pool import pool_get, pool_write, pool_subscribe, pool_unsubscribe, pool_transaction
 from core.logging import console
 
 
@@ -24,6 +24,9 @@ class CoordinatorService:
               - если pause_reason непустая → показываем HUD-заглушку и паузы ДЕРЖИМ.
     """
 
+    # пути пула, изменение которых может поменять причины пауз
+    WAKE_PATHS: Tuple[str, ...] = ("focus", "player", "features.autofarm.busy", "features.ui_guard")
+
     def __init__(
         self,
         state: Dict,
@@ -52,6 +55,8 @@ class CoordinatorService:
 
         self._thr: Optional[threading.Thread] = None
         self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._subs: List = []
         self._lock = threading.Lock()
 
         # ведёрки: кого САМИ тормознули по cor_1 / cor_2
@@ -71,6 +76,8 @@ class CoordinatorService:
         if self._thr and self._thr.is_alive():
             return
         self._stop.clear()
+        # внеочередной тик, как только поменялось то, из чего провайдеры считают причины
+        self._subs = [pool_subscribe(p, self._on_pool_change, state=self.s) for p in self.WAKE_PATHS]
         self._thr = threading.Thread(target=self._loop, name="CoordinatorService", daemon=True)
         self._thr.start()
         console.log("[coordinator] started")
@@ -78,6 +85,10 @@ class CoordinatorService:
     def stop(self, timeout: float = 0.5):
         try:
             self._stop.set()
+            self._wake.set()
+            for sub in self._subs:
+                pool_unsubscribe(sub)
+            self._subs = []
             if self._thr:
                 self._thr.join(timeout)
         finally:
@@ -95,28 +106,34 @@ class CoordinatorService:
             self._recompute_and_apply(now)
 
     # ---------- loop ----------
+    def _on_pool_change(self, paths: List[str], version: int):
+        self._wake.set()
+
     def _loop(self):
         next_tick = time.time()
         while not self._stop.is_set():
             now = time.time()
-            if now >= next_tick:
+            if now >= next_tick or self._wake.is_set():
+                self._wake.clear()
                 try:
                     with self._lock:
                         self._tick(now)
                 except Exception as e:
                     console.log(f"[coordinator] loop error: {e}")
                 next_tick = now + self._period / 1000.0
-            self._stop.wait(0.01)
+            # период остаётся страховкой; изменения в пуле будят раньше
+            self._wake.wait(max(0.0, next_tick - time.time()))
 
     def _tick(self, now: float):
-        # 1) собрать причины от провайдеров
-        for p in self._providers:
-            try:
-                reason, active = p.evaluate(self.s, now)
-                if reason:
-                    self._write_runtime_reason(reason, bool(active), now)
-            except Exception as e:
-                console.log(f"[coordinator] provider error: {e}")
+        # 1) собрать причины от провайдеров — одной версией пула
+        with pool_transaction(self.s):
+            for p in self._providers:
+                try:
+                    reason, active = p.evaluate(self.s, now)
+                    if reason:
+                        self._write_runtime_reason(reason, bool(active), now)
+                except Exception as e:
+                    console.log(f"[coordinator] provider error: {e}")
         # 2) применить флаги — новой семантикой
         self._recompute_and_apply(now)
 
@@ -162,20 +179,23 @@ class CoordinatorService:
 
     def _ensure_paused_for_reason(self, reason: str):
         bucket = self._granted_by.setdefault(reason, set())
-        for path in self._all_targets():
-            # не трогаем уже приостановленные (мы их не ставили)
-            cur_paused = bool(pool_get(self.s, f"{path}.paused", False)) if path != "pipeline" \
-                         else bool(pool_get(self.s, "pipeline.paused", False))
-            if cur_paused:
-                continue
-            self._apply_one(path, paused=True, reason=reason, is_pipeline=(path == "pipeline"))
-            bucket.add(path)
+        # паузы всем целям — одной транзакцией: правила не видят «полупаузу»
+        with pool_transaction(self.s):
+            for path in self._all_targets():
+                # не трогаем уже приостановленные (мы их не ставили)
+                cur_paused = bool(pool_get(self.s, f"{path}.paused", False)) if path != "pipeline" \
+                             else bool(pool_get(self.s, "pipeline.paused", False))
+                if cur_paused:
+                    continue
+                self._apply_one(path, paused=True, reason=reason, is_pipeline=(path == "pipeline"))
+                bucket.add(path)
 
     def _release_paused_for_reason(self, reason: str):
         bucket = self._granted_by.setdefault(reason, set())
-        for path in list(bucket):
-            self._apply_one(path, paused=False, reason="", is_pipeline=(path == "pipeline"))
-            bucket.discard(path)
+        with pool_transaction(self.s):
+            for path in list(bucket):
+                self._apply_one(path, paused=False, reason="", is_pipeline=(path == "pipeline"))
+                bucket.discard(path)
 
     # ---------- recompute ----------
     def _recompute_and_apply(self, now: float):
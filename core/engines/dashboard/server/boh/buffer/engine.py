@@ -5,6 +5,8 @@ from typing import Any, Dict, Optional, Tuple, List
 
 from core.state.pool import pool_get  # (not used now, kept only if other imports rely; can be removed)
 from core.vision.zones import compute_zone_ltrb
+from core.vision.capture.frame_cache import capture_window_region_cached
+from core.vision.matching.executor import map_jobs
 from core.vision.matching.template_matcher_2 import (
     match_key_in_zone_single,
     match_multi_in_zone,
@@ -147,12 +149,14 @@ class BufferEngine:
 
     # --- verification -----------------------------------------------------
 
-    def _token_present_in_buffs_zone(self, token: str, parts: List[str], thr: float) -> bool:
+    def _token_present_in_buffs_zone(self, token: str, parts: List[str], thr: float,
+                                     win: Optional[Dict] = None, zone_img=None) -> bool:
         """
         Проверка наличия ОДНОГО токена в зоне current_buffs.
         Используем match_multi_in_zone с map из одного ключа, чтобы получить мульти-масштаб (как в respawn).
+        win/zone_img — окно и уже захваченная зона (из verify_selected_buffs), чтобы не захватывать её на каждый токен.
         """
-        win = self._win()
+        win = win or self._win()
         if not win:
             return False
         ltrb = self._zone_ltrb(win, "current_buffs")
@@ -167,6 +171,7 @@ class BufferEngine:
             engine="dashboard",
             scales=(1.0, 0.9, 1.1),
             debug=False,
+            zone_img=zone_img,
         )
         return res is not None
 
@@ -192,7 +197,14 @@ class BufferEngine:
         if len(icons) != len(tokens):
             return False
 
-        for tok, parts in icons.items():
-            if not self._token_present_in_buffs_zone(tok, parts, thr):
-                return False
-        return True
+        # зона current_buffs захватывается один раз на всю проверку
+        zone_img = capture_window_region_cached(win, self._zone_ltrb(win, "current_buffs"))
+        if zone_img is None or zone_img.size == 0:
+            return False
+
+        # токены проверяются параллельно (пул матчинга), результат — как у последовательного цикла
+        found = map_jobs(
+            lambda item: self._token_present_in_buffs_zone(item[0], item[1], thr, win=win, zone_img=zone_img),
+            list(icons.items()),
+        )
+        return all(found)
@@ -7,7 +7,9 @@ import cv2
 import numpy as np
 
 from core.logging import console
-from core.vision.capture.window_bgr_capture import capture_window_region_bgr
+from core.vision.capture.frame_cache import capture_window_region_cached
+from core.vision.matching.template_cache import load_template
+from core.vision.matching.resolver_cache import resolve_cached
 from .dashboard_data import ZONES, TEMPLATES
 from .templates.resolver import resolve as tpl_resolve
 
@@ -34,17 +36,17 @@ def _match_on_window(win: Dict[str, Any], lang: str, tpl_key: str,
     parts = TEMPLATES.get(tpl_key)
     if not parts:
         return None
-    path = tpl_resolve(lang, *parts)
+    path = resolve_cached(tpl_resolve, lang, *parts)
     if not path:
         return None
 
     l, t, r, b = _zone_ltrb(win, ZONES.get(zone_key, ZONES["fullscreen"]))
-    img = capture_window_region_bgr(win, (l, t, r, b))
+    img = capture_window_region_cached(win, (l, t, r, b))
     if img is None or img.size == 0:
         return None
 
     gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-    tpl  = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+    tpl  = load_template(path, cv2.IMREAD_GRAYSCALE)
     if tpl is None or tpl.size == 0:
         return None
 
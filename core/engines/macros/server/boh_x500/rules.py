@@ -54,7 +54,7 @@ def run_step(
     # после успешного «ручного» прогона — сдвигаем таймер повтора
     try:
         if ok:
-            svc = (state.get("_services") or {}).get("macros_repeat")
+            svc = pool_get(state, "_services.macros_repeat")
             if hasattr(svc, "bump_all"):
                 svc.bump_all()
     except Exception:
@@ -6,7 +6,9 @@ from typing import Dict, Any, Optional, Callable, Tuple, List
 import numpy as np
 import cv2
 
-from core.vision.capture.window_bgr_capture import capture_window_region_bgr
+from core.vision.capture.frame_cache import capture_window_region_cached
+from core.vision.utils.palette_lut import compile_palettes
+from core.vision.utils.runs import longest_horizontal_run, longest_run_span
 from core.logging import console
 
 # === Параметры по умолчанию для метода «полоса по целевому цвету» ===
@@ -24,7 +26,13 @@ from .state_data import (
     COLORS as _SD_COLORS,
     HP_TOLERANCE_ALIVE as _SD_HP_TOL_ALIVE,
     DEFAULT_POLL_INTERVAL as _SD_FB_POLL_INTERVAL,
+    VITAL_COLORS as _SD_VITAL_COLORS,
+    VITAL_TOLERANCE as _SD_VITAL_TOL,
 )
+from core.engines.player_state.vitals import VitalsExtractor
+
+# только CP/MP и прочие откалиброванные полосы; HP считается основным путём ниже
+_VITALS = VitalsExtractor(_SD_VITAL_COLORS, tol=_SD_VITAL_TOL) if _SD_VITAL_COLORS else None
 
 
 class PlayerState:
@@ -64,35 +72,10 @@ def _mask_for_color_bgr(img_bgr, color_rgb: Tuple[int, int, int], tol: int) -> n
 def _mask_for_colors_bgr(img_bgr, colors_rgb: List[Tuple[int, int, int]], tol: int) -> np.ndarray:
     if img_bgr is None or img_bgr.size == 0:
         return np.zeros((0, 0), dtype=np.uint8)
-    acc = None
-    for rgb in colors_rgb or []:
-        m = _mask_for_color_bgr(img_bgr, rgb, tol)
-        acc = m if acc is None else cv2.bitwise_or(acc, m)
-    if acc is None:
-        acc = np.zeros(img_bgr.shape[:2], dtype=np.uint8)
-    return acc
-
-
-def _longest_horizontal_run(mask_bin: np.ndarray) -> int:
-    if mask_bin is None or mask_bin.size == 0:
-        return 0
-    m = (mask_bin > 0)
-    h, _ = m.shape[:2]
-    best_len = 0
-    for y in range(h):
-        row = m[y]
-        if not row.any():
-            continue
-        r = row.astype(np.int8)
-        edges = np.diff(np.concatenate(([0], r, [0])))
-        starts = np.where(edges == 1)[0]
-        ends = np.where(edges == -1)[0]
-        if starts.size and ends.size:
-            lengths = ends - starts
-            mx = int(lengths.max(initial=0))
-            if mx > best_len:
-                best_len = mx
-    return best_len
+    if not colors_rgb:
+        return np.zeros(img_bgr.shape[:2], dtype=np.uint8)
+    # все цвета палитры — один проход LUT вместо inRange на каждый цвет
+    return compile_palettes([("colors", colors_rgb)], tol).mask(img_bgr)
 
 
 def _estimate_hp_ratio_from_colorbar(
@@ -105,22 +88,108 @@ def _estimate_hp_ratio_from_colorbar(
     prev_ratio: float,
     *,
     zone_extra_down: int = DEFAULT_ZONE_EXTRA_DOWN,
+    img: Optional[np.ndarray] = None,
 ) -> float:
     if not win or zone_w <= 0 or zone_h <= 0 or full_px <= 0:
         return prev_ratio
 
-    ltrb = _compute_center_bottom_zone_ltrb(win, zone_w, zone_h, zone_extra_down)
-    img = capture_window_region_bgr(win, ltrb)
+    if img is None:
+        ltrb = _compute_center_bottom_zone_ltrb(win, zone_w, zone_h, zone_extra_down)
+        img = capture_window_region_cached(win, ltrb)
     if img is None or img.size == 0:
         return prev_ratio
 
+    merged = _hp_bar_mask(img, probe_color_rgb, color_tol)
+    max_run = longest_horizontal_run(merged)
+    ratio = max(0.0, min(1.0, float(max_run) / float(full_px)))
+    return ratio
+
+
+def _hp_bar_mask(img: np.ndarray, probe_color_rgb: Tuple[int, int, int], color_tol: int) -> np.ndarray:
     raw = _mask_for_color_bgr(img, probe_color_rgb, color_tol)
     kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (5, 1))
-    merged = cv2.morphologyEx(raw, cv2.MORPH_CLOSE, kernel, iterations=1)
+    return cv2.morphologyEx(raw, cv2.MORPH_CLOSE, kernel, iterations=1)
 
-    max_run = _longest_horizontal_run(merged)
-    ratio = max(0.0, min(1.0, float(max_run) / float(full_px)))
-    return ratio
+
+# ─────────────────────────────────────────────────────────────────────────────
+#   Быстрый путь: выученная геометрия полосы HP (строка + левый край)
+# ─────────────────────────────────────────────────────────────────────────────
+class _HPBarGeometry:
+    """
+    После полного замера с hp==1.0 запоминаем строку полосы и её левый край;
+    дальше читаем только полоску STRIP_H×(full_px + 2*MARGIN) вместо всей зоны.
+    Полоса убывает справа, поэтому серия обязана начинаться у выученного края —
+    иначе чтение неправдоподобно. Нулевая/неправдоподобная полоска перепроверяется
+    полным замером; MAX_BAD расхождений подряд или смена размера окна — переобучение.
+    """
+    STRIP_H = 3
+    MARGIN = 4    # > половины ядра закрытия (5×1): иначе закрытие «дотягивает» серию до края полоски
+    EDGE_TOL = 2  # допустимый сдвиг левого края, px
+    MAX_BAD = 3
+
+    def __init__(self):
+        self.strip: Optional[Tuple[int, int, int, int]] = None  # LTRB в координатах окна
+        self.win_size: Optional[Tuple[int, int]] = None
+        self.x0: int = 0  # левый край полосы внутри полоски
+        self.bad: int = 0
+
+    def reset(self, reason: str = "") -> None:
+        if self.strip is not None and reason:
+            console.log(f"[player_state] HP bar geometry reset: {reason}")
+        self.strip = None
+        self.win_size = None
+        self.bad = 0
+
+    @staticmethod
+    def _size(win: Dict) -> Tuple[int, int]:
+        return int(win.get("width", 0)), int(win.get("height", 0))
+
+    def strip_ltrb(self, win: Dict) -> Optional[Tuple[int, int, int, int]]:
+        if self.strip is None:
+            return None
+        if self._size(win) != self.win_size:
+            self.reset("window resized")
+            return None
+        return self.strip
+
+    def learn(self, win: Dict, zone_ltrb: Tuple[int, int, int, int], zone_img: np.ndarray,
+              probe_color_rgb: Tuple[int, int, int], color_tol: int, full_px: int) -> None:
+        if zone_img is None or zone_img.size == 0:
+            return
+        y, x, run = longest_run_span(_hp_bar_mask(zone_img, probe_color_rgb, color_tol))
+        if run < full_px:
+            return
+        W, H = self._size(win)
+        zl, zt = int(zone_ltrb[0]), int(zone_ltrb[1])
+        l = max(0, zl + x - self.MARGIN)
+        r = min(W, zl + x + full_px + self.MARGIN)
+        t = max(0, zt + y - self.STRIP_H // 2)
+        b = min(H, t + self.STRIP_H)
+        if r <= l or b <= t:
+            return
+        self.strip = (l, t, r, b)
+        self.win_size = (W, H)
+        self.x0 = zl + x - l
+        self.bad = 0
+        console.log(f"[player_state] HP bar geometry learned: strip={self.strip}")
+
+    def measure(self, img: Optional[np.ndarray], probe_color_rgb: Tuple[int, int, int],
+                color_tol: int, full_px: int) -> Optional[float]:
+        """hp по полоске или None — нужен полный замер (пусто/неправдоподобно)."""
+        if img is None or img.size == 0:
+            return None
+        _, x, run = longest_run_span(_hp_bar_mask(img, probe_color_rgb, color_tol))
+        if run <= 0:
+            return None
+        if abs(x - self.x0) > self.EDGE_TOL:
+            return None  # серия не у выученного края — решит полный замер
+        self.bad = 0
+        return max(0.0, min(1.0, float(run) / float(full_px)))
+
+    def miss(self, reason: str) -> None:
+        self.bad += 1
+        if self.bad >= self.MAX_BAD:
+            self.reset(reason)
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -135,22 +204,41 @@ class _HPFallbackTracker:
         self._last_log_ts: float = 0.0
         self.last_alive_seen_ts: float = 0.0  # когда в последний раз видели «живые» цвета (по колонкам)
 
-    # обучение на первом точном 100%: левый/правый край по всей зоне state
-    def learn(self, win: Dict) -> None:
-        if self.learned:
-            return
+    @staticmethod
+    def state_zone_ltrb() -> Optional[Tuple[int, int, int, int]]:
         try:
             st = _SD_ZONES["state"]
             state_l = int(st.get("left", 0))
             state_t = int(st.get("top", 0))
             state_w = int(st.get("width", 0))
             state_h = int(st.get("height", 0))
-            state_r = state_l + max(0, state_w)
-            state_b = state_t + max(0, state_h)
         except Exception:
+            return None
+        return (state_l, state_t, state_l + max(0, state_w), state_t + max(0, state_h))
+
+    # полоса из уже снятой зоны state (view); None — не обучен или полоса вне кадра
+    def bar_view(self, state_img: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        ltrb_state = self.state_zone_ltrb()
+        if not (self.learned and self.bar_rect) or ltrb_state is None:
+            return None
+        if state_img is None or state_img.size == 0:
+            return None
+        l, t, r, b = self.bar_rect
+        sl, st = ltrb_state[0], ltrb_state[1]
+        if l < sl or t < st or (r - sl) > state_img.shape[1] or (b - st) > state_img.shape[0]:
+            return None
+        return state_img[t - st:b - st, l - sl:r - sl]
+
+    # обучение на первом точном 100%: левый/правый край по всей зоне state
+    def learn(self, win: Dict, img: Optional[np.ndarray] = None) -> None:
+        if self.learned:
             return
-        ltrb_state = (state_l, state_t, state_r, state_b)
-        img = capture_window_region_bgr(win, ltrb_state)
+        ltrb_state = self.state_zone_ltrb()
+        if ltrb_state is None:
+            return
+        state_l, state_t = ltrb_state[0], ltrb_state[1]
+        if img is None:
+            img = capture_window_region_cached(win, ltrb_state)
         if img is None or img.size == 0:
             return
 
@@ -188,11 +276,11 @@ class _HPFallbackTracker:
         self.learned = True
 
     # мгновенный замер фолбэка (без троттлинга)
-    def probe_now(self, win: Dict) -> Optional[float]:
+    def probe_now(self, win: Dict, img: Optional[np.ndarray] = None) -> Optional[float]:
         if not (self.learned and self.bar_rect and self.bar_len > 0):
             return None
-        l, t, r, b = self.bar_rect
-        img = capture_window_region_bgr(win, (l, t, r, b))
+        if img is None:
+            img = capture_window_region_cached(win, self.bar_rect)
         if img is None or img.size == 0:
             return None
 
@@ -216,12 +304,12 @@ class _HPFallbackTracker:
         return ratio
 
     # периодический лог (раз в 1с)
-    def maybe_log(self, win: Dict, now: float) -> None:
+    def maybe_log(self, win: Dict, now: float, img: Optional[np.ndarray] = None) -> None:
         if not self.active:
             return
         if now - self._last_log_ts < float(_SD_FB_POLL_INTERVAL):
             return
-        val = self.probe_now(win)
+        val = self.probe_now(win, img=img)
         if val is None:
             return
         l, t, r, b = self.bar_rect or (0, 0, 0, 0)
@@ -239,7 +327,9 @@ def start(ctx_base: Dict[str, Any], cfg: Dict[str, Any]) -> bool:
     - если фолбэк ≥0.01 → фолбэк активен (лог 1c; основной не публикует on_update);
       если фолбэк <0.01 → ноль подтверждён, фолбэк не включаем;
     - эвристика «жив» при мигающем HP: если в течение 1.5с видели «живые» цвета, шлём наверх
-      сигнал fallback_alive (пул: alive=True, hp скрыт, HUD предупреждение).
+      сигнал fallback_alive (пул: alive=True, hp скрыт, HUD предупреждение);
+    - CP/MP — из зоны state (VitalsExtractor), только если в VITAL_COLORS есть откалиброванные
+      полосы; публикуются вместе с hp одним on_update, иначе None и зона state по тикам не снимается.
     """
     get_window = ctx_base["get_window"]
     on_update: Optional[Callable[[Dict[str, Any]], None]] = ctx_base.get("on_update")
@@ -255,6 +345,7 @@ def start(ctx_base: Dict[str, Any], cfg: Dict[str, Any]) -> bool:
     poll_interval: float = float(cfg.get("poll_interval", DEFAULT_POLL_INTERVAL))
 
     tracker = _HPFallbackTracker()
+    geometry = _HPBarGeometry()
 
     prev_ratio = 1.0
     was_paused = False
@@ -271,7 +362,7 @@ def start(ctx_base: Dict[str, Any], cfg: Dict[str, Any]) -> bool:
                     was_paused = True
                     if on_update:
                         try:
-                            on_update({"paused": True, "hp_ratio": None, "cp_ratio": None, "ts": time.time()})
+                            on_update({"paused": True, "hp_ratio": None, "cp_ratio": None, "mp_ratio": None, "ts": time.time()})
                         except Exception:
                             pass
                 time.sleep(poll_interval)
@@ -290,9 +381,40 @@ def start(ctx_base: Dict[str, Any], cfg: Dict[str, Any]) -> bool:
                 time.sleep(poll_interval)
                 continue
 
-            # основной замер
+            # зона основного замера (или выученная полоска) — отдельным захватом:
+            # общий bounding box с зоной state в левом верхнем углу вышел бы почти на весь экран
+            zone_ltrb = _compute_center_bottom_zone_ltrb(win, zone_w, zone_h, zone_extra_down)
+            strip_ltrb = geometry.strip_ltrb(win)
+            try:
+                main_img = capture_window_region_cached(win, strip_ltrb or zone_ltrb)
+            except Exception:
+                main_img = None
+            # зона state читается целиком только ради виталов (CP/MP); без откалиброванных
+            # полос фолбэк сам снимает её при обучении и полосу при hp<0.01
+            state_img = None
+            state_ltrb = tracker.state_zone_ltrb() if _VITALS is not None else None
+            if state_ltrb is not None:
+                try:
+                    state_img = capture_window_region_cached(win, state_ltrb)
+                except Exception:
+                    state_img = None
+
             try:
-                hp_ratio = _estimate_hp_ratio_from_colorbar(
+                vitals = _VITALS.extract(state_img) if _VITALS is not None else {}
+            except Exception:
+                vitals = {}
+
+            # основной замер: сперва по полоске, при сомнении — по всей зоне
+            fast_ratio: Optional[float] = None
+            if strip_ltrb is not None:
+                fast_ratio = geometry.measure(main_img, probe_color_rgb, color_tol, full_px)
+                if fast_ratio is None:
+                    try:
+                        main_img = capture_window_region_cached(win, zone_ltrb)
+                    except Exception:
+                        main_img = None
+            try:
+                hp_ratio = fast_ratio if fast_ratio is not None else _estimate_hp_ratio_from_colorbar(
                     win=win,
                     probe_color_rgb=probe_color_rgb,
                     color_tol=color_tol,
@@ -301,21 +423,29 @@ def start(ctx_base: Dict[str, Any], cfg: Dict[str, Any]) -> bool:
                     full_px=full_px,
                     prev_ratio=prev_ratio,
                     zone_extra_down=zone_extra_down,
+                    img=main_img,
                 )
                 prev_ratio = hp_ratio
             except Exception:
                 hp_ratio = prev_ratio
 
+            if fast_ratio is None:
+                if strip_ltrb is not None and hp_ratio > 0.0:
+                    # полоска пустая/сдвинута, а полная зона видит полосу
+                    geometry.miss("strip disagrees with full zone")
+                if geometry.strip is None and hp_ratio == 1.0:
+                    geometry.learn(win, zone_ltrb, main_img, probe_color_rgb, color_tol, full_px)
+
             now = time.time()
 
             # обучение на первом точном 100%
             if (not tracker.learned) and (hp_ratio == 1.0):
-                tracker.learn(win)
+                tracker.learn(win, img=state_img)
 
             # если основной <0.01 — опросить фолбэк СЕЙЧАС
             fb_val: Optional[float] = None
             if tracker.learned and hp_ratio < 0.01:
-                fb_val = tracker.probe_now(win)
+                fb_val = tracker.probe_now(win, img=tracker.bar_view(state_img))
                 # включение/выключение режима фолбэка для логов
                 if fb_val is not None and fb_val >= 0.01:
                     tracker.active = True
@@ -341,11 +471,16 @@ def start(ctx_base: Dict[str, Any], cfg: Dict[str, Any]) -> bool:
 
             # вывод
             if tracker.active:
-                tracker.maybe_log(win, now)  # только лог раз в 1с
+                tracker.maybe_log(win, now, img=tracker.bar_view(state_img))  # только лог раз в 1с
             else:
                 if on_update:
                     try:
-                        payload = {"hp_ratio": float(hp_ratio), "ts": now}
+                        payload = {
+                            "hp_ratio": float(hp_ratio),
+                            "cp_ratio": vitals.get("cp"),
+                            "mp_ratio": vitals.get("mp"),
+                            "ts": now,
+                        }
                         if handover_to_main:
                             payload["fallback_clear_hud"] = True
                         on_update(payload)
@@ -26,5 +26,25 @@ COLORS: Dict[str, List[RGB]] = {
 HP_TOLERANCE_ALIVE: int = 1
 HP_TOLERANCE_DEAD: int = 1
 
+# Палитры полос зоны STATE для экстрактора виталов (core/engines/player_state/vitals.py):
+# "alive" — заполненная часть, "empty" — пустая. HP сюда не входит — его меряет
+# основной путь движка. В VITAL_COLORS — только откалиброванные по скриншотам
+# клиента полосы: всё, что здесь есть, публикуется в пул (cp_ratio/mp_ratio).
+VITAL_COLORS: Dict[str, Dict[str, List[RGB]]] = {}
+
+# Черновые CP/MP — не откалиброваны, в пул не идут. После проверки по скриншоту
+# (tools/average_rgb.py) перенести в VITAL_COLORS.
+VITAL_COLORS_DRAFT: Dict[str, Dict[str, List[RGB]]] = {
+    "cp": {
+        "alive": [(165, 105, 8), (178, 117, 0), (196, 130, 12), (214, 146, 24), (230, 170, 48)],
+        "empty": [(62, 47, 24), (74, 56, 29), (86, 66, 36)],
+    },
+    "mp": {
+        "alive": [(14, 48, 118), (20, 60, 140), (28, 74, 160), (36, 90, 178), (48, 108, 196)],
+        "empty": [(26, 34, 56), (32, 42, 66), (40, 52, 78)],
+    },
+}
+VITAL_TOLERANCE: int = 2
+
 # Период опроса по умолчанию (сек.)
 DEFAULT_POLL_INTERVAL: float = 1.0
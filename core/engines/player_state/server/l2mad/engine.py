@@ -4,8 +4,8 @@ import time
 from typing import Dict, Any, Optional, Callable
 
 import numpy as np
-from core.vision.capture.window_bgr_capture import capture_window_region_bgr
-from core.vision.utils.colors import mask_for_colors_bgr, biggest_horizontal_band
+from core.vision.capture.frame_cache import capture_window_region_cached
+from core.vision.utils.colors import mask_for_colors_bgr, masks_for_palettes_bgr, biggest_horizontal_band
 from core.logging import console
 
 from .state_data import ZONES, COLORS, HP_COLOR_TOLERANCE, DEFAULT_POLL_INTERVAL
@@ -20,12 +20,16 @@ class PlayerState:
 
 def _compute_hp_ratio(win: Dict, zone_ltrb: tuple, colors_alive, colors_dead, tol: int,
                       prev_ratio: float) -> float:
-    img = capture_window_region_bgr(win, zone_ltrb)
+    img = capture_window_region_cached(win, zone_ltrb)
     if img is None or img.size == 0:
         return prev_ratio  # нет кадра — держим прошлую оценку
 
-    alive_mask = mask_for_colors_bgr(img, colors_alive, tol=tol) if colors_alive else None
-    dead_mask  = mask_for_colors_bgr(img, colors_dead,  tol=tol) if colors_dead  else None
+    if colors_alive and colors_dead:
+        masks = masks_for_palettes_bgr(img, {"alive": colors_alive, "dead": colors_dead}, tol=tol)
+        alive_mask, dead_mask = masks["alive"], masks["dead"]
+    else:
+        alive_mask = mask_for_colors_bgr(img, colors_alive, tol=tol) if colors_alive else None
+        dead_mask  = mask_for_colors_bgr(img, colors_dead,  tol=tol) if colors_dead  else None
 
     if alive_mask is not None and dead_mask is not None:
         a_rect = biggest_horizontal_band(alive_mask)
@@ -0,0 +1,62 @@
+# core/engines/player_state/vitals.py
+"""
+Экстрактор виталов (HP/CP/MP) из одного кадра зоны STATE.
+
+Для каждого витала в state_data сервера задаются две палитры: заполненная
+часть полосы ("alive") и пустая ("empty"). Все палитры компилируются в один
+классификатор (core.vision.utils.palette_lut) и считаются за один проход.
+Строка полосы — строка с самой длинной серией alive|empty; ratio — доля
+колонок alive среди колонок полосы в этой строке (±1 строка). Абсолютная
+длина полосы не нужна, поэтому геометрия зоны может «гулять».
+
+Exports:
+- VitalsExtractor(vital_colors, tol=2, min_bar_px=MIN_BAR_PX)
+- VitalsExtractor.extract(img_bgr) -> {"hp": float|None, "cp": ..., "mp": ...}  # None — полоса не найдена
+"""
+from __future__ import annotations
+
+from typing import Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from core.vision.utils.palette_lut import compile_palettes
+from core.vision.utils.runs import row_max_runs
+
+RGB = Tuple[int, int, int]
+
+MIN_BAR_PX: int = 10  # короче — не полоса, а шум
+
+
+class VitalsExtractor:
+    def __init__(self, vital_colors: Mapping[str, Mapping[str, List[RGB]]], tol: int = 2,
+                 min_bar_px: int = MIN_BAR_PX):
+        self.names: List[str] = [str(n) for n in vital_colors]
+        self.min_bar_px = int(min_bar_px)
+        palettes = []
+        for name in self.names:
+            spec = vital_colors[name] or {}
+            palettes.append((name, list(spec.get("alive") or [])))
+            palettes.append((name + "_empty", list(spec.get("empty") or [])))
+        self._clf = compile_palettes(palettes, tol)
+
+    def _ratio(self, alive: np.ndarray, empty: np.ndarray) -> Optional[float]:
+        bar = np.bitwise_or(alive, empty)
+        runs = row_max_runs(bar)
+        if runs.size == 0:
+            return None
+        y = int(np.argmax(runs))
+        if int(runs[y]) < self.min_bar_px:
+            return None
+        rows = slice(max(0, y - 1), y + 2)
+        a_cols = (alive[rows] > 0).any(axis=0)
+        bar_cols = (bar[rows] > 0).any(axis=0)
+        total = int(np.count_nonzero(bar_cols))
+        if total < self.min_bar_px:
+            return None
+        return max(0.0, min(1.0, float(np.count_nonzero(a_cols)) / float(total)))
+
+    def extract(self, img_bgr: Optional[np.ndarray]) -> Dict[str, Optional[float]]:
+        if img_bgr is None or img_bgr.size == 0:
+            return {n: None for n in self.names}
+        masks = self._clf.masks(img_bgr)
+        return {n: self._ratio(masks[n], masks[n + "_empty"]) for n in self.names}
@@ -26,6 +26,14 @@ _ALLOWED_FILES = {
     # добавишь сюда новые имена — они сразу начнут резолвиться
 }
 
+# Масштабы мульти-масштабного поиска по файлу шаблона (resolver_cache.template_scales);
+# файла нет в списке — используются scales вызова.
+SCALES = {
+    "to_village_button.png": (1.0, 0.95, 1.05),
+    "accept_button.png":     (1.0, 0.95, 1.05),
+    "reborn_banner.png":     (1.0, 0.95, 1.05),
+}
+
 def _templates_root() -> str:
     return os.path.abspath(os.path.dirname(__file__))
 
@@ -461,7 +461,7 @@ def _set_last_respawn(state: Dict[str, Any], rtype: str) -> None:
 
 def _reset_macros_after_respawn(state: Dict[str, Any]) -> None:
     try:
-        svc = (state.get("_services") or {}).get("macros_repeat")
+        svc = pool_get(state, "_services.macros_repeat")
         if hasattr(svc, "bump_all"):
             svc.bump_all()
     except Exception:
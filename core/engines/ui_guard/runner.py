@@ -5,7 +5,7 @@ import time
 import threading
 
 from core.logging import console
-from core.state.pool import pool_write, pool_get
+from core.state.pool import pool_write, pool_get, pool_transaction
 
 
 class UIGuardRunner:
@@ -73,18 +73,19 @@ class UIGuardRunner:
             return
         features = ("respawn", "buff", "macros", "teleport", "record", "autofarm", "stabilize")
         services = ("player_state", "macros_repeat", "autofarm")
-        for fk in features:
-            try:
-                if bool(pool_get(self._state, f"features.{fk}.paused", False)):
-                    pool_write(self._state, f"features.{fk}", {"pause_reason": reason})
-            except Exception:
-                pass
-        for sk in services:
-            try:
-                if bool(pool_get(self._state, f"services.{sk}.paused", False)):
-                    pool_write(self._state, f"services.{sk}", {"pause_reason": reason})
-            except Exception:
-                pass
+        with pool_transaction(self._state):
+            for fk in features:
+                try:
+                    if bool(pool_get(self._state, f"features.{fk}.paused", False)):
+                        pool_write(self._state, f"features.{fk}", {"pause_reason": reason})
+                except Exception:
+                    pass
+            for sk in services:
+                try:
+                    if bool(pool_get(self._state, f"services.{sk}.paused", False)):
+                        pool_write(self._state, f"services.{sk}", {"pause_reason": reason})
+                except Exception:
+                    pass
 
     def _baseline_reason(self) -> str:
         """Определить текущую «базовую» причину координатора (cor_2 > cor_1)."""
@@ -108,6 +109,17 @@ class UIGuardRunner:
             pass
         return "empty"
 
+    def _detect_all(self, win: Dict[str, Any], lang: str) -> Dict[str, bool]:
+        detect_all = getattr(self.engine, "detect_all", None)
+        if callable(detect_all):
+            return detect_all(win, lang)
+        return {
+            "pages_blocker": bool(self.engine.detect_pages_blocker(win, lang)),
+            "dashboard_blocker": bool(self.engine.detect_dashboard_blocker(win, lang)),
+            "language_blocker": bool(self.engine.detect_language_blocker(win, lang)),
+            "disconnect_blocker": bool(self.engine.detect_disconnect_blocker(win, lang)),
+        }
+
     # ---- main single-run -------------------------------------------------
     def run_once(self) -> Dict[str, Any]:
         # 0) Ранние выходы БЕЗ записи в пул (не дергаем busy/pause_reason)
@@ -131,9 +143,13 @@ class UIGuardRunner:
         closed_any = False  # что-то реально закрыли
         # found_any больше не нужен для финала — если не нашли/всё закрыли, отдаём empty
 
+        # Первичная проверка всех блокеров — одним проходом по одному кадру (если движок умеет).
+        # Повторные проверки после закрытия — точечные: экран к тому моменту уже другой.
+        found = self._detect_all(win, lang)
+
         # ===== 1) pages_blocker =====
         # self._pool_set(report="pages_blocker")
-        if self.engine.detect_pages_blocker(win, lang):
+        if found["pages_blocker"]:
             clicked = bool(self.engine.close_all_pages_crosses(win, lang))
             closed_any = closed_any or clicked
 
@@ -146,10 +162,11 @@ class UIGuardRunner:
                 return {"found": True, "closed": closed_any, "key": reason, "reason": reason}
             else:
                 console.hud("succ", "pages_blocker закрыт")
+                found = self._detect_all(win, lang)  # экран изменился — пересобрать картину
 
         # ===== 2) dashboard_blocker =====
 #         self._pool_set(report="dashboard_blocker")
-        if self.engine.detect_dashboard_blocker(win, lang):
+        if found["dashboard_blocker"]:
             handled = bool(self.engine.close_dashboard_blocker(win, lang))
             closed_any = closed_any or handled
 
@@ -160,10 +177,11 @@ class UIGuardRunner:
                 return {"found": True, "closed": closed_any, "key": reason, "reason": reason}
             else:
                 console.hud("succ", "dashboard_blocker закрыт")
+                found = self._detect_all(win, lang)  # экран изменился — пересобрать картину
 
         # ===== 3) language_blocker =====
 #         self._pool_set(report="language_blocker")
-        if self.engine.detect_language_blocker(win, lang):
+        if found["language_blocker"]:
             handled = bool(self.engine.handle_language_blocker(win, lang))
             closed_any = closed_any or handled
 
@@ -174,10 +192,11 @@ class UIGuardRunner:
                 return {"found": True, "closed": closed_any, "key": reason, "reason": reason}
             else:
                 console.hud("succ", "language_blocker закрыт")
+                found = self._detect_all(win, lang)  # экран изменился — пересобрать картину
 
         # ===== 4) disconnect_blocker (уведомление) =====
 #         self._pool_set(report="disconnect_blocker")
-        if self.engine.detect_disconnect_blocker(win, lang):
+        if found["disconnect_blocker"]:
             reason = "disconnect_blocker"
             console.hud("att", "Обнаружен disconnect_blocker")
             self.engine.handle_disconnect_blocker(win, lang)
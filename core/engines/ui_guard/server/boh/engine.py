@@ -4,7 +4,8 @@ import time
 from typing import Optional, Dict, Tuple, Any
 
 from core.vision.zones import compute_zone_ltrb
-from core.vision.matching.template_matcher_2 import match_key_in_zone_single
+from core.vision.capture.frame_cache import capture_window_region_cached
+from core.vision.matching.template_matcher_2 import match_key_in_zone_single, match_many
 
 from .ui_guard_data import (
     ZONES,
@@ -16,7 +17,7 @@ from .ui_guard_data import (
 )
 
 from core.logging import console
-from core.state.pool import pool_get, pool_write
+from core.state.pool import pool_get, pool_write, pool_transaction
 
 
 Point = Tuple[int, int]
@@ -30,7 +31,8 @@ class UIGuardEngine:
     """
     Движок «стража UI»:
       - Обособленные проверки: pages_blocker, dashboard_blocker, language_blocker, disconnect_blocker
-      - Поиск шаблонов — как в dashboard/buffer: match_key_in_zone_single (без своих cv2-циклов)
+      - Поиск шаблонов — как в dashboard/buffer: match_key_in_zone_single (без своих cv2-циклов);
+        группы шаблонов (detect_all, pages) — одним match_many по одному кадру
       - Клик — явный через контроллер, затем перепроверка исчезновения
     """
 
@@ -97,14 +99,61 @@ class UIGuardEngine:
         )
         return pt
 
+    def _match_group(self, window: Dict, lang: str, templates: Dict[str, Tuple[str, ...]],
+                     thr: float) -> Dict[str, Point]:
+        """Один захват + один GRAY на группу шаблонов → {key: point} прошедших порог."""
+        if not window or not templates:
+            return {}
+        ltrb = self._zone_ltrb(window, "fullscreen")
+        frame = capture_window_region_cached(window, ltrb)
+        if frame is None or frame.size == 0:
+            return {}
+        hits = match_many(
+            frame,
+            templates,
+            server=self.server,
+            lang=(lang or "rus").lower(),
+            engine="ui_guard",
+            window=window,
+            zone_ltrb=ltrb,
+            threshold=float(thr),
+        )
+        return {k: pt for k, (score, pt) in hits.items() if score >= float(thr)}
+
+    @classmethod
+    def _blocker_templates(cls) -> Dict[str, Tuple[str, ...]]:
+        """Шаблоны всех детекторов: pages:<key>, dashboard_blocker, language_blocker, disconnect_blocker."""
+        out: Dict[str, Tuple[str, ...]] = {
+            f"pages:{k}": cls._parts("pages", fname) for k, fname in (PAGES_BLOCKER or {}).items()
+        }
+        for key, group, table in (
+            ("dashboard_blocker", "dashboard", DASHBOARD_BLOCKER),
+            ("language_blocker", "wrong_word", LANGUAGE_BLOCKER),
+            ("disconnect_blocker", "disconnect", DISCONNECT_BLOCKER),
+        ):
+            fname = (table or {}).get(key, "")
+            if fname:
+                out[key] = cls._parts(group, fname)
+        return out
+
+    # ====== весь проход детекторов одним вызовом ======
+    def detect_all(self, window: Dict, lang: str) -> Dict[str, bool]:
+        """
+        {"pages_blocker", "dashboard_blocker", "language_blocker", "disconnect_blocker"} → найден ли,
+        по одному кадру и одному match_many.
+        """
+        hits = self._match_group(window, lang, self._blocker_templates(), self.click_threshold)
+        return {
+            "pages_blocker": any(k.startswith("pages:") for k in hits),
+            "dashboard_blocker": "dashboard_blocker" in hits,
+            "language_blocker": "language_blocker" in hits,
+            "disconnect_blocker": "disconnect_blocker" in hits,
+        }
+
     # ====== pages_blocker ======
     def detect_pages_blocker(self, window: Dict, lang: str) -> bool:
-        for fname in (PAGES_BLOCKER or {}).values():
-            parts = self._parts("pages", fname)
-            pt = self._match(window, lang, parts, self.click_threshold)
-            if pt:
-                return True
-        return False
+        templates = {k: self._parts("pages", fname) for k, fname in (PAGES_BLOCKER or {}).items()}
+        return bool(self._match_group(window, lang, templates, self.click_threshold))
 
     def close_all_pages_crosses(self, window: Dict, lang: str) -> bool:
         """
@@ -239,17 +288,19 @@ class UIGuardEngine:
                 "autofarm_cfg": pool_get(self.s, "features.autofarm.config", {}),
             }
 
-            for node in ("respawn", "buff", "macros", "teleport", "record", "autofarm", "stabilize"):
-                pool_write(self.s, f"features.{node}", {"status": "idle", "busy": False, "waiting": False})
-            pool_write(self.s, "features.ui_guard", {"busy": False, "report": "empty"})
-            pool_write(self.s, "features.buff", {"attempts": 0})
-            pool_write(self.s, "features.teleport", {"attempts": 0})
+            # сброс одной транзакцией: оркестратор и подписчики видят его целиком
+            with pool_transaction(self.s):
+                for node in ("respawn", "buff", "macros", "teleport", "record", "autofarm", "stabilize"):
+                    pool_write(self.s, f"features.{node}", {"status": "idle", "busy": False, "waiting": False})
+                pool_write(self.s, "features.ui_guard", {"busy": False, "report": "empty"})
+                pool_write(self.s, "features.buff", {"attempts": 0})
+                pool_write(self.s, "features.teleport", {"attempts": 0})
 
-            for k in ("respawn", "buff", "macros", "teleport", "record", "autofarm"):
-                pool_write(self.s, f"features.{k}", {"enabled": keep[k]})
-            pool_write(self.s, "features.autofarm", {"config": keep["autofarm_cfg"]})
+                for k in ("respawn", "buff", "macros", "teleport", "record", "autofarm"):
+                    pool_write(self.s, f"features.{k}", {"enabled": keep[k]})
+                pool_write(self.s, "features.autofarm", {"config": keep["autofarm_cfg"]})
 
-            pool_write(self.s, "player", {"alive": None, "hp_ratio": None, "cp_ratio": None})
+                pool_write(self.s, "player", {"alive": None, "hp_ratio": None, "cp_ratio": None, "mp_ratio": None})
         except Exception as e:
             console.log(f"[UNSTUCK] pool reset error: {e}")
 
@@ -65,6 +65,10 @@ class PipelineRule:
     # cooldown
     def _cd(self, secs: float):
         self._busy_until = time.time() + max(0.0, secs)
+
+    def wake_at(self) -> float:
+        """Когда правилу снова нужен тик (конец кулдауна), для OrchestratorLoop."""
+        return self._busy_until
     # ---------- lifecycle ----------
     def when(self, snap: Snapshot) -> bool:
 
@@ -4,17 +4,26 @@ from typing import Any, Dict
 import json
 
 from core.orchestrators.snapshot import build_snapshot
-from core.state.pool import pool_get, dump_pool
+from core.state.pool import pool_get, dump_pool_since
+
+
+_pool_log_cursor: Dict[int, int] = {}  # id(state) -> версия последнего лога
 
 
 def log_pool_snapshot(state: Dict[str, Any]) -> None:
     """
     Консольный лог пула (для отладки). Не экспортируется в UI.
+    Первый вызов печатает весь пул, дальше — только изменившиеся поддеревья.
     """
     try:
-        snap = dump_pool(state, compact=True)
+        delta = dump_pool_since(state, _pool_log_cursor.get(id(state), 0), compact=True)
+        _pool_log_cursor[id(state)] = delta["version"]
+        if not delta["changes"]:
+            return
+        snap = delta["changes"][""] if delta["full"] else delta["changes"]
         print("----------------------------------------")
-        print("[POOL]", json.dumps(snap, ensure_ascii=False, sort_keys=True))
+        print("[POOL]" if delta["full"] else f"[POOL Δ v{delta['version']}]",
+              json.dumps(snap, ensure_ascii=False, sort_keys=True))
         print("----------------------------------------")
     except Exception as e:
         print("[POOL] dump error:", e)
@@ -3,7 +3,30 @@ from dataclasses import dataclass, field
 from typing import Any, Dict, Optional
 import time
 
-from core.state.pool import pool_get
+from core.state.pool import pool_path, pool_reading
+
+# пути пула компилируются один раз (build_snapshot вызывается каждый тик)
+_P_WIN_INFO = pool_path("window.info")
+_P_WIN_FOUND = pool_path("window.found")
+_P_ALIVE = pool_path("player.alive")
+_P_HP = pool_path("player.hp_ratio")
+_P_FOCUSED = pool_path("focus.is_focused")
+_P_FOCUS_TS = pool_path("focus.ts")
+_P_RESPAWN_ENABLED = pool_path("features.respawn.enabled")
+_P_MACROS_ENABLED = pool_path("features.macros.enabled")
+_P_BUFF_ENABLED = pool_path("features.buff.enabled")
+_P_TELEPORT_ENABLED = pool_path("features.teleport.enabled")
+_P_AUTOFARM_ENABLED = pool_path("features.autofarm.enabled")
+_P_UI_GUARD_BUSY = pool_path("features.ui_guard.busy")
+_P_UI_GUARD_PAUSED = pool_path("features.ui_guard.paused")
+_P_UI_GUARD_REPORT = pool_path("features.ui_guard.report")
+_P_PIPELINE_PAUSED = pool_path("pipeline.paused")
+_P_PIPELINE_REASON = pool_path("pipeline.pause_reason")
+
+_FEATURE_KEYS = ("respawn", "buff", "teleport", "macros", "record", "autofarm", "ui_guard", "stabilize")
+_SERVICE_KEYS = ("player_state", "macros_repeat", "autofarm")
+_P_FEATURE_PAUSED = tuple(pool_path(f"features.{k}.paused") for k in _FEATURE_KEYS)
+_P_SERVICE_PAUSED = tuple(pool_path(f"services.{k}.paused") for k in _SERVICE_KEYS)
 
 
 @dataclass
@@ -29,26 +52,32 @@ def build_snapshot(state: Dict[str, Any], _ps_adapter=None) -> Snapshot:
     """
     Единый builder снапшота ИСКЛЮЧИТЕЛЬНО из пула (_state).
     Параметр _ps_adapter сохранён для совместимости сигнатуры, но не используется.
+    Все значения читаются под одной блокировкой чтения — из одной версии пула.
     """
+    with pool_reading(state):
+        return _build_snapshot(state)
+
+
+def _build_snapshot(state: Dict[str, Any]) -> Snapshot:
 
     # --- window ---
-    win_info = pool_get(state, "window.info", None)
-    win_found = bool(pool_get(state, "window.found", False))
+    win_info = _P_WIN_INFO.get(state, None)
+    win_found = bool(_P_WIN_FOUND.get(state, False))
     has_window = bool(
         win_found and isinstance(win_info, dict) and "width" in win_info and "height" in win_info
     )
 
     # --- player ---
-    alive = pool_get(state, "player.alive", None)
-    hp_ratio = pool_get(state, "player.hp_ratio", None)
+    alive = _P_ALIVE.get(state, None)
+    hp_ratio = _P_HP.get(state, None)
     try:
         hp_ratio = float(hp_ratio) if hp_ratio is not None else None
     except Exception:
         hp_ratio = None
 
     # --- focus ---
-    is_focused = pool_get(state, "focus.is_focused", None)
-    focus_ts = float(pool_get(state, "focus.ts", 0.0) or 0.0)
+    is_focused = _P_FOCUSED.get(state, None)
+    focus_ts = float(_P_FOCUS_TS.get(state, 0.0) or 0.0)
     focus_unfocused_for_s = (
         max(0.0, time.time() - focus_ts)
         if (is_focused is False and focus_ts > 0.0)
@@ -56,33 +85,24 @@ def build_snapshot(state: Dict[str, Any], _ps_adapter=None) -> Snapshot:
     )
 
     # --- features flags ---
-    respawn_enabled  = bool(pool_get(state, "features.respawn.enabled",  False))
-    macros_enabled   = bool(pool_get(state, "features.macros.enabled",   False))
-    buff_enabled     = bool(pool_get(state, "features.buff.enabled",     False))
-    teleport_enabled = bool(pool_get(state, "features.teleport.enabled", False))
-    autofarm_enabled = bool(pool_get(state, "features.autofarm.enabled", False))
+    respawn_enabled  = bool(_P_RESPAWN_ENABLED.get(state, False))
+    macros_enabled   = bool(_P_MACROS_ENABLED.get(state, False))
+    buff_enabled     = bool(_P_BUFF_ENABLED.get(state, False))
+    teleport_enabled = bool(_P_TELEPORT_ENABLED.get(state, False))
+    autofarm_enabled = bool(_P_AUTOFARM_ENABLED.get(state, False))
 
     # --- ui_guard ---
-    ui_guard_busy   = bool(pool_get(state, "features.ui_guard.busy",   False))
-    ui_guard_paused = bool(pool_get(state, "features.ui_guard.paused", False))
-    ui_guard_report = str(pool_get(state, "features.ui_guard.report", "empty") or "empty")
+    ui_guard_busy   = bool(_P_UI_GUARD_BUSY.get(state, False))
+    ui_guard_paused = bool(_P_UI_GUARD_PAUSED.get(state, False))
+    ui_guard_report = str(_P_UI_GUARD_REPORT.get(state, "empty") or "empty")
 
     # --- агрегирование пауз ---
-    def _feat_paused(name: str) -> bool:
-        return bool(pool_get(state, f"features.{name}.paused", False))
-
-    def _svc_paused(name: str) -> bool:
-        return bool(pool_get(state, f"services.{name}.paused", False))
-
-    feature_keys = ["respawn", "buff", "teleport", "macros", "record", "autofarm", "ui_guard", "stabilize"]
-    service_keys = ["player_state", "macros_repeat", "autofarm"]
-
-    any_feature_paused_only = any(_feat_paused(k) for k in feature_keys)
-    any_service_paused      = any(_svc_paused(k) for k in service_keys)
+    any_feature_paused_only = any(bool(p.get(state, False)) for p in _P_FEATURE_PAUSED)
+    any_service_paused      = any(bool(p.get(state, False)) for p in _P_SERVICE_PAUSED)
 
     # --- состояние пайплайна ---
-    pipeline_paused       = bool(pool_get(state, "pipeline.paused", False))
-    pipeline_pause_reason = str(pool_get(state, "pipeline.pause_reason", "") or "")
+    pipeline_paused       = bool(_P_PIPELINE_PAUSED.get(state, False))
+    pipeline_pause_reason = str(_P_PIPELINE_REASON.get(state, "") or "")
 
     # единый флаг для удобства Pipeline.when
     any_feature_or_service_paused = (
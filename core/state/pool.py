@@ -1,34 +1,73 @@
 ﻿# core/state/pool.py
+"""
+Единый пул состояния (dict в корне state).
+
+Дефолты объявлены один раз в POOL_SCHEMA: ensure_pool() досоздаёт
+отсутствующие разделы верхнего уровня копией схемы, а аксессоры проверяют
+только, что этот state уже инициализирован (без построения литералов).
+Пути разбираются один раз: pool_path("a.b.c") — скомпилированный аксессор
+(кортеж ключей, кэшируется), им же пользуются pool_get/pool_set/pool_merge.
+
+Потокобезопасность: пул пишут сервисы, координатор, UI-поток и API pywebview.
+Записи через pool_* идут под RW-блокировкой; каждая запись (или целая
+pool_transaction) получает новую монотонную версию, и версия узла — номер
+последней записи в него или его потомков. Одиночный pool_get блокировку не
+берёт (шаг по dict атомарен под GIL) и может увидеть транзакцию наполовину;
+pool_reading даёт согласованное чтение нескольких значений, pool_snapshot —
+независимую копию. Писать только через pool_* — прямые изменения dict мимо
+версий и подписок не видны.
+Запись, не меняющая значение, версию не двигает; реальные изменения
+доставляются подписчикам pool_subscribe (слитно, на отдельном потоке).
+
+Exports:
+- POOL_SCHEMA
+- ensure_pool(state) -> state
+- pool_get / pool_set / pool_merge / pool_write
+- pool_path(path) -> PoolPath   # .get(state, default=None) / .set(state, value) / .merge(state, mapping, add_ts=True) / .version(state)
+- pool_version(state, path="") -> int
+- pool_transaction(state)       # with: атомарная группа записей, одна версия
+- pool_reading(state)           # with: согласованное чтение
+- pool_snapshot(state, *paths) -> (version, {path: copy})
+- pool_subscribe(path_prefix, callback, state=None) -> PoolSubscription  # callback(paths, version) на диспетчере
+- pool_unsubscribe(sub)
+- dump_pool(state, compact=True)
+- dump_pool_since(state, version=0, compact=True) -> {"version", "full", "changes": {path: value}, "deleted": [path]}
+"""
 from __future__ import annotations
-from typing import Any, Dict, Iterable
+from contextlib import contextmanager
+from copy import deepcopy
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import threading
 import time
 
+from core.logging import console
 
-def ensure_pool(state: Dict[str, Any]) -> Dict[str, Any]:
-    st = state
+
+POOL_SCHEMA: Dict[str, Any] = {
     # ---- Конфиг/мета ----
-    st.setdefault("app", {
+    "app": {
         "version": "",
         "update": {"available": False, "remote": "", "ts": 0.0},
         "ts": 0.0,
-    })
-    st.setdefault("config", {
+    },
+    "config": {
         "app_language": "ru",
         "server": "boh",
         "language": "rus",
         "profile": {},
         "profiles": [],
         "ts": 0.0,
-    })
-    st.setdefault("account", {"login": "", "password": "", "pin": "", "ts": 0.0})
+    },
+    "account": {"login": "", "password": "", "pin": "", "ts": 0.0},
 
     # ---- Окно/фокус/игрок/ui_guard ----
-    st.setdefault("window", {"info": None, "found": False, "title": "", "ts": 0.0})
-    st.setdefault("focus", {"is_focused": None, "ts": 0.0})
-    st.setdefault("player", {"alive": None, "hp_ratio": None, "cp_ratio": None, "ts": 0.0})
+    "window": {"info": None, "found": False, "title": "", "ts": 0.0},
+    "focus": {"is_focused": None, "ts": 0.0},
+    "player": {"alive": None, "hp_ratio": None, "cp_ratio": None, "mp_ratio": None, "ts": 0.0},
 
     # ---- Фичи ----
-    st.setdefault("features", {
+    "features": {
         "respawn": {
             "enabled": False, "wait_enabled": False, "wait_seconds": 120,
             "click_threshold": 0.70, "confirm_timeout_s": 6.0,
@@ -76,30 +115,33 @@ def ensure_pool(state: Dict[str, Any]) -> Dict[str, Any]:
             },
             "ts": 0.0
         }
-    })
+    },
 
     # ---- Пайплайн ----
-    st.setdefault("pipeline", {
+    "pipeline": {
         "allowed": ["respawn", "buff", "macros", "teleport", "record", "autofarm"],
         "order":   ["respawn", "buff", "macros", "teleport", "record", "autofarm"],
         "active": False, "idx": 0, "last_step": "", "paused": False, "pause_reason":"", "ts": 0.0,
-    })
+    },
 
     # ---- Сервисы ----
-    st.setdefault("services", {
+    "services": {
         "player_state": {"running": False, "busy": False, "paused": False, "pause_reason":"", "ts": 0.0},
         "window_focus": {"running": False, "busy": False, "paused": False, "pause_reason":"", "ts": 0.0},
         "macros_repeat": {"running": False, "busy": False, "paused": False, "pause_reason":"", "ts": 0.0},
         "autofarm": {"running": False, "busy": False, "paused": False, "pause_reason":"", "ts": 0.0},
-    })
+    },
 
     # ---- Runtime/Debug ----
-    st.setdefault("runtime", {
+    "runtime": {
         "orch": {"busy_until": 0.0, "active": False, "ts": 0.0},
         "debug": {
             "buff_zone": False, "log": False, "respawn_debug": False,
             "pipeline_debug": False, "pool_debug": False, "ui_guard_debug": False, "ts": 0.0,
         },
+        # тюнинг захвата/матчинга (prefs.json → wiring → configure_*); None — дефолт модуля/env
+        "vision": {"frame_ttl_ms": None, "frame_small_fraction": None,
+                   "pyramid_levels": None, "pyramid_min_area": None},
         # создается в coordinator'е
         # "pauses": {
         #   "reasons": {
@@ -110,37 +152,269 @@ def ensure_pool(state: Dict[str, Any]) -> Dict[str, Any]:
         #   },
         #   "ts": 0.0
         # }
-    })
+    },
+}
+
+_TOP_KEYS: Tuple[str, ...] = tuple(POOL_SCHEMA)
+
+Path = Tuple[str, ...]
+
+
+# ── Синхронизация ────────────────────────────────────────────────────────────
+class _RWLock:
+    """
+    Readers-writer lock с приоритетом писателя.
+    Реентерабелен: писатель может повторно брать запись и читать; читатель —
+    повторно читать. Запись изнутри чтения того же потока — RuntimeError
+    (апгрейд блокировки привёл бы к взаимной блокировке).
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer: Optional[int] = None
+        self._wdepth = 0
+        self._waiting_writers = 0
+        self._local = threading.local()
+
+    def acquire_read(self) -> None:
+        loc = self._local
+        depth = getattr(loc, "rdepth", 0)
+        if depth or self._writer == threading.get_ident():
+            loc.rdepth = depth + 1
+            if not depth:
+                loc.counted = False
+            return
+        with self._cond:
+            while self._writer is not None or self._waiting_writers:
+                self._cond.wait()
+            self._readers += 1
+        loc.rdepth = 1
+        loc.counted = True
+
+    def release_read(self) -> None:
+        loc = self._local
+        loc.rdepth -= 1
+        if loc.rdepth or not loc.counted:
+            return
+        loc.counted = False
+        with self._cond:
+            self._readers -= 1
+            if not self._readers:
+                self._cond.notify_all()
+
+    def acquire_write(self) -> None:
+        me = threading.get_ident()
+        if self._writer == me:
+            self._wdepth += 1
+            return
+        if getattr(self._local, "counted", False):
+            raise RuntimeError("pool: write inside a read section of the same thread")
+        with self._cond:
+            self._waiting_writers += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._cond.wait()
+            finally:
+                self._waiting_writers -= 1
+            self._writer = me
+            self._wdepth = 1
+
+    def release_write(self) -> None:
+        self._wdepth -= 1
+        if self._wdepth:
+            return
+        with self._cond:
+            self._writer = None
+            self._cond.notify_all()
+
+
+class _Store:
+    """Служебные данные пула: блокировка, версии узлов, открытая транзакция."""
+
+    def __init__(self):
+        self.lock = _RWLock()
+        self.version = 0
+        self.touched: Dict[Path, int] = {}   # узел или его потомок менялся в версии
+        self.replaced: Dict[Path, int] = {}  # узел записан целиком в версии
+        self.pending: List[Path] = []        # изменённые пути текущей транзакции
+        self.undo: List[Tuple[Dict[str, Any], str, Any]] = []  # (dict, key, старое|_MISSING) для отката
+
+    def node_version(self, parts: Path) -> int:
+        v = self.touched.get(parts, 0)
+        for i in range(len(parts) + 1):
+            r = self.replaced.get(parts[:i], 0)
+            if r > v:
+                v = r
+        return v
+
+    def commit(self) -> Tuple[int, List[Path]]:
+        """Вызывается под записью: одна новая версия на все изменения транзакции."""
+        self.undo = []
+        if not self.pending:
+            return self.version, []
+        self.version += 1
+        v = self.version
+        changed, self.pending = self.pending, []
+        for parts in changed:
+            self.replaced[parts] = v
+            for i in range(len(parts) + 1):
+                self.touched[parts[:i]] = v
+        return v, changed
+
+
+_MISSING = object()
+
+
+def _differs(old: Any, new: Any) -> bool:
+    if old is new:
+        # тот же изменяемый объект мог быть изменён на месте — считаем изменением
+        return isinstance(new, (dict, list, set))
+    try:
+        return bool(old != new)
+    except Exception:  # numpy и т.п.
+        return True
+
+
+_ensured: Optional[Dict[str, Any]] = None  # последний state, прошедший ensure_pool
+_ensured_store: Optional[_Store] = None
+_stores: Dict[int, Tuple[Dict[str, Any], _Store]] = {}
+_stores_lock = threading.Lock()
+
+
+def _store_of(state: Dict[str, Any]) -> _Store:
+    if state is _ensured and _ensured_store is not None:
+        return _ensured_store
+    with _stores_lock:
+        item = _stores.get(id(state))
+        if item is None or item[0] is not state:
+            item = (state, _Store())
+            _stores[id(state)] = item
+        return item[1]
+
+
+def ensure_pool(state: Dict[str, Any]) -> Dict[str, Any]:
+    global _ensured, _ensured_store
+    st = state
+    store = _store_of(st)
+    if any(key not in st for key in _TOP_KEYS):
+        store.lock.acquire_write()
+        try:
+            for key in _TOP_KEYS:
+                if key not in st:
+                    st[key] = deepcopy(POOL_SCHEMA[key])
+        finally:
+            store.lock.release_write()
+    _ensured, _ensured_store = st, store
     return st
 
 
-def _walk(d: Dict[str, Any], path: Iterable[str]) -> Dict[str, Any]:
+def _pool(state: Dict[str, Any]) -> Tuple[Dict[str, Any], _Store]:
+    if state is not _ensured:
+        ensure_pool(state)
+    return state, _store_of(state)
+
+
+def _walk(d: Dict[str, Any], path: Iterable[str], undo: Optional[list] = None) -> Dict[str, Any]:
     cur = d
     for p in path[:-1]:
-        cur = cur.setdefault(p, {})
+        if p in cur:
+            nxt = cur[p]
+        else:
+            nxt = cur[p] = {}
+            if undo is not None:
+                undo.append((cur, p, _MISSING))
+        cur = nxt
     return cur
 
 
+def _rollback(undo: list, mark: int) -> None:
+    while len(undo) > mark:
+        d, k, old = undo.pop()
+        if old is _MISSING:
+            d.pop(k, None)
+        else:
+            d[k] = old
+
+
+@lru_cache(maxsize=4096)
+def _split(path: str) -> Path:
+    return tuple(p for p in path.split(".") if p)
+
+
+class PoolPath:
+    """Скомпилированный путь в пуле: разбор строки — один раз при создании."""
+    __slots__ = ("path", "parts")
+
+    def __init__(self, path: str):
+        self.path = path
+        self.parts = _split(path)
+
+    def __repr__(self) -> str:
+        return f"PoolPath({self.path!r})"
+
+    def get(self, state: Dict[str, Any], default: Any = None) -> Any:
+        # одиночное чтение без блокировки: каждый шаг — атомарная операция dict под GIL;
+        # несколько значений из одной версии — через pool_reading/pool_snapshot
+        cur: Any = state if state is _ensured else ensure_pool(state)
+        for p in self.parts:
+            if not isinstance(cur, dict) or p not in cur:
+                return default
+            cur = cur[p]
+        return cur
+
+    def set(self, state: Dict[str, Any], value: Any) -> None:
+        parts = self.parts
+        if not parts:
+            return
+        with pool_transaction(state) as st:
+            store = _store_of(st)
+            parent = _walk(st, parts, store.undo)
+            old = parent.get(parts[-1], _MISSING)
+            store.undo.append((parent, parts[-1], old))
+            parent[parts[-1]] = value
+            if old is _MISSING or _differs(old, value):
+                store.pending.append(parts)
+
+    def merge(self, state: Dict[str, Any], mapping: Dict[str, Any], add_ts: bool = True) -> None:
+        parts = self.parts
+        if not parts:
+            return
+        if add_ts and "ts" not in mapping:
+            mapping = dict(mapping)
+            mapping["ts"] = time.time()
+        with pool_transaction(state) as st:
+            store = _store_of(st)
+            node = _walk(st, parts + ("",), store.undo)
+            changed = []
+            for k, v in mapping.items():
+                old = node.get(k, _MISSING)
+                store.undo.append((node, k, old))
+                if _differs(old, v):
+                    changed.append(parts + (str(k),))
+            node.update(mapping)
+            store.pending.extend(changed)
+
+    def version(self, state: Dict[str, Any]) -> int:
+        st, store = _pool(state)
+        store.lock.acquire_read()
+        try:
+            return store.node_version(self.parts)
+        finally:
+            store.lock.release_read()
+
+
+@lru_cache(maxsize=4096)
+def pool_path(path: str) -> PoolPath:
+    return PoolPath(path)
+
+
 def pool_set(state: Dict[str, Any], path: str, value: Any) -> None:
-    st = ensure_pool(state)
-    parts = [p for p in path.split(".") if p]
-    if not parts:
-        return
-    parent = _walk(st, parts)
-    parent[parts[-1]] = value
+    pool_path(path).set(state, value)
 
 
 def pool_merge(state: Dict[str, Any], path: str, mapping: Dict[str, Any], add_ts: bool = True) -> None:
-    st = ensure_pool(state)
-    parts = [p for p in path.split(".") if p]
-    if not parts:
-        return
-    parent = _walk(st, parts)
-    node = parent.setdefault(parts[-1], {})
-    if add_ts and "ts" not in mapping:
-        mapping = dict(mapping)
-        mapping["ts"] = time.time()
-    node.update(mapping)
+    pool_path(path).merge(state, mapping, add_ts=add_ts)
 
 
 def pool_write(state: Dict[str, Any], path: str, mapping: Dict[str, Any], *, add_ts: bool = True) -> None:
@@ -148,13 +422,196 @@ def pool_write(state: Dict[str, Any], path: str, mapping: Dict[str, Any], *, add
 
 
 def pool_get(state: Dict[str, Any], path: str, default: Any = None) -> Any:
-    st = ensure_pool(state)
-    cur: Any = st
-    for p in [p for p in path.split(".") if p]:
-        if not isinstance(cur, dict) or p not in cur:
-            return default
-        cur = cur[p]
-    return cur
+    return pool_path(path).get(state, default)
+
+
+def pool_version(state: Dict[str, Any], path: str = "") -> int:
+    """Версия узла: номер последней транзакции, менявшей его или его потомков (0 — не менялся)."""
+    return pool_path(path).version(state)
+
+
+@contextmanager
+def pool_transaction(state: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """
+    Атомарная группа изменений под блокировкой записи:
+
+        with pool_transaction(state):
+            pool_set(state, "a.b", 1)
+            pool_merge(state, "c", {...})
+
+    Вся группа получает одну версию и одну рассылку подписчикам. Исключение
+    внутри блока откатывает записи этого блока (pool_set/pool_merge) и не
+    публикует их. Вложенные транзакции сливаются с внешней.
+
+    Целиком группу видят только pool_reading/pool_snapshot/dump_pool*;
+    одиночный pool_get блокировку не берёт и может попасть в середину группы.
+    Прямые изменения dict (в блоке и вне его) не поддерживаются: они не
+    получают версии и не видны подписчикам, dump_pool_since и оркестратору.
+    """
+    st, store = _pool(state)
+    store.lock.acquire_write()
+    undo_mark, pending_mark = len(store.undo), len(store.pending)
+    ok = False
+    try:
+        yield st
+        ok = True
+    finally:
+        try:
+            if not ok:
+                _rollback(store.undo, undo_mark)
+                del store.pending[pending_mark:]
+            if store.lock._wdepth == 1:
+                version, changed = store.commit()
+                if changed and _subs:
+                    _enqueue(st, version, changed)
+        finally:
+            store.lock.release_write()
+
+
+@contextmanager
+def pool_reading(state: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """
+    Согласованное чтение: пока блок открыт, писатели ждут. Держать коротко —
+    только на время нескольких pool_get (например, build_snapshot).
+    """
+    st, store = _pool(state)
+    store.lock.acquire_read()
+    try:
+        yield st
+    finally:
+        store.lock.release_read()
+
+
+def _copy_data(x: Any) -> Any:
+    # копируются только данные (dict/list/tuple); прочие объекты (сервисы с
+    # локами и потоками) не копируются, а передаются ссылкой
+    if isinstance(x, dict):
+        return {k: _copy_data(v) for k, v in x.items()}
+    if isinstance(x, list):
+        return [_copy_data(v) for v in x]
+    if isinstance(x, tuple):
+        return tuple(_copy_data(v) for v in x)
+    return x
+
+
+def pool_snapshot(state: Dict[str, Any], *paths: str) -> Tuple[int, Dict[str, Any]]:
+    """
+    (версия, {path: копия данных}) под одной блокировкой чтения — независимая
+    от дальнейших изменений копия. Без paths — весь пул под ключом "" без
+    служебных корневых ключей ("_services" и прочих на "_").
+    """
+    st, store = _pool(state)
+    store.lock.acquire_read()
+    try:
+        out: Dict[str, Any] = {}
+        if not paths:
+            out[""] = {k: _copy_data(v) for k, v in st.items() if not str(k).startswith("_")}
+            return store.version, out
+        for path in paths:
+            cur: Any = st
+            for p in _split(path):
+                if not isinstance(cur, dict) or p not in cur:
+                    cur = None
+                    break
+                cur = cur[p]
+            out[path] = _copy_data(cur)
+        return store.version, out
+    finally:
+        store.lock.release_read()
+
+
+# ── Подписки на изменения ────────────────────────────────────────────────────
+class PoolSubscription:
+    __slots__ = ("prefix", "parts", "callback", "state")
+
+    def __init__(self, prefix: str, callback: Callable[[List[str], int], None], state: Optional[Dict[str, Any]]):
+        self.prefix = prefix
+        self.parts = _split(prefix)
+        self.callback = callback
+        self.state = state
+
+    def __repr__(self) -> str:
+        return f"PoolSubscription({self.prefix!r})"
+
+    def matches(self, changed: Path) -> bool:
+        n = len(self.parts)
+        # изменён сам узел/потомок подписки или заменён её предок целиком
+        return changed[:n] == self.parts or self.parts[:len(changed)] == changed
+
+
+_subs: List[PoolSubscription] = []
+_subs_lock = threading.Lock()
+_queue: Dict[PoolSubscription, Tuple[set, int]] = {}
+_queue_cond = threading.Condition(threading.Lock())
+_dispatcher: Optional[threading.Thread] = None
+
+
+def _enqueue(state: Dict[str, Any], version: int, changed: List[Path]) -> None:
+    # "ts" меняется при каждой записи — само по себе не повод будить подписчиков
+    changed = [c for c in changed if c[-1] != "ts"]
+    if not changed:
+        return
+    with _subs_lock:
+        subs = list(_subs)
+    with _queue_cond:
+        for sub in subs:
+            if sub.state is not None and sub.state is not state:
+                continue
+            hits = {".".join(c) for c in changed if sub.matches(c)}
+            if not hits:
+                continue
+            prev = _queue.get(sub)
+            if prev is not None:
+                prev[0].update(hits)
+                _queue[sub] = (prev[0], version)
+            else:
+                _queue[sub] = (hits, version)
+        if _queue:
+            _queue_cond.notify()
+
+
+def _dispatch_loop() -> None:
+    while True:
+        with _queue_cond:
+            while not _queue:
+                _queue_cond.wait()
+            batch = list(_queue.items())
+            _queue.clear()
+        for sub, (paths, version) in batch:
+            try:
+                sub.callback(sorted(paths), version)
+            except Exception as e:
+                console.log(f"[pool] subscriber {sub.prefix!r} error: {e}")
+
+
+def pool_subscribe(path_prefix: str, callback: Callable[[List[str], int], None],
+                   state: Optional[Dict[str, Any]] = None) -> PoolSubscription:
+    """
+    callback(paths, version) — на потоке-диспетчере, когда значение под path_prefix
+    действительно изменилось (записи "ts" не в счёт). Несколько изменений до
+    доставки сливаются в один вызов (paths — объединение, version — последняя).
+    state=None — любой пул. Колбэк должен быть коротким: диспетчер один на всех.
+    """
+    global _dispatcher
+    sub = PoolSubscription(str(path_prefix or ""), callback, state)
+    with _subs_lock:
+        _subs.append(sub)
+        if _dispatcher is None:
+            _dispatcher = threading.Thread(target=_dispatch_loop, name="PoolDispatcher", daemon=True)
+            _dispatcher.start()
+    return sub
+
+
+def pool_unsubscribe(sub: Optional[PoolSubscription]) -> None:
+    if sub is None:
+        return
+    with _subs_lock:
+        try:
+            _subs.remove(sub)
+        except ValueError:
+            pass
+    with _queue_cond:
+        _queue.pop(sub, None)
 
 
 # ── JSON-safe дамп всего state ───────────────────────────────────────────────
@@ -185,6 +642,51 @@ def dump_pool(state: Dict[str, Any], *, compact: bool = True) -> Dict[str, Any]:
     Возвращает JSON-безопасную копию текущего state (единый пул в корне).
     compact=True слегка округляет float'ы.
     """
-    ensure_pool(state)
-    data = state
-    return _json_sanitize(_round_numbers(data) if compact else data)
+    st, store = _pool(state)
+    store.lock.acquire_read()
+    try:
+        return _json_sanitize(_round_numbers(st) if compact else st)
+    finally:
+        store.lock.release_read()
+
+
+def dump_pool_since(state: Dict[str, Any], version: int = 0, *, compact: bool = True) -> Dict[str, Any]:
+    """
+    Дельта пула с версии version (курсор из прошлого ответа):
+      {"version": текущая, "full": bool, "changes": {dotted_path: значение}, "deleted": [dotted_path]}
+    changes — минимальный набор поддеревьев, записанных после version (предки
+    поглощают потомков). Узел, которого больше нет, приходит в deleted (и как
+    None в changes) — клиент должен удалить ключ. full=True (version <= 0 или
+    курсор из «чужого» пула) — changes == {"": весь пул}. Видны только записи
+    через pool_*.
+    """
+    st, store = _pool(state)
+    store.lock.acquire_read()
+    try:
+        since = int(version or 0)
+        cur_v = store.version
+        if since <= 0 or since > cur_v:
+            full = _json_sanitize(_round_numbers(st) if compact else st)
+            return {"version": cur_v, "full": True, "changes": {"": full}, "deleted": []}
+        picked: List[Path] = []
+        for parts in sorted((p for p, v in store.replaced.items() if v > since), key=len):
+            if any(parts[:len(q)] == q for q in picked):
+                continue
+            picked.append(parts)
+        changes: Dict[str, Any] = {}
+        deleted: List[str] = []
+        for parts in picked:
+            node: Any = st
+            for p in parts:
+                if not isinstance(node, dict) or p not in node:
+                    node = _MISSING
+                    break
+                node = node[p]
+            if node is _MISSING:
+                changes[".".join(parts)] = None
+                deleted.append(".".join(parts))
+                continue
+            changes[".".join(parts)] = _json_sanitize(_round_numbers(node) if compact else node)
+        return {"version": cur_v, "full": () in picked, "changes": changes, "deleted": deleted}
+    finally:
+        store.lock.release_read()
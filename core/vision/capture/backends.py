@@ -0,0 +1,395 @@
+# core/vision/capture/backends.py
+"""
+Сменные бэкенды захвата экрана.
+
+Весь захват идёт через capture_window_region_bgr → get_capture_backend().grab(...),
+поэтому детекторы (player_state, autofarm, respawn, buffer, ui_guard) не знают,
+откуда берутся пиксели.
+
+Бэкенды:
+- "gdi"    — Win32 GDI (по умолчанию на Windows)
+- "mss"    — кроссплатформенный python-mss
+- "replay" — кадры из каталога PNG или стека .npz/.npy (headless/CI/бенчмарки)
+
+Выбор:
+- переменная окружения REVIVE_CAPTURE_BACKEND: "gdi" | "mss" | "replay:<path>"
+  (для replay дополнительно REVIVE_REPLAY_SPEED, REVIVE_REPLAY_FPS)
+- или явно: configure_capture_backend("replay", source="rec/", speed=0)
+
+Exports:
+- CaptureBackend, GdiBackend, MssBackend, ReplayBackend
+- get_capture_backend() -> CaptureBackend
+- configure_capture_backend(name_or_backend, **kwargs) -> CaptureBackend
+- close_capture_backend()
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from core.logging import console
+
+ENV_BACKEND = "REVIVE_CAPTURE_BACKEND"
+ENV_REPLAY_SPEED = "REVIVE_REPLAY_SPEED"
+ENV_REPLAY_FPS = "REVIVE_REPLAY_FPS"
+
+DEFAULT_REPLAY_FPS: float = 10.0
+
+
+def _empty(channels: int = 3) -> np.ndarray:
+    return np.zeros((0, 0, channels), dtype=np.uint8)
+
+
+def _deliver(view: np.ndarray, out: Optional[np.ndarray]) -> np.ndarray:
+    """view → out (на месте) или в новый массив; одна копия."""
+    if out is None:
+        return view.copy()
+    if out.shape != view.shape or out.dtype != np.uint8:
+        raise ValueError(f"out must be uint8 {view.shape}, got {out.dtype} {out.shape}")
+    np.copyto(out, view)
+    return out
+
+
+def _to_bgr(img: np.ndarray) -> np.ndarray:
+    if img.ndim == 2:
+        return np.repeat(img[:, :, None], 3, axis=2)
+    if img.shape[2] >= 3:
+        return img[:, :, :3]
+    return np.repeat(img[:, :, :1], 3, axis=2)
+
+
+class CaptureBackend:
+    """
+    Базовый интерфейс: прямоугольник в ЭКРАННЫХ координатах → BGR (h, w, 3).
+    bgra=True — (h, w, 4) с альфой (для тех, кто всё равно переводит в gray);
+    out — готовый uint8-массив нужной формы, заполняется на месте и возвращается.
+    """
+    name = "base"
+
+    def grab(self, x1: int, y1: int, x2: int, y2: int, *,
+             out: Optional[np.ndarray] = None, bgra: bool = False) -> np.ndarray:
+        raise NotImplementedError
+
+    def window_info(self) -> Optional[Dict[str, int]]:
+        """Виртуальное окно бэкенда (только у replay); для живых бэкендов — None."""
+        return None
+
+    def frame_key(self) -> Any:
+        """
+        Идентификатор текущего кадра источника, если он известен (replay).
+        Кэш кадра перечитывает экран при смене ключа даже внутри TTL.
+        """
+        return None
+
+    def close(self) -> None:
+        pass
+
+
+class GdiBackend(CaptureBackend):
+    name = "gdi"
+
+    def __init__(self):
+        # импорт здесь: pywin32 есть только на Windows
+        from core.vision.win32 import gdi_backend
+        self._gdi = gdi_backend
+
+    def grab(self, x1: int, y1: int, x2: int, y2: int, *,
+             out: Optional[np.ndarray] = None, bgra: bool = False) -> np.ndarray:
+        return self._gdi.get_screen(x1, y1, x2, y2, out=out, bgra=bgra)
+
+    def close(self) -> None:
+        self._gdi.close_capture_sessions()
+
+
+class MssBackend(CaptureBackend):
+    """python-mss: экземпляр mss не потокобезопасен, держим по одному на поток."""
+    name = "mss"
+
+    def __init__(self):
+        import mss
+        self._mss = mss
+        self._tls = threading.local()
+        self._lock = threading.Lock()
+        self._instances: List[Any] = []
+
+    def _sct(self):
+        sct = getattr(self._tls, "sct", None)
+        if sct is None:
+            sct = self._mss.mss()
+            self._tls.sct = sct
+            with self._lock:
+                self._instances.append(sct)
+        return sct
+
+    def grab(self, x1: int, y1: int, x2: int, y2: int, *,
+             out: Optional[np.ndarray] = None, bgra: bool = False) -> np.ndarray:
+        w = max(0, int(x2) - int(x1))
+        h = max(0, int(y2) - int(y1))
+        if w == 0 or h == 0:
+            return _empty(4 if bgra else 3)
+        shot = self._sct().grab({"left": int(x1), "top": int(y1), "width": w, "height": h})
+        px = np.frombuffer(shot.raw, dtype=np.uint8).reshape(h, w, 4)
+        return _deliver(px if bgra else px[:, :, :3], out)
+
+    def close(self) -> None:
+        with self._lock:
+            instances, self._instances = self._instances, []
+        for sct in instances:
+            try:
+                sct.close()
+            except Exception:
+                pass
+
+
+class ReplayBackend(CaptureBackend):
+    """
+    Проигрывание записанной сессии.
+
+    source:
+      - каталог PNG (сортировка по имени); опционально index.json:
+        {"rect": [x, y, w, h], "frames": [{"file": "0001.png", "ts": 0.0}, ...]}
+      - .npz с массивами frames (N,H,W[,C]) и опционально ts (N,), rect (4,)
+      - .npy со стеком кадров (N,H,W[,C])
+    Кадр — это КЛИЕНТСКАЯ область окна; rect задаёт её положение на «экране».
+
+    speed:
+      - > 0  — время кадров идёт от старта с множителем speed (1.0 — реальное время);
+      - <= 0 — ручной режим: кадр меняется только через advance()/seek()
+               (бенчмарки и регрессия на полной скорости).
+    """
+    name = "replay"
+
+    def __init__(
+        self,
+        source: str,
+        *,
+        speed: float = 1.0,
+        fps: float = DEFAULT_REPLAY_FPS,
+        rect: Optional[Tuple[int, int, int, int]] = None,
+        loop: bool = True,
+    ):
+        self.source = str(source)
+        self.speed = float(speed)
+        self.loop = bool(loop)
+        self._lock = threading.Lock()
+        self._paths: List[str] = []
+        self._stack: Optional[np.ndarray] = None
+        self._decoded: Tuple[int, Optional[np.ndarray]] = (-1, None)
+        ts: Optional[List[float]] = None
+        rect_decl: Optional[Tuple[int, int, int, int]] = None
+
+        if os.path.isdir(self.source):
+            index_path = os.path.join(self.source, "index.json")
+            if os.path.isfile(index_path):
+                with open(index_path, "r", encoding="utf-8") as f:
+                    index = json.load(f)
+                frames = index.get("frames") or []
+                self._paths = [os.path.join(self.source, str(it["file"])) for it in frames]
+                if frames and all("ts" in it for it in frames):
+                    ts = [float(it["ts"]) for it in frames]
+                if index.get("rect"):
+                    rect_decl = tuple(int(v) for v in index["rect"])  # type: ignore
+            else:
+                self._paths = sorted(
+                    os.path.join(self.source, fn)
+                    for fn in os.listdir(self.source)
+                    if fn.lower().endswith(".png")
+                )
+        elif self.source.lower().endswith(".npz"):
+            with np.load(self.source) as data:
+                self._stack = np.asarray(data["frames"])
+                if "ts" in data:
+                    ts = [float(v) for v in data["ts"]]
+                if "rect" in data:
+                    rect_decl = tuple(int(v) for v in data["rect"])  # type: ignore
+        elif self.source.lower().endswith(".npy"):
+            self._stack = np.load(self.source, mmap_mode="r")
+        else:
+            raise ValueError(f"replay source not supported: {self.source}")
+
+        count = len(self._paths) if self._stack is None else int(self._stack.shape[0])
+        if count <= 0:
+            raise ValueError(f"replay source has no frames: {self.source}")
+        self._count = count
+
+        if ts is None or len(ts) != count:
+            step = 1.0 / max(1e-6, float(fps))
+            ts = [i * step for i in range(count)]
+        t0 = ts[0]
+        self._ts = [t - t0 for t in ts]
+        # длительность цикла: последний кадр держим столько же, сколько предыдущий
+        last_step = (self._ts[-1] - self._ts[-2]) if count > 1 else 0.0
+        self._period = self._ts[-1] + last_step
+
+        if rect is not None:
+            rect_decl = tuple(int(v) for v in rect)  # type: ignore
+        if rect_decl is None:
+            h, w = self._frame(0).shape[:2]
+            rect_decl = (0, 0, int(w), int(h))
+        self._rect = rect_decl
+
+        self._idx = 0
+        self._start = time.monotonic()
+
+    # ---- кадры ----
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def index(self) -> int:
+        return self._idx
+
+    def _frame(self, i: int) -> np.ndarray:
+        if self._stack is not None:
+            return _to_bgr(np.asarray(self._stack[i]))
+        if self._decoded[0] == i and self._decoded[1] is not None:
+            return self._decoded[1]
+        import cv2
+        img = cv2.imread(self._paths[i], cv2.IMREAD_COLOR)
+        if img is None:
+            raise OSError(f"replay frame read failed: {self._paths[i]}")
+        self._decoded = (i, img)
+        return img
+
+    def _current_index(self) -> int:
+        if self.speed <= 0:
+            return self._idx
+        elapsed = (time.monotonic() - self._start) * self.speed
+        if self.loop and self._period > 0:
+            elapsed %= self._period
+        # последний кадр с ts <= elapsed
+        lo, hi = 0, self._count - 1
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if self._ts[mid] <= elapsed:
+                lo = mid
+            else:
+                hi = mid - 1
+        self._idx = lo
+        return lo
+
+    def seek(self, i: int) -> None:
+        with self._lock:
+            self._idx = max(0, min(int(i), self._count - 1))
+
+    def advance(self, n: int = 1) -> bool:
+        """Ручной режим: следующий кадр. False — запись закончилась (без loop)."""
+        with self._lock:
+            nxt = self._idx + int(n)
+            if nxt >= self._count:
+                if not self.loop:
+                    self._idx = self._count - 1
+                    return False
+                nxt %= self._count
+            self._idx = nxt
+            return True
+
+    def frame_ts(self) -> float:
+        return self._ts[self._idx]
+
+    # ---- CaptureBackend ----
+    def window_info(self) -> Optional[Dict[str, int]]:
+        x, y, w, h = self._rect
+        return {"x": x, "y": y, "width": w, "height": h}
+
+    def frame_key(self) -> Any:
+        with self._lock:
+            return (id(self), self._current_index())
+
+    def grab(self, x1: int, y1: int, x2: int, y2: int, *,
+             out: Optional[np.ndarray] = None, bgra: bool = False) -> np.ndarray:
+        w = max(0, int(x2) - int(x1))
+        h = max(0, int(y2) - int(y1))
+        ch = 4 if bgra else 3
+        if w == 0 or h == 0:
+            return _empty(ch)
+        with self._lock:
+            frame = self._frame(self._current_index())
+        rx, ry = self._rect[0], self._rect[1]
+        fh, fw = frame.shape[:2]
+        # экранные → координаты кадра; вне кадра — чёрное
+        l, t = int(x1) - rx, int(y1) - ry
+        if out is None:
+            out = np.zeros((h, w, ch), dtype=np.uint8)
+        elif out.shape != (h, w, ch) or out.dtype != np.uint8:
+            raise ValueError(f"out must be uint8 {(h, w, ch)}, got {out.dtype} {out.shape}")
+        else:
+            out.fill(0)
+        sl, st = max(0, l), max(0, t)
+        sr, sb = min(fw, l + w), min(fh, t + h)
+        if sr > sl and sb > st:
+            out[st - t:sb - t, sl - l:sr - l, :3] = frame[st:sb, sl:sr]
+            if bgra:
+                out[st - t:sb - t, sl - l:sr - l, 3] = 255
+        return out
+
+
+# ---------------------------------------------------------------------------
+_backend: Optional[CaptureBackend] = None
+_backend_lock = threading.Lock()
+
+
+def _make_backend(name: str, **kwargs) -> CaptureBackend:
+    name = (name or "").strip()
+    kind, _, arg = name.partition(":")
+    kind = kind.lower()
+    if kind == "gdi":
+        return GdiBackend()
+    if kind == "mss":
+        return MssBackend()
+    if kind == "replay":
+        source = kwargs.pop("source", None) or arg
+        if not source:
+            raise ValueError("replay backend requires a source path")
+        if "speed" not in kwargs and os.getenv(ENV_REPLAY_SPEED):
+            kwargs["speed"] = float(os.getenv(ENV_REPLAY_SPEED, "1"))
+        if "fps" not in kwargs and os.getenv(ENV_REPLAY_FPS):
+            kwargs["fps"] = float(os.getenv(ENV_REPLAY_FPS, str(DEFAULT_REPLAY_FPS)))
+        return ReplayBackend(source, **kwargs)
+    raise ValueError(f"unknown capture backend: {name}")
+
+
+def _default_backend_name() -> str:
+    env = os.getenv(ENV_BACKEND, "").strip()
+    if env:
+        return env
+    return "gdi" if os.name == "nt" else "mss"
+
+
+def get_capture_backend() -> CaptureBackend:
+    global _backend
+    be = _backend
+    if be is not None:
+        return be
+    with _backend_lock:
+        if _backend is None:
+            name = _default_backend_name()
+            _backend = _make_backend(name)
+            console.log(f"[capture] backend: {_backend.name}")
+        return _backend
+
+
+def configure_capture_backend(backend: Union[str, CaptureBackend], **kwargs) -> CaptureBackend:
+    """Сменить бэкенд (имя как в REVIVE_CAPTURE_BACKEND или готовый экземпляр)."""
+    global _backend
+    new = backend if isinstance(backend, CaptureBackend) else _make_backend(str(backend), **kwargs)
+    with _backend_lock:
+        old, _backend = _backend, new
+    if old is not None and old is not new:
+        try:
+            old.close()
+        except Exception:
+            pass
+    console.log(f"[capture] backend: {new.name}")
+    return new
+
+
+def close_capture_backend() -> None:
+    be = _backend
+    if be is not None:
+        be.close()
@@ -0,0 +1,219 @@
+# core/vision/capture/frame_cache.py
+"""
+Общий кэш кадра клиентской области окна.
+
+Один BitBlt всей клиентской области живёт ttl_ms миллисекунд; все запросы зон
+внутри TTL получают zero-copy срезы (views) этого кадра. Кадр общий для всех
+потоков (player_state, autofarm, ui_guard, flow), поэтому он read-only.
+
+Если свежего кадра нет, а зона маленькая (не больше small_fraction клиентской
+области), она захватывается напрямую, как раньше, и кадр не заводится: редкие
+пробы мелких зон не платят за blit всего окна. Зона, выходящая за окно,
+возвращается в полном размере: часть вне окна заполнена нулями.
+
+Настройка: REVIVE_FRAME_TTL_MS (по умолчанию 40; 0 — кэш выключен) или
+configure_frame_cache(...) — из wiring по runtime.vision пула.
+
+Exports:
+- Frame                                   # кадр: frame_id, ts, window_key, image
+- FrameCache(ttl_ms)                      # кэш с собственным TTL
+- get_frame(window) -> Frame | None       # кадр из общего кэша
+- capture_window_region_cached(window, zone_ltrb) -> np.ndarray BGR (view)
+- capture_regions_cached(window, [zone_ltrb, ...]) -> [view, ...]  # все зоны из ОДНОГО кадра
+- configure_frame_cache(ttl_ms=None, small_fraction=None)  # TTL общего кэша; 0 — кэш выключен
+- invalidate_frame_cache()
+- frame_cache_stats() -> {"grabs","hits","direct","ttl_ms"}
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.vision.capture.backends import get_capture_backend
+from core.vision.capture.window_bgr_capture import capture_window_region_bgr, capture_regions
+
+ZoneLTRB = Tuple[int, int, int, int]
+WindowKey = Tuple[int, int, int, int]
+
+ENV_TTL_MS = "REVIVE_FRAME_TTL_MS"
+
+DEFAULT_TTL_MS: int = 40
+DEFAULT_SMALL_FRACTION: float = 0.25  # доля клиентской области, до которой зона «маленькая»
+
+
+def _default_ttl_ms() -> int:
+    env = os.getenv(ENV_TTL_MS, "").strip()
+    if env:
+        try:
+            return max(0, int(env))
+        except ValueError:
+            pass
+    return DEFAULT_TTL_MS
+
+
+def _window_key(window: Dict) -> WindowKey:
+    return (
+        int(window.get("x", 0)),
+        int(window.get("y", 0)),
+        int(window.get("width", 0)),
+        int(window.get("height", 0)),
+    )
+
+
+class Frame:
+    """Снимок клиентской области. image — read-only BGR (H, W, 3)."""
+    __slots__ = ("frame_id", "ts", "window_key", "image", "source_key")
+
+    def __init__(self, frame_id: int, ts: float, window_key: WindowKey, image: np.ndarray,
+                 source_key: Any = None):
+        self.frame_id = int(frame_id)
+        self.ts = float(ts)  # time.monotonic() момента захвата
+        self.window_key = window_key
+        self.image = image
+        self.source_key = source_key  # frame_key() бэкенда (replay), иначе None
+
+    def age_ms(self) -> float:
+        return (time.monotonic() - self.ts) * 1000.0
+
+    def region(self, zone: ZoneLTRB) -> np.ndarray:
+        """
+        Зона (client coords, LTRB) в исходном размере: внутри кадра — view,
+        за его границами — read-only копия с нулями вне окна.
+        """
+        h, w = self.image.shape[:2]
+        l, t, r, b = map(int, zone)
+        r, b = max(l, r), max(t, b)
+        if l >= 0 and t >= 0 and r <= w and b <= h:
+            return self.image[t:b, l:r]
+        out = np.zeros((b - t, r - l) + self.image.shape[2:], dtype=self.image.dtype)
+        il, it, ir, ib = max(l, 0), max(t, 0), min(r, w), min(b, h)
+        if ir > il and ib > it:
+            out[it - t:ib - t, il - l:ir - l] = self.image[it:ib, il:ir]
+        out.flags.writeable = False
+        return out
+
+
+class FrameCache:
+    """
+    Кэш последнего кадра окна с TTL. Захват идёт под локом, чтобы параллельные
+    запросы из разных потоков дождались одного BitBlt, а не сделали по своему.
+    """
+
+    def __init__(self, ttl_ms: int = DEFAULT_TTL_MS, small_fraction: float = DEFAULT_SMALL_FRACTION):
+        self.ttl_ms = max(0, int(ttl_ms))
+        self.small_fraction = max(0.0, float(small_fraction))
+        self._lock = threading.Lock()
+        self._frame: Optional[Frame] = None
+        self._next_id = 1
+        self.grabs = 0
+        self.hits = 0
+        self.direct = 0
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._frame = None
+
+    def _frame_for(self, window: Dict, area: Optional[int]) -> Tuple[Optional[Frame], bool]:
+        """
+        (кадр, False) — свежий или только что снятый кадр;
+        (None, True)  — кадра нет, а зона площадью area маленькая: снимать напрямую.
+        area=None — кадр нужен в любом случае.
+        """
+        if not window:
+            return None, False
+        key = _window_key(window)
+        if key[2] <= 0 or key[3] <= 0:
+            return None, False
+
+        source_key = get_capture_backend().frame_key()
+        with self._lock:
+            fr = self._frame
+            if (fr is not None and fr.window_key == key and fr.source_key == source_key
+                    and fr.age_ms() < self.ttl_ms):
+                self.hits += 1
+                return fr, False
+
+            if area is not None and area <= self.small_fraction * key[2] * key[3]:
+                self.direct += 1
+                return None, True
+
+            img = capture_window_region_bgr(window, (0, 0, key[2], key[3]))
+            if img is None or img.size == 0:
+                return None, False
+            img.flags.writeable = False
+            fr = Frame(self._next_id, time.monotonic(), key, img, source_key)
+            self._next_id += 1
+            self.grabs += 1
+            self._frame = fr
+            return fr, False
+
+    def get_frame(self, window: Dict) -> Optional[Frame]:
+        return self._frame_for(window, None)[0]
+
+    def region(self, window: Dict, zone: ZoneLTRB) -> Optional[np.ndarray]:
+        if self.ttl_ms <= 0:
+            return capture_window_region_bgr(window, zone)
+        l, t, r, b = map(int, zone)
+        fr, direct = self._frame_for(window, max(0, r - l) * max(0, b - t))
+        if direct:
+            return capture_window_region_bgr(window, zone)
+        if fr is None:
+            return None
+        return fr.region(zone)
+
+    def regions(self, window: Dict, zones: Sequence[ZoneLTRB]) -> List[np.ndarray]:
+        if self.ttl_ms <= 0:
+            return capture_regions(window, zones)
+        boxes = [tuple(map(int, z)) for z in zones]
+        valid = [z for z in boxes if z[2] > z[0] and z[3] > z[1]]
+        # capture_regions снимает общий bounding box — его площадь и сравниваем
+        area = 0
+        if valid:
+            area = (max(z[2] for z in valid) - min(z[0] for z in valid)) * \
+                   (max(z[3] for z in valid) - min(z[1] for z in valid))
+        fr, direct = self._frame_for(window, area)
+        if direct:
+            return capture_regions(window, zones)
+        if fr is None:
+            return [np.zeros((0, 0, 3), dtype=np.uint8) for _ in zones]
+        return [fr.region(z) for z in boxes]
+
+
+_cache = FrameCache(_default_ttl_ms())
+
+
+def get_frame(window: Dict) -> Optional[Frame]:
+    return _cache.get_frame(window)
+
+
+def capture_window_region_cached(window: Dict, zone: ZoneLTRB) -> Optional[np.ndarray]:
+    """
+    Как capture_window_region_bgr, но из общего кадра (read-only view).
+    Если нужен изменяемый массив — делайте .copy().
+    """
+    return _cache.region(window, zone)
+
+
+def capture_regions_cached(window: Dict, zones: Sequence[ZoneLTRB]) -> List[np.ndarray]:
+    """Несколько зон гарантированно из одного кадра (или одного blit'а при TTL=0)."""
+    return _cache.regions(window, zones)
+
+
+def configure_frame_cache(ttl_ms: Optional[int] = None, small_fraction: Optional[float] = None) -> None:
+    if small_fraction is not None:
+        _cache.small_fraction = max(0.0, float(small_fraction))
+    if ttl_ms is not None:
+        _cache.ttl_ms = max(0, int(ttl_ms))
+        _cache.invalidate()
+
+
+def invalidate_frame_cache() -> None:
+    _cache.invalidate()
+
+
+def frame_cache_stats() -> Dict[str, int]:
+    return {"grabs": _cache.grabs, "hits": _cache.hits, "direct": _cache.direct, "ttl_ms": _cache.ttl_ms}
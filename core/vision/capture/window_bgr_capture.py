@@ -1,29 +1,60 @@
 # core/vision/capture/window_bgr_capture.py
 """
-High-level capture helpers over Win32 GDI backend.
+High-level capture helpers over the pluggable capture backend
+(see core.vision.capture.backends: gdi | mss | replay).
 
 Exports:
-- capture_window_region_bgr(window, zone_tuple) -> np.ndarray BGR
+- capture_window_region_bgr(window, zone_tuple, *, out=None, bgra=False) -> np.ndarray BGR|BGRA
 - capture_window_region_dict(window, zone_dict) -> np.ndarray BGR
+- capture_regions(window, [zone_tuple, ...]) -> [np.ndarray BGR view, ...]  # один blit на все зоны
 - gdi_capture_zone(window_info, zone_dict)  # backward-compat name
+- release_capture_resources()  # освободить ресурсы бэкенда при завершении
 """
-from typing import Optional, Tuple, Dict
+from typing import Optional, Tuple, Dict, List, Sequence
 
 import numpy as np
-from core.vision.win32.gdi_backend import get_screen
+from core.vision.capture.backends import get_capture_backend, close_capture_backend
 from core.vision.zones import compute_zone_ltrb
 
-def capture_window_region_bgr(window: Dict, zone: Tuple[int, int, int, int]) -> Optional[np.ndarray]:
+def capture_window_region_bgr(window: Dict, zone: Tuple[int, int, int, int], *,
+                              out: Optional[np.ndarray] = None, bgra: bool = False) -> Optional[np.ndarray]:
     """
     window: {"x","y","width","height"} in screen coords (client area origin)
     zone: (left, top, right, bottom) in client coords
+    out: preallocated uint8 (h, w, 3|4) filled in place (pooled buffers)
+    bgra: keep alpha → (h, w, 4)
     """
     l, t, r, b = map(int, zone)
     x1 = int(window["x"] + l)
     y1 = int(window["y"] + t)
     x2 = int(window["x"] + r)
     y2 = int(window["y"] + b)
-    return get_screen(x1, y1, x2, y2)
+    return get_capture_backend().grab(x1, y1, x2, y2, out=out, bgra=bgra)
+
+def capture_regions(window: Dict, zones: Sequence[Tuple[int, int, int, int]]) -> List[np.ndarray]:
+    """
+    Захват нескольких зон одним blit'ом: берём общий bounding box и режем views.
+    zones: [(left, top, right, bottom), ...] in client coords.
+    Пустая/вырожденная зона → массив (0, 0, 3).
+    """
+    boxes = [tuple(map(int, z)) for z in zones]
+    valid = [z for z in boxes if z[2] > z[0] and z[3] > z[1]]
+    if not valid:
+        return [np.zeros((0, 0, 3), dtype=np.uint8) for _ in boxes]
+
+    bl = min(z[0] for z in valid)
+    bt = min(z[1] for z in valid)
+    br = max(z[2] for z in valid)
+    bb = max(z[3] for z in valid)
+    big = capture_window_region_bgr(window, (bl, bt, br, bb))
+
+    out: List[np.ndarray] = []
+    for l, t, r, b in boxes:
+        if big is None or big.size == 0 or r <= l or b <= t:
+            out.append(np.zeros((0, 0, 3), dtype=np.uint8))
+        else:
+            out.append(big[t - bt:b - bt, l - bl:r - bl])
+    return out
 
 def capture_window_region_dict(window: Dict, zone: Dict) -> Optional[np.ndarray]:
     """
@@ -38,3 +69,7 @@ def capture_window_region_dict(window: Dict, zone: Dict) -> Optional[np.ndarray]
 # backward compatibility alias
 def gdi_capture_zone(window_info: Dict, zone: Dict) -> Optional[np.ndarray]:
     return capture_window_region_dict(window_info, zone)
+
+def release_capture_resources() -> None:
+    """Закрыть ресурсы текущего бэкенда захвата (вызывается из shutdown)."""
+    close_capture_backend()
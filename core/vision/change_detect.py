@@ -0,0 +1,157 @@
+# core/vision/change_detect.py
+"""
+Детектор изменений по зонам.
+
+Для каждой зоны храним дешёвый отпечаток (crc32 от прореженной зоны). Пока
+пиксели зоны не менялись, результат матчинга по ней тот же — его можно отдать
+из кэша вместо повторного matchTemplate. Это позволяет чаще опрашивать
+ui_guard/respawn/dashboard/buffer без роста CPU.
+
+Прореживание: зона до FP_MAX_SAMPLES пикселей читается целиком (точно),
+большие зоны (fullscreen) — с шагом, чтобы отпечаток стоил доли миллисекунды.
+Изменения меньше шага на больших зонах могут быть не замечены — для окон,
+баннеров и иконок это не важно.
+
+Exports:
+- zone_fingerprint(img) -> int
+- zone_changed(zone_key, img) -> bool          # изменилась ли зона с прошлого вызова для этого ключа
+- zone_memo(zone_key, img, result_key, compute) # результат compute() из кэша, пока зона не менялась
+- reset_zone_changes(zone_key=None)
+- configure_change_detect(enabled=None)
+- change_detect_stats() -> {"hits","misses","zones","enabled"}
+"""
+from __future__ import annotations
+
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+
+FP_MAX_SAMPLES: int = 64 * 1024  # пикселей в отпечатке, не больше
+MAX_ZONES: int = 256
+MAX_RESULTS_PER_ZONE: int = 64
+
+Fingerprint = Tuple[Tuple[int, ...], int]
+
+
+def zone_fingerprint(img: np.ndarray) -> Fingerprint:
+    """(shape, crc32) прореженной зоны. Для пустой зоны crc = 0."""
+    if img is None or img.size == 0:
+        return ((0,), 0)
+    h, w = img.shape[:2]
+    step = 1
+    while (h // step) * (w // step) > FP_MAX_SAMPLES:
+        step += 1
+    sample = np.ascontiguousarray(img[::step, ::step])
+    return (tuple(img.shape), zlib.crc32(sample.data))
+
+
+class _ZoneEntry:
+    __slots__ = ("fp", "results")
+
+    def __init__(self, fp: Fingerprint):
+        self.fp = fp
+        self.results: "OrderedDict[Hashable, Any]" = OrderedDict()
+
+
+class ZoneChangeDetector:
+    def __init__(self):
+        self.enabled = True
+        self._lock = threading.Lock()
+        self._memo: "OrderedDict[Hashable, _ZoneEntry]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def changed(self, zone_key: Hashable, img: np.ndarray) -> bool:
+        if not self.enabled:
+            return True
+        fp = zone_fingerprint(img)
+        with self._lock:
+            entry = self._memo.get(zone_key)
+            if entry is not None and entry.fp == fp:
+                self._memo.move_to_end(zone_key)
+                return False
+            # тот же учёт, что и в memo(): новый отпечаток сбрасывает результаты по зоне
+            self._memo[zone_key] = _ZoneEntry(fp)
+            self._memo.move_to_end(zone_key)
+            if len(self._memo) > MAX_ZONES:
+                self._memo.popitem(last=False)
+        return True
+
+    def memo(self, zone_key: Hashable, img: np.ndarray, result_key: Hashable,
+             compute: Callable[[], Any]) -> Any:
+        if not self.enabled:
+            return compute()
+        fp = zone_fingerprint(img)
+        with self._lock:
+            entry = self._memo.get(zone_key)
+            if entry is not None and entry.fp == fp and result_key in entry.results:
+                self._memo.move_to_end(zone_key)
+                self.hits += 1
+                return entry.results[result_key]
+            self.misses += 1
+
+        result = compute()
+
+        with self._lock:
+            entry = self._memo.get(zone_key)
+            if entry is None or entry.fp != fp:
+                # зона изменилась — старые результаты по ней больше не действительны
+                entry = _ZoneEntry(fp)
+                self._memo[zone_key] = entry
+            self._memo.move_to_end(zone_key)
+            entry.results[result_key] = result
+            if len(entry.results) > MAX_RESULTS_PER_ZONE:
+                entry.results.popitem(last=False)
+            if len(self._memo) > MAX_ZONES:
+                self._memo.popitem(last=False)
+        return result
+
+    def reset(self, zone_key: Optional[Hashable] = None) -> None:
+        with self._lock:
+            if zone_key is None:
+                self._memo.clear()
+            else:
+                self._memo.pop(zone_key, None)
+
+
+_detector = ZoneChangeDetector()
+
+
+def zone_changed(zone_key: Hashable, img: np.ndarray) -> bool:
+    """
+    True, если пиксели зоны отличаются от прошлого вызова с этим ключом (или вызов
+    первый, или детектор выключен) — можно пропустить работу, ничего не запоминая.
+    Отпечатки общие с zone_memo: изменение зоны сбрасывает и её результаты.
+    """
+    return _detector.changed(zone_key, img)
+
+
+def zone_memo(zone_key: Hashable, img: np.ndarray, result_key: Hashable,
+              compute: Callable[[], Any]) -> Any:
+    """
+    Результат compute() для зоны img. Пока отпечаток зоны не менялся, для того же
+    result_key отдаётся сохранённый результат (включая None).
+    result_key должен включать всё, от чего зависит результат кроме пикселей
+    (шаблон и его mtime, порог, язык, положение окна для экранных координат).
+    """
+    return _detector.memo(zone_key, img, result_key, compute)
+
+
+def reset_zone_changes(zone_key: Optional[Hashable] = None) -> None:
+    _detector.reset(zone_key)
+
+
+def configure_change_detect(enabled: Optional[bool] = None) -> None:
+    if enabled is not None:
+        _detector.enabled = bool(enabled)
+        _detector.reset()
+
+
+def change_detect_stats() -> Dict[str, int]:
+    with _detector._lock:
+        zones = len(_detector._memo)
+    return {"hits": _detector.hits, "misses": _detector.misses,
+            "zones": zones, "enabled": int(_detector.enabled)}
@@ -0,0 +1,109 @@
+# core/vision/matching/executor.py
+"""
+Общий пул потоков для матчинга шаблонов.
+
+cv2.matchTemplate отпускает GIL, поэтому задачи (шаблон × масштаб) по одному
+кадру реально выполняются параллельно. Пул ограничен; при workers <= 1 всё
+выполняется последовательно в вызывающем потоке (как раньше).
+
+Вложенные вызовы из рабочего потока пула тоже идут последовательно — пул не
+ждёт сам себя.
+
+Выбор числа потоков:
+- переменная окружения REVIVE_MATCH_WORKERS (0/1 — выключено)
+- или configure_match_executor(workers=N)
+
+Exports:
+- map_jobs(fn, items) -> list          # [fn(x) for x in items], по возможности параллельно
+- configure_match_executor(workers=None)
+- shutdown_match_executor()
+- match_executor_workers() -> int
+"""
+from __future__ import annotations
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, List, Optional, TypeVar
+
+from core.logging import console
+
+ENV_WORKERS = "REVIVE_MATCH_WORKERS"
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def _default_workers() -> int:
+    env = os.getenv(ENV_WORKERS, "").strip()
+    if env:
+        try:
+            return max(0, int(env))
+        except ValueError:
+            pass
+    return min(4, max(1, (os.cpu_count() or 2) // 2))
+
+
+_lock = threading.Lock()
+_pool: Optional[ThreadPoolExecutor] = None
+_workers: int = _default_workers()
+_tls = threading.local()
+
+
+def _worker_init() -> None:
+    _tls.in_pool = True
+
+
+def _get_pool() -> Optional[ThreadPoolExecutor]:
+    global _pool
+    if _workers <= 1:
+        return None
+    with _lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=_workers,
+                thread_name_prefix="MatchWorker",
+                initializer=_worker_init,
+            )
+        return _pool
+
+
+def map_jobs(fn: Callable[[T], R], items: Iterable[T]) -> List[R]:
+    """Результаты в порядке items. Исключение задачи пробрасывается, как в serial-варианте."""
+    items = list(items)
+    if len(items) <= 1 or getattr(_tls, "in_pool", False):
+        return [fn(x) for x in items]
+    pool = _get_pool()
+    if pool is None:
+        return [fn(x) for x in items]
+    futures = []
+    try:
+        for x in items:
+            futures.append(pool.submit(fn, x))
+    except RuntimeError:
+        # пул закрыт (shutdown во время выхода) — остаток досчитываем сами;
+        # уже отправленные задачи не повторяем, ошибки задач не перехватываем
+        pass
+    rest = [fn(x) for x in items[len(futures):]]
+    return [f.result() for f in futures] + rest
+
+
+def configure_match_executor(workers: Optional[int] = None) -> None:
+    global _workers
+    if workers is None:
+        return
+    shutdown_match_executor()
+    _workers = max(0, int(workers))
+    console.log(f"[match] executor workers={_workers}" + (" (serial)" if _workers <= 1 else ""))
+
+
+def shutdown_match_executor() -> None:
+    global _pool
+    with _lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False)
+
+
+def match_executor_workers() -> int:
+    return _workers
@@ -0,0 +1,162 @@
+# core/vision/matching/pyramid.py
+"""
+Coarse-to-fine поиск шаблона (TM_CCOEFF_NORMED) для больших зон (fullscreen).
+
+1) кадр и шаблон уменьшаются в 2**levels раз (INTER_AREA);
+2) на грубом уровне берутся top_k пиков (с подавлением соседей);
+3) каждый пик перепроверяется matchTemplate в маленьком ROI полного разрешения.
+
+Лучший пик уточняется в полном разрешении, т.е. score и позиция — те же, что
+дал бы cv2.matchTemplate, если истинный максимум попал в один из top_k
+кандидатов. Для мелкого текста это не гарантировано: при уменьшении тонкие
+штрихи смазываются, и на нечётных смещениях грубый пик может уйти на соседнюю
+букву (Goddard.png 25×56: полный перебор 1.0, грубый уровень ~0.55). Поэтому
+при переданном threshold уточнённый score ниже порога перепроверяется полным
+перебором — решение «есть/нет» по порогу с ним не расходится, а выигрыш
+пирамиды остаётся на найденных шаблонах. Сверка: tools/check_pyramid.py.
+Глубина автоматически уменьшается, пока шаблон на грубом уровне не меньше
+min_templ_side пикселей.
+
+Настройка: REVIVE_PYRAMID_LEVELS / REVIVE_PYRAMID_MIN_AREA или
+configure_pyramid(...) — из wiring по runtime.vision пула.
+
+Exports:
+- match_template_pyramid(image, templ, *, levels=DEFAULT_LEVELS, top_k=..., threshold=None) -> (score, (x, y))
+- match_template_full(image, templ) -> (score, (x, y))
+- match_template_best(image, templ, threshold=None) -> (score, (x, y))  # пирамида для больших зон, иначе полный
+- configure_pyramid(levels=None, min_area=None)  # levels=0 — пирамида выключена
+"""
+from __future__ import annotations
+
+import os
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+DEFAULT_LEVELS: int = 2
+DEFAULT_TOP_K: int = 5
+MIN_TEMPL_SIDE: int = 8            # шаблон на грубом уровне не меньше этого
+PYRAMID_MIN_AREA: int = 640 * 480  # меньшие зоны дешевле матчить напрямую
+
+Hit = Tuple[float, Tuple[int, int]]
+
+
+def match_template_full(image: np.ndarray, templ: np.ndarray) -> Hit:
+    """Полный перебор: (max score, top-left) как у cv2.minMaxLoc."""
+    res = cv2.matchTemplate(image, templ, cv2.TM_CCOEFF_NORMED)
+    _, max_val, _, max_loc = cv2.minMaxLoc(res)
+    return float(max_val), (int(max_loc[0]), int(max_loc[1]))
+
+
+def _downscale(img: np.ndarray, f: int) -> np.ndarray:
+    h, w = img.shape[:2]
+    return cv2.resize(img, (max(1, w // f), max(1, h // f)), interpolation=cv2.INTER_AREA)
+
+
+def _top_peaks(res: np.ndarray, k: int, sup_w: int, sup_h: int) -> List[Tuple[float, Tuple[int, int]]]:
+    """k лучших пиков карты отклика с подавлением окрестности (sup_w × sup_h)."""
+    res = res.copy()
+    peaks = []
+    for _ in range(max(1, k)):
+        _, v, _, loc = cv2.minMaxLoc(res)
+        if not np.isfinite(v) or v <= -1.0:
+            break
+        peaks.append((float(v), (int(loc[0]), int(loc[1]))))
+        x, y = loc
+        res[max(0, y - sup_h):y + sup_h + 1, max(0, x - sup_w):x + sup_w + 1] = -1.0
+    return peaks
+
+
+def match_template_pyramid(
+    image: np.ndarray,
+    templ: np.ndarray,
+    *,
+    levels: int = DEFAULT_LEVELS,
+    top_k: int = DEFAULT_TOP_K,
+    threshold: Optional[float] = None,
+    min_templ_side: int = MIN_TEMPL_SIDE,
+) -> Hit:
+    """
+    Лучшее совпадение templ в image (оба одного типа: GRAY или BGR).
+    Возвращает (score, (x, y)) — top-left в координатах image; (-1.0, (0, 0)), если
+    шаблон больше изображения.
+    """
+    ih, iw = image.shape[:2]
+    th, tw = templ.shape[:2]
+    if th > ih or tw > iw:
+        return -1.0, (0, 0)
+
+    lv = max(0, int(levels))
+    while lv > 0 and min(th, tw) // (2 ** lv) < int(min_templ_side):
+        lv -= 1
+    if lv == 0:
+        return match_template_full(image, templ)
+
+    f = 2 ** lv
+    small_img = _downscale(image, f)
+    small_tpl = _downscale(templ, f)
+    sh, sw = small_tpl.shape[:2]
+    if sh > small_img.shape[0] or sw > small_img.shape[1]:
+        return match_template_full(image, templ)
+
+    coarse = cv2.matchTemplate(small_img, small_tpl, cv2.TM_CCOEFF_NORMED)
+    peaks = _top_peaks(coarse, top_k, max(1, sw // 2), max(1, sh // 2))
+    if not peaks:
+        return match_template_full(image, templ)
+
+    # уточнение: ROI полного разрешения вокруг каждого пика (± f + 1 пиксель запаса)
+    m = f + 1
+    best: Hit = (-1.0, (0, 0))
+    for _, (cx, cy) in peaks:
+        x0 = max(0, cx * f - m)
+        y0 = max(0, cy * f - m)
+        x1 = min(iw, cx * f + tw + m)
+        y1 = min(ih, cy * f + th + m)
+        roi = image[y0:y1, x0:x1]
+        if roi.shape[0] < th or roi.shape[1] < tw:
+            continue
+        score, (rx, ry) = match_template_full(roi, templ)
+        if score > best[0]:
+            best = (score, (x0 + rx, y0 + ry))
+
+    if threshold is not None and best[0] < float(threshold):
+        # «не найдено» решаем только полным перебором: грубый уровень мог промахнуться
+        return match_template_full(image, templ)
+    return best
+
+
+ENV_LEVELS = "REVIVE_PYRAMID_LEVELS"
+ENV_MIN_AREA = "REVIVE_PYRAMID_MIN_AREA"
+
+
+def _env_int(name: str, default: int) -> int:
+    env = os.getenv(name, "").strip()
+    if env:
+        try:
+            return max(0, int(env))
+        except ValueError:
+            pass
+    return default
+
+
+_levels: int = _env_int(ENV_LEVELS, DEFAULT_LEVELS)
+_min_area: int = _env_int(ENV_MIN_AREA, PYRAMID_MIN_AREA)
+
+
+def match_template_best(image: np.ndarray, templ: np.ndarray, threshold: Optional[float] = None) -> Hit:
+    """Пирамида для зон от PYRAMID_MIN_AREA пикселей (если не выключена), иначе полный перебор."""
+    ih, iw = image.shape[:2]
+    if _levels > 0 and ih * iw >= _min_area:
+        return match_template_pyramid(image, templ, levels=_levels, threshold=threshold)
+    if templ.shape[0] > ih or templ.shape[1] > iw:
+        return -1.0, (0, 0)
+    return match_template_full(image, templ)
+
+
+def configure_pyramid(levels: Optional[int] = None, min_area: Optional[int] = None) -> None:
+    global _levels, _min_area
+    if levels is not None:
+        _levels = max(0, int(levels))
+    if min_area is not None:
+        _min_area = max(0, int(min_area))
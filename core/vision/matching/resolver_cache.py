@@ -0,0 +1,125 @@
+# core/vision/matching/resolver_cache.py
+"""
+Мемоизация резолверов шаблонов.
+
+Резолверы core.engines.<engine>.server.<server>.templates.resolver на каждый
+вызов импортируют модуль и перебирают каталоги (lang → rus → eng → common).
+Здесь результат (абсолютный путь или None) запоминается по
+(модуль резолвера ≡ engine+server, lang, parts) — матчеры больше не ходят
+в файловую систему.
+
+Модуль резолвера может объявить рядом с resolve() масштабы своих шаблонов:
+  SCALES = {"reborn_banner.png": (1.0, 0.95, 1.05), ...}   # ключ — имя файла
+template_scales() отдаёт их мульти-масштабному матчеру (match_multi_in_zone).
+
+Кэш сбрасывается явно: SystemSection.set_server / set_language.
+
+Exports:
+- resolve_template(engine, server, lang, parts) -> str | None
+- resolve_cached(resolve_fn, lang, *parts) -> str | None  # для движков, импортирующих свой resolver
+- template_scales(engine, server, parts) -> tuple[float, ...] | None  # SCALES модуля резолвера
+- invalidate_resolver_cache()
+- resolver_cache_stats() -> {"hits","misses","size"}
+"""
+from __future__ import annotations
+
+import importlib
+import threading
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+_Key = Tuple[str, str, Tuple[str, ...]]  # (модуль резолвера, lang, parts)
+
+_lock = threading.Lock()
+_paths: Dict[_Key, Optional[str]] = {}
+_resolvers: Dict[str, Optional[Callable[..., Optional[str]]]] = {}
+_scales: Dict[str, Dict[str, Tuple[float, ...]]] = {}  # модуль резолвера -> {имя файла: масштабы}
+_hits = 0
+_misses = 0
+
+
+def _resolver_module_name(engine: str, server: str) -> str:
+    if engine == "stabilize":
+        return f"core.engines.dashboard.server.{server}.teleport.stabilize.templates.resolver"
+    return f"core.engines.{engine}.server.{server}.templates.resolver"
+
+
+def _get_resolver(mod_name: str) -> Optional[Callable[..., Optional[str]]]:
+    if mod_name in _resolvers:
+        return _resolvers[mod_name]
+    try:
+        mod = importlib.import_module(mod_name)
+        fn = getattr(mod, "resolve", None)
+        fn = fn if callable(fn) else None
+    except Exception:
+        fn = None
+    _resolvers[mod_name] = fn
+    return fn
+
+
+def _get_scales(mod_name: str) -> Dict[str, Tuple[float, ...]]:
+    with _lock:
+        if mod_name in _scales:
+            return _scales[mod_name]
+    decl: Dict[str, Tuple[float, ...]] = {}
+    try:
+        raw = getattr(importlib.import_module(mod_name), "SCALES", None) or {}
+        decl = {str(k): tuple(float(s) for s in v) for k, v in raw.items() if v}
+    except Exception:
+        decl = {}
+    with _lock:
+        _scales[mod_name] = decl
+    return decl
+
+
+def _lookup(key: _Key, resolve: Optional[Callable[..., Optional[str]]]) -> Optional[str]:
+    global _hits, _misses
+    with _lock:
+        if key in _paths:
+            _hits += 1
+            return _paths[key]
+        _misses += 1
+        if resolve is None:
+            resolve = _get_resolver(key[0])
+
+    path: Optional[str] = None
+    if resolve is not None:
+        try:
+            path = resolve(key[1], *key[2])
+        except Exception:
+            path = None
+
+    with _lock:
+        _paths[key] = path
+    return path
+
+
+def resolve_template(engine: str, server: str, lang: str, parts: Sequence[str]) -> Optional[str]:
+    """Путь к шаблону через серверный резолвер, с кэшем (включая отрицательный результат)."""
+    mod_name = _resolver_module_name(str(engine or ""), str(server or ""))
+    return _lookup((mod_name, str(lang or ""), tuple(parts)), None)
+
+
+def resolve_cached(resolve_fn: Callable[..., Optional[str]], lang: str, *parts: str) -> Optional[str]:
+    """resolve_fn(lang, *parts) с тем же кэшем; ключ — модуль, где объявлен resolve_fn."""
+    mod_name = getattr(resolve_fn, "__module__", None) or repr(resolve_fn)
+    return _lookup((mod_name, str(lang or ""), tuple(parts)), resolve_fn)
+
+
+def template_scales(engine: str, server: str, parts: Sequence[str]) -> Optional[Tuple[float, ...]]:
+    """Масштабы, объявленные резолвером для файла шаблона parts[-1]; None — не объявлены."""
+    if not parts:
+        return None
+    decl = _get_scales(_resolver_module_name(str(engine or ""), str(server or "")))
+    return decl.get(str(parts[-1]).replace("\\", "/").rsplit("/", 1)[-1]) or None
+
+
+def invalidate_resolver_cache() -> None:
+    with _lock:
+        _paths.clear()
+        _resolvers.clear()
+        _scales.clear()
+
+
+def resolver_cache_stats() -> Dict[str, int]:
+    with _lock:
+        return {"hits": _hits, "misses": _misses, "size": len(_paths)}
@@ -0,0 +1,208 @@
+# core/vision/matching/template_atlas.py
+"""
+Атлас шаблонов: все PNG из core/engines/*/server/*/**/templates/** заранее
+декодированы (GRAY и BGR) и лежат одним сырым блобом + JSON-индекс.
+
+  core/engines/templates.atlas.bin   — плоскости uint8 подряд (выравнивание 64 байта)
+  core/engines/templates.atlas.json  — {"version", "entries": {rel_path: {...}}}
+
+rel_path — путь PNG относительно core/engines ("/" как разделитель), т.е.
+тот же файл, что вернул резолвер. Блоб открывается через np.memmap, плоскость
+отдаётся read-only view без декодирования.
+
+Актуальность проверяется по каждому PNG: (size, crc32 байт файла). mtime не
+используется — onefile-сборка распаковывает файлы с новым mtime. Нет атласа,
+нет записи или PNG изменился → None, и TemplateCache читает PNG как раньше.
+
+Сборка: python tools/build_template_atlas.py (вызывается из build.bat).
+
+Exports:
+- atlas_lookup(path, mode) -> np.ndarray | None   # mode: IMREAD_GRAYSCALE / IMREAD_COLOR
+- build_atlas(base=None) -> int                   # число шаблонов в атласе
+- configure_template_atlas(enabled=None, base=None)
+- template_atlas_stats() -> {"entries","hits","stale","enabled","loaded"}
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import zlib
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from core.logging import console
+
+ATLAS_VERSION: int = 1
+ALIGN: int = 64
+
+_ENGINES_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "engines"))
+DEFAULT_BASE = os.path.join(_ENGINES_DIR, "templates.atlas")
+
+_PLANES = {cv2.IMREAD_GRAYSCALE: "gray", cv2.IMREAD_COLOR: "bgr"}
+
+
+def _file_sig(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    return len(data), zlib.crc32(data)
+
+
+def _rel_key(path: str) -> Optional[str]:
+    ap = os.path.abspath(path)
+    try:
+        rel = os.path.relpath(ap, _ENGINES_DIR)
+    except ValueError:  # другой диск
+        return None
+    if rel.startswith(".."):
+        return None
+    return rel.replace("\\", "/")
+
+
+class TemplateAtlas:
+    def __init__(self, base: str = DEFAULT_BASE):
+        self.base = base
+        self.enabled = True
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._entries: Dict[str, dict] = {}
+        self._blob: Optional[np.memmap] = None
+        self._checked: Dict[str, bool] = {}  # rel_path -> PNG совпадает с атласом
+        self.hits = 0
+        self.stale = 0
+
+    def _load(self) -> None:
+        self._loaded = True
+        idx_path, bin_path = self.base + ".json", self.base + ".bin"
+        if not (os.path.isfile(idx_path) and os.path.isfile(bin_path)):
+            return
+        try:
+            with open(idx_path, "r", encoding="utf-8") as f:
+                idx = json.load(f)
+            if int(idx.get("version", 0)) != ATLAS_VERSION:
+                console.log(f"[templates] atlas version mismatch: {idx.get('version')} != {ATLAS_VERSION}")
+                return
+            entries = idx.get("entries") or {}
+            blob = np.memmap(bin_path, dtype=np.uint8, mode="r") if os.path.getsize(bin_path) else None
+        except Exception as e:
+            console.log(f"[templates] atlas load error: {e}")
+            return
+        self._entries, self._blob = entries, blob
+        console.log(f"[templates] atlas: {len(entries)} templates ({bin_path})")
+
+    def lookup(self, path: str, mode: int) -> Optional[np.ndarray]:
+        plane = _PLANES.get(int(mode))
+        if plane is None or not self.enabled:
+            return None
+        key = _rel_key(path)
+        if key is None:
+            return None
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            entry = self._entries.get(key)
+            if entry is None or self._blob is None:
+                return None
+            fresh = self._checked.get(key)
+        if fresh is None:
+            sig = _file_sig(os.path.join(_ENGINES_DIR, key))
+            fresh = sig is not None and sig == (int(entry.get("size", -1)), int(entry.get("crc32", -1)))
+            with self._lock:
+                self._checked[key] = fresh
+                if not fresh:
+                    self.stale += 1
+        if not fresh:
+            return None
+        spec = (entry.get("planes") or {}).get(plane)
+        if not spec:
+            return None
+        off, shape = int(spec[0]), tuple(int(v) for v in spec[1])
+        n = int(np.prod(shape))
+        if off + n > self._blob.size:
+            return None
+        with self._lock:
+            self.hits += 1
+        return self._blob[off:off + n].reshape(shape)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._loaded = False
+            self._entries = {}
+            self._blob = None
+            self._checked.clear()
+
+
+_atlas = TemplateAtlas()
+
+
+def atlas_lookup(path: str, mode: int = cv2.IMREAD_GRAYSCALE) -> Optional[np.ndarray]:
+    """Плоскость шаблона из атласа (read-only view) или None — тогда читать PNG."""
+    return _atlas.lookup(path, mode)
+
+
+def _template_files():
+    """Все PNG в каталогах templates всех движков и серверов."""
+    from core.vision.matching.template_cache import _server_template_files
+    servers = set()
+    for eng in sorted(os.listdir(_ENGINES_DIR)):
+        sdir = os.path.join(_ENGINES_DIR, eng, "server")
+        if os.path.isdir(sdir):
+            servers.update(d for d in os.listdir(sdir) if os.path.isdir(os.path.join(sdir, d)) and d != "__pycache__")
+    for server in sorted(servers):
+        yield from _server_template_files(server, None)
+
+
+def build_atlas(base: Optional[str] = None) -> int:
+    """Собрать атлас из дерева PNG. Возвращает число шаблонов в индексе."""
+    base = base or DEFAULT_BASE
+    entries: Dict[str, dict] = {}
+    offset = 0
+    tmp_bin, tmp_idx = base + ".bin.tmp", base + ".json.tmp"
+    with open(tmp_bin, "wb") as out:
+        for path in _template_files():
+            key = _rel_key(path)
+            sig = _file_sig(path)
+            if key is None or sig is None or key in entries:
+                continue
+            planes = {}
+            for mode, plane in _PLANES.items():
+                img = cv2.imread(path, mode)
+                if img is None or img.size == 0:
+                    continue
+                img = np.ascontiguousarray(img, dtype=np.uint8)
+                pad = (-offset) % ALIGN
+                if pad:
+                    out.write(b"\0" * pad)
+                    offset += pad
+                out.write(img.tobytes())
+                planes[plane] = [offset, list(img.shape)]
+                offset += img.nbytes
+            if planes:
+                entries[key] = {"size": sig[0], "crc32": sig[1], "planes": planes}
+    with open(tmp_idx, "w", encoding="utf-8") as f:
+        json.dump({"version": ATLAS_VERSION, "entries": entries}, f, ensure_ascii=False, indent=0, sort_keys=True)
+    os.replace(tmp_bin, base + ".bin")
+    os.replace(tmp_idx, base + ".json")
+    if base == _atlas.base:
+        _atlas.reset()
+    console.log(f"[templates] atlas built: {len(entries)} templates, {offset} bytes → {base}.bin")
+    return len(entries)
+
+
+def configure_template_atlas(enabled: Optional[bool] = None, base: Optional[str] = None) -> None:
+    if base is not None:
+        _atlas.base = base
+        _atlas.reset()
+    if enabled is not None:
+        _atlas.enabled = bool(enabled)
+
+
+def template_atlas_stats() -> Dict[str, int]:
+    with _atlas._lock:
+        return {"entries": len(_atlas._entries), "hits": _atlas.hits, "stale": _atlas.stale,
+                "enabled": int(_atlas.enabled), "loaded": int(_atlas._loaded and _atlas._blob is not None)}
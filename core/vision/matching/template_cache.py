@@ -0,0 +1,224 @@
+# core/vision/matching/template_cache.py
+"""
+Общий (на процесс) LRU-кэш декодированных шаблонов.
+
+Ключ — (abs path, режим cv2.imread, mtime): перезапись PNG на диске даёт новый
+ключ, старая запись вытесняется по LRU. Масштабированные варианты лежат в том же
+LRU с ключом (abs path, режим, mtime, scale, interpolation) — resize один раз.
+Изображения в кэше read-only — их делят все потоки; если нужно изменить,
+делайте .copy().
+Промах сначала ищется в атласе (template_atlas, memmap без декодирования),
+и только потом читается PNG.
+
+Exports:
+- load_template(path, mode=cv2.IMREAD_GRAYSCALE) -> np.ndarray | None
+- load_template_gray(path) / load_template_bgr(path)
+- load_template_scaled(path, scale, mode=GRAYSCALE, interpolation=None) -> np.ndarray | None
+- template_mtime(path) -> float   # mtime PNG (0.0 — нет файла); для ключей кэшей результатов
+- warm_up_templates(server, lang=None, modes=(GRAYSCALE,)) -> int  # предзагрузка шаблонов сервера
+- configure_template_cache(max_entries=None)
+- clear_template_cache()
+- template_cache_stats() -> {"hits","misses","size","max_entries"}
+"""
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from core.logging import console
+from core.vision.matching.template_atlas import atlas_lookup
+
+DEFAULT_MAX_ENTRIES: int = 2048  # базовые шаблоны + их масштабы
+
+_ENGINES_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "engines"))
+
+_Key = Tuple  # (path, mode, mtime) | (path, mode, mtime, scale, interpolation)
+
+
+class TemplateCache:
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max(1, int(max_entries))
+        self._lock = threading.Lock()
+        self._items: "OrderedDict[_Key, np.ndarray]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _base_key(path: str, mode: int) -> Optional[Tuple[str, int, float]]:
+        if not path:
+            return None
+        try:
+            ap = os.path.abspath(path)
+            return (ap, int(mode), os.stat(ap).st_mtime)
+        except OSError:
+            return None
+
+    def _lookup(self, key: _Key) -> Optional[np.ndarray]:
+        with self._lock:
+            img = self._items.get(key)
+            if img is not None:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return img
+            self.misses += 1
+        return None
+
+    def _store(self, key: _Key, img: np.ndarray) -> np.ndarray:
+        img.flags.writeable = False
+        with self._lock:
+            self._items[key] = img
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+        return img
+
+    def get(self, path: str, mode: int = cv2.IMREAD_GRAYSCALE) -> Optional[np.ndarray]:
+        key = self._base_key(path, mode)
+        if key is None:
+            return None
+        img = self._lookup(key)
+        if img is not None:
+            return img
+
+        img = atlas_lookup(key[0], key[1])
+        if img is None:
+            try:
+                img = cv2.imread(key[0], key[1])
+            except Exception:
+                img = None
+        if img is None or img.size == 0:
+            return None
+        return self._store(key, img)
+
+    def get_scaled(self, path: str, scale: float, mode: int = cv2.IMREAD_GRAYSCALE,
+                   interpolation: Optional[int] = None) -> Optional[np.ndarray]:
+        scale = round(float(scale), 4)
+        if scale == 1.0:
+            return self.get(path, mode)
+        if interpolation is None:
+            interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_CUBIC
+        base_key = self._base_key(path, mode)
+        if base_key is None:
+            return None
+        key = base_key + (scale, int(interpolation))
+        img = self._lookup(key)
+        if img is not None:
+            return img
+
+        base = self.get(path, mode)
+        if base is None:
+            return None
+        tw = max(1, int(round(base.shape[1] * scale)))
+        th = max(1, int(round(base.shape[0] * scale)))
+        return self._store(key, cv2.resize(base, (tw, th), interpolation=int(interpolation)))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+
+_cache = TemplateCache()
+
+
+def load_template(path: str, mode: int = cv2.IMREAD_GRAYSCALE) -> Optional[np.ndarray]:
+    """cv2.imread(path, mode) через кэш. None — файла нет или он не читается."""
+    return _cache.get(path, mode)
+
+
+def template_mtime(path: Optional[str]) -> float:
+    """mtime файла шаблона (0.0, если пути нет или файл не читается)."""
+    if not path:
+        return 0.0
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return 0.0
+
+
+def load_template_gray(path: str) -> Optional[np.ndarray]:
+    return _cache.get(path, cv2.IMREAD_GRAYSCALE)
+
+
+def load_template_bgr(path: str) -> Optional[np.ndarray]:
+    return _cache.get(path, cv2.IMREAD_COLOR)
+
+
+def load_template_scaled(path: str, scale: float, mode: int = cv2.IMREAD_GRAYSCALE,
+                         interpolation: Optional[int] = None) -> Optional[np.ndarray]:
+    """
+    Шаблон в масштабе scale (resize один раз на (path, mode, mtime, scale, interpolation)).
+    interpolation по умолчанию: INTER_AREA для уменьшения, INTER_CUBIC для увеличения.
+    """
+    return _cache.get_scaled(path, scale, mode, interpolation)
+
+
+def _server_template_files(server: str, lang: Optional[str]) -> Iterable[str]:
+    """
+    PNG из всех каталогов templates движков сервера:
+      core/engines/<engine>/server/<server>/**/templates/<lang|common>/**.png
+    """
+    try:
+        engines = sorted(os.listdir(_ENGINES_DIR))
+    except OSError:
+        return
+    allowed = {lang.lower(), "common"} if lang else None
+    for eng in engines:
+        root = os.path.join(_ENGINES_DIR, eng, "server", server)
+        if not os.path.isdir(root):
+            continue
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = [d for d in dirnames if d != "__pycache__"]
+            rel = os.path.relpath(dirpath, root).replace("\\", "/").split("/")
+            if "templates" not in rel:
+                continue
+            sub = rel[rel.index("templates") + 1:]
+            if allowed is not None and sub and sub[0] not in allowed:
+                continue
+            for fn in filenames:
+                if fn.lower().endswith(".png"):
+                    yield os.path.join(dirpath, fn)
+
+
+def warm_up_templates(
+    server: str,
+    lang: Optional[str] = None,
+    modes: Sequence[int] = (cv2.IMREAD_GRAYSCALE,),
+) -> int:
+    """
+    Декодировать заранее все шаблоны сервера (опционально — только lang + common),
+    чтобы первый опрос детекторов не ждал диска. Возвращает число загруженных изображений.
+    """
+    server = (server or "").lower()
+    if not server:
+        return 0
+    n = 0
+    for path in _server_template_files(server, lang):
+        for mode in modes:
+            if _cache.get(path, mode) is not None:
+                n += 1
+    console.log(f"[templates] warm-up {server}/{lang or '*'}: {n} images, cache={len(_cache._items)}")
+    return n
+
+
+def configure_template_cache(max_entries: Optional[int] = None) -> None:
+    if max_entries is not None:
+        with _cache._lock:
+            _cache.max_entries = max(1, int(max_entries))
+            while len(_cache._items) > _cache.max_entries:
+                _cache._items.popitem(last=False)
+
+
+def clear_template_cache() -> None:
+    _cache.clear()
+
+
+def template_cache_stats() -> Dict[str, int]:
+    with _cache._lock:
+        size = len(_cache._items)
+    return {"hits": _cache.hits, "misses": _cache.misses, "size": size,
+            "max_entries": _cache.max_entries}
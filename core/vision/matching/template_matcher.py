@@ -6,28 +6,19 @@ from typing import Optional, Tuple, Dict, Sequence
 
 import cv2
 import numpy as np
-from core.vision.capture.window_bgr_capture import capture_window_region_bgr
+from core.vision.capture.frame_cache import capture_window_region_cached
+from core.vision.change_detect import zone_memo
+from core.vision.matching.template_cache import load_template, template_mtime
+from core.vision.matching.resolver_cache import resolve_template
 
 Point = Tuple[int, int]
 ZoneLTRB = Tuple[int, int, int, int]
 
 def _load_template_abs(path: str) -> Optional[np.ndarray]:
-    try:
-        img = cv2.imread(path, cv2.IMREAD_COLOR)
-        return img if img is not None and img.size else None
-    except Exception:
-        return None
+    return load_template(path, cv2.IMREAD_COLOR)
 
 def _resolve_path(server: str, lang: str, parts: Sequence[str], engine: str) -> Optional[str]:
-    import importlib
-    try:
-        mod = importlib.import_module(f"core.engines.{engine}.server.{server}.templates.resolver")
-        resolve = getattr(mod, "resolve", None)
-        if callable(resolve):
-            return resolve(lang, *parts)
-    except Exception:
-        return None
-    return None
+    return resolve_template(engine, server, lang, parts)
 
 def match_in_zone(
         window: Dict,
@@ -46,13 +37,35 @@ def match_in_zone(
         return None
 
     # захват зоны
-    zone_img = capture_window_region_bgr(window, zone_ltrb)
+    zone_img = capture_window_region_cached(window, zone_ltrb)
     if zone_img is None or zone_img.size == 0:
         return None
 
     # путь к шаблону — только через серверный resolver
     if not engine:
         return None  # явное требование: без имени движка не резолвим
+
+    # пока зона (и PNG шаблона) не менялись — тот же результат, без matchTemplate
+    tpath = _resolve_path(server, lang, template_parts, engine=engine)
+    result_key = ("tm.match_in_zone", server, lang, tuple(template_parts), float(threshold), engine,
+                  int(window["x"]), int(window["y"]), tpath, template_mtime(tpath))
+    return zone_memo(
+        tuple(map(int, zone_ltrb)), zone_img, result_key,
+        lambda: _match_in_zone_img(window, zone_ltrb, zone_img, server, lang,
+                                   template_parts, threshold, engine),
+    )
+
+
+def _match_in_zone_img(
+        window: Dict,
+        zone_ltrb: ZoneLTRB,
+        zone_img: np.ndarray,
+        server: str,
+        lang: str,
+        template_parts: Sequence[str],
+        threshold: float,
+        engine: str,
+) -> Optional[Point]:
     tpath = _resolve_path(server, lang, template_parts, engine=engine)
     if not tpath:
         return None
@@ -3,24 +3,74 @@
 # core.engines.<engine>.server.<server>.templates.resolver
 
 from __future__ import annotations
+import threading
 from typing import Optional, Tuple, Dict, Sequence, List
 
 import cv2
 import numpy as np
 
-from core.vision.capture.window_bgr_capture import capture_window_region_bgr
+from core.vision.capture.frame_cache import capture_window_region_cached
+from core.vision.change_detect import zone_memo
+from core.vision.matching.template_cache import load_template, load_template_scaled, template_mtime
+from core.vision.matching.resolver_cache import resolve_template, template_scales
+from core.vision.matching.pyramid import match_template_best
+from core.vision.matching.executor import map_jobs
 from core.logging import console
 
 Point = Tuple[int, int]
 ZoneLTRB = Tuple[int, int, int, int]
 
+# Сколько промахов подряд на «закреплённом» масштабе, прежде чем вернуться к полному перебору
+SCALE_LOCK_MAX_MISSES: int = 8
+
+
+class _ScaleLock:
+    """
+    Последний сработавший масштаб по (engine, путь шаблона, W×H окна).
+    Разрешение клиента за сессию почти не меняется, поэтому следующий вызов
+    пробует сначала этот масштаб; после SCALE_LOCK_MAX_MISSES промахов подряд
+    (или при другом размере окна — другой ключ) снова идёт полный перебор.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._items: Dict[tuple, List] = {}  # key -> [scale, misses]
+
+    def get(self, key: tuple) -> Optional[float]:
+        with self._lock:
+            it = self._items.get(key)
+            return None if it is None else it[0]
+
+    def hit(self, key: tuple, scale: float) -> None:
+        with self._lock:
+            self._items[key] = [float(scale), 0]
+
+    def miss(self, key: tuple) -> bool:
+        """Учесть промах; False — лимит исчерпан, масштаб снят."""
+        with self._lock:
+            it = self._items.get(key)
+            if it is None:
+                return False
+            it[1] += 1
+            if it[1] >= SCALE_LOCK_MAX_MISSES:
+                del self._items[key]
+                return False
+            return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+
+_scale_lock = _ScaleLock()
+
+
+def reset_scale_lock() -> None:
+    _scale_lock.clear()
+
 
 def _load_template_abs(path: str) -> Optional[np.ndarray]:
-    try:
-        img = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
-        return img if img is not None and img.size else None
-    except Exception:
-        return None
+    return load_template(path, cv2.IMREAD_GRAYSCALE)
 
 
 def _resolve_path(server: str, lang: str, parts: Sequence[str], engine: str) -> Optional[str]:
@@ -28,19 +78,15 @@ def _resolve_path(server: str, lang: str, parts: Sequence[str], engine: str) ->
     Ожидаем server-специфичный резолвер по пути:
       core.engines.<engine>.server.<server>.templates.resolver
     parts обычно вида ["<lang>", "reborn_banner.png"].
+    Результат кэшируется (core.vision.matching.resolver_cache).
     """
-    try:
-        if engine == "stabilize":
-            mod_name = f"core.engines.dashboard.server.{server}.teleport.stabilize.templates.resolver"
-        else:
-            mod_name = f"core.engines.{engine}.server.{server}.templates.resolver"
-        mod = __import__(mod_name, fromlist=["resolve"])
-        resolve = getattr(mod, "resolve", None)
-        if callable(resolve):
-            return resolve(lang, *parts)
-    except Exception:
-        return None
-    return None
+    return resolve_template(engine, server, lang, parts)
+
+
+def _template_sig(server: str, lang: str, parts: Sequence[str], engine: str) -> Tuple[Optional[str], float]:
+    """(путь, mtime) шаблона — в ключ zone_memo: замена PNG сбрасывает кэш результата."""
+    tpath = _resolve_path(server, lang, parts, engine=engine)
+    return tpath, template_mtime(tpath)
 
 
 def match_key_in_zone_single(
@@ -56,21 +102,43 @@ def match_key_in_zone_single(
     """
     Матч ОДНОГО шаблона в зоне.
     Возвращает центр совпадения в ЭКРАННЫХ координатах или None.
+    Пока пиксели зоны не менялись, результат берётся из кэша (core.vision.change_detect).
     """
     if not window:
         return None
 
-    zone_img_bgr = capture_window_region_bgr(window, zone_ltrb)
+    zone_img_bgr = capture_window_region_cached(window, zone_ltrb)
     if zone_img_bgr is None or zone_img_bgr.size == 0:
         return None
 
+    lang = (lang or "rus").lower()
+    result_key = ("tm2.single", server, lang, tuple(template_parts), float(threshold), engine,
+                  int(window.get("x", 0)), int(window.get("y", 0)),
+                  _template_sig(server, lang, template_parts, engine))
+    return zone_memo(
+        tuple(map(int, zone_ltrb)), zone_img_bgr, result_key,
+        lambda: _match_single_img(window, zone_ltrb, zone_img_bgr, server, lang,
+                                  template_parts, threshold, engine),
+    )
+
+
+def _match_single_img(
+    window: Dict,
+    zone_ltrb: ZoneLTRB,
+    zone_img_bgr: np.ndarray,
+    server: str,
+    lang: str,
+    template_parts: Sequence[str],
+    threshold: float,
+    engine: str,
+) -> Optional[Point]:
     # Приводим зону к GRAY, чтобы тип совпадал с шаблоном
     if zone_img_bgr.ndim == 3:
         zone_gray = cv2.cvtColor(zone_img_bgr, cv2.COLOR_BGR2GRAY)
     else:
         zone_gray = zone_img_bgr
 
-    tpath = _resolve_path(server, (lang or "rus").lower(), template_parts, engine=engine)
+    tpath = _resolve_path(server, lang, template_parts, engine=engine)
     if not tpath:
         return None
 
@@ -81,8 +149,8 @@ def match_key_in_zone_single(
     if zone_gray.shape[0] < templ.shape[0] or zone_gray.shape[1] < templ.shape[1]:
         return None
 
-    res = cv2.matchTemplate(zone_gray, templ, cv2.TM_CCOEFF_NORMED)
-    _, max_val, _, max_loc = cv2.minMaxLoc(res)
+    # fullscreen-зоны (ui_guard) — coarse-to-fine, мелкие — полный перебор
+    max_val, max_loc = match_template_best(zone_gray, templ, threshold=float(threshold))
     if float(max_val) < float(threshold):
         return None
 
@@ -93,6 +161,52 @@ def match_key_in_zone_single(
     return (int(window["x"] + cx_client), int(window["y"] + cy_client))
 
 
+def match_many(
+    frame: np.ndarray,
+    templates_map: Dict[str, Sequence[str]],
+    *,
+    server: str,
+    lang: str,
+    engine: str,
+    window: Optional[Dict] = None,
+    zone_ltrb: Optional[ZoneLTRB] = None,
+    threshold: Optional[float] = None,
+) -> Dict[str, Tuple[float, Point]]:
+    """
+    Все шаблоны templates_map по ОДНОМУ кадру: одна конверсия в GRAY, по
+    matchTemplate на шаблон (для больших кадров — пирамида).
+    frame — зона zone_ltrb окна (BGR/GRAY), уже захваченная вызывающим.
+
+    Возвращает {key: (score, center)} для каждого ключа, чей шаблон разрешился;
+    center — в ЭКРАННЫХ координатах, если передан window, иначе в координатах frame.
+    Порог здесь не применяется (threshold только сужает «серую» зону пирамиды).
+    Пока кадр не менялся, результат берётся из кэша.
+    """
+    if frame is None or frame.size == 0 or not templates_map:
+        return {}
+    lang = (lang or "rus").lower()
+    zl, zt = (int(zone_ltrb[0]), int(zone_ltrb[1])) if zone_ltrb else (0, 0)
+    ox, oy = (int(window.get("x", 0)), int(window.get("y", 0))) if window else (0, 0)
+
+    def _compute() -> Dict[str, Tuple[float, Point]]:
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        out: Dict[str, Tuple[float, Point]] = {}
+        for key, parts in templates_map.items():
+            tpath = _resolve_path(server, lang, parts, engine=engine)
+            templ = _load_template_abs(tpath) if tpath else None
+            if templ is None or templ.shape[0] > gray.shape[0] or templ.shape[1] > gray.shape[1]:
+                continue
+            score, (tlx, tly) = match_template_best(gray, templ, threshold=threshold)
+            h, w = templ.shape[:2]
+            out[key] = (float(score), (ox + zl + int(tlx + w / 2), oy + zt + int(tly + h / 2)))
+        return out
+
+    result_key = ("tm2.many", server, lang, engine, threshold, ox, oy, zl, zt,
+                  tuple((k, tuple(v), _template_sig(server, lang, v, engine)) for k, v in templates_map.items()))
+    zone_key = tuple(map(int, zone_ltrb)) if zone_ltrb else ("frame",) + tuple(frame.shape)
+    return zone_memo(zone_key, frame, result_key, _compute)
+
+
 def match_multi_in_zone(
     *,
     window: Dict,
@@ -105,6 +219,9 @@ def match_multi_in_zone(
     engine: str = "respawn",
     scales: Sequence[float] = (1.0, 0.9, 1.1, 0.8, 1.2),
     debug: bool = False,
+    zone_img: Optional[np.ndarray] = None,
+    scales_by_key: Optional[Dict[str, Sequence[float]]] = None,
+    lock_scale: bool = True,
 ) -> Optional[Tuple[Point, str]]:
     """
     Мульти-матчер: обходит ключи в заданном порядке (key_order) и ищет каждый шаблон
@@ -113,25 +230,80 @@ def match_multi_in_zone(
     templates_map: { "reborn_banner": ["<lang>", "reborn_banner.png"], ... }
     key_order:     приоритет проверки; если None — используем templates_map.keys()
     threshold:     порог TM_CCOEFF_NORMED
+    zone_img:      уже захваченная зона zone_ltrb (BGR) — чтобы серия вызовов
+                   по одной зоне не захватывала её заново
+    scales_by_key: свои масштабы для отдельных ключей; без них — SCALES, объявленные
+                   резолвером шаблонов движка (resolver_cache.template_scales), иначе scales.
+                   Масштабированные шаблоны берутся из кэша, resize не повторяется
+    Задачи (шаблон × масштаб) раскладываются на пул core.vision.matching.executor.
+    lock_scale:    сначала пробовать масштаб, сработавший для ключа при этом размере окна;
+                   если он проходит порог — остальные масштабы ключа не перебираются
+    Пока пиксели зоны не менялись, результат берётся из кэша (кроме debug=True).
     """
     if not window:
         return None
 
     # Захват зоны
-    zone_img = capture_window_region_bgr(window, zone_ltrb)
+    if zone_img is None:
+        zone_img = capture_window_region_cached(window, zone_ltrb)
     if zone_img is None or zone_img.size == 0:
         return None
 
-    gray = cv2.cvtColor(zone_img, cv2.COLOR_BGR2GRAY)
-
     # Порядок ключей
     keys = list(key_order) if key_order else list(templates_map.keys())
     if not keys:
         return None
 
+    def _compute():
+        return _match_multi_img(window, zone_ltrb, zone_img, server, lang, templates_map,
+                                keys, threshold, engine, scales, scales_by_key, lock_scale, debug)
+
+    if debug:
+        return _compute()
+    result_key = (
+        "tm2.multi", server, (lang or "rus").lower(), engine, float(threshold), tuple(scales),
+        tuple((k, tuple(templates_map.get(k) or ()),
+               tuple((scales_by_key or {}).get(k) or ()),
+               _template_sig(server, (lang or "rus").lower(), templates_map.get(k) or (), engine)) for k in keys),
+        int(window.get("x", 0)), int(window.get("y", 0)),
+    )
+    return zone_memo(tuple(map(int, zone_ltrb)), zone_img, result_key, _compute)
+
+
+def _match_multi_img(
+    window: Dict,
+    zone_ltrb: ZoneLTRB,
+    zone_img: np.ndarray,
+    server: str,
+    lang: str,
+    templates_map: Dict[str, Sequence[str]],
+    keys: List[str],
+    threshold: float,
+    engine: str,
+    scales: Sequence[float],
+    scales_by_key: Optional[Dict[str, Sequence[float]]],
+    lock_scale: bool,
+    debug: bool,
+) -> Optional[Tuple[Point, str]]:
+    gray = cv2.cvtColor(zone_img, cv2.COLOR_BGR2GRAY)
+    thr = float(threshold)
+    win_wh = (int(window.get("width", 0)), int(window.get("height", 0)))
+
     best = None  # {'score': float, 'loc': (x,y), 'w': int, 'h': int, 'key': str}
 
-    # Проход по ключам/масштабам
+    def _try(tpath: str, s: float) -> Optional[Dict]:
+        t = load_template_scaled(tpath, s, cv2.IMREAD_GRAYSCALE)
+        if t is None:
+            return None
+        if t.shape[0] > gray.shape[0] or t.shape[1] > gray.shape[1]:
+            return None
+        res = cv2.matchTemplate(gray, t, cv2.TM_CCOEFF_NORMED)
+        _, maxVal, _, maxLoc = cv2.minMaxLoc(res)
+        return {"score": float(maxVal), "loc": maxLoc, "w": t.shape[1], "h": t.shape[0], "scale": s}
+
+    # Ключи → пути шаблонов и их масштабы (вызов → объявленные резолвером → общие)
+    entries: List[Tuple[str, str]] = []
+    key_scales: Dict[str, Sequence[float]] = {}
     for key in keys:
         parts = templates_map.get(key)
         if not parts:
@@ -147,26 +319,61 @@ def match_multi_in_zone(
             if debug:
                 console.log(f"[tm2] failed to read template: {tpath}")
             continue
-
-        for s in scales:
-            tw = max(1, int(round(tpl.shape[1] * s)))
-            th = max(1, int(round(tpl.shape[0] * s)))
-            t = cv2.resize(
-                tpl,
-                (tw, th),
-                interpolation=cv2.INTER_AREA if s < 1.0 else cv2.INTER_CUBIC
-            )
-            if t.shape[0] > gray.shape[0] or t.shape[1] > gray.shape[1]:
-                continue
-
-            res = cv2.matchTemplate(gray, t, cv2.TM_CCOEFF_NORMED)
-            _, maxVal, _, maxLoc = cv2.minMaxLoc(res)
-            score = float(maxVal)
-            if best is None or score > best["score"]:
-                best = {"score": score, "loc": maxLoc, "w": t.shape[1], "h": t.shape[0], "key": key}
+        entries.append((key, tpath))
+        key_scales[key] = ((scales_by_key or {}).get(key)
+                           or template_scales(engine, server, parts)
+                           or scales)
+
+    def _job(job: Tuple[str, str, float]) -> Tuple[str, Optional[Dict]]:
+        return job[0], _try(job[1], job[2])
+
+    key_best: Dict[str, Dict] = {}
+
+    def _keep(key: str, cand: Optional[Dict]) -> None:
+        if cand is not None and (key not in key_best or cand["score"] > key_best[key]["score"]):
+            key_best[key] = cand
+
+    # 1) закреплённые масштабы: по одной задаче на ключ
+    locked_jobs = []
+    sweep: List[Tuple[str, str]] = []
+    for key, tpath in entries:
+        locked = _scale_lock.get((engine, tpath, win_wh)) if lock_scale else None
+        if locked is None:
+            sweep.append((key, tpath))
+        else:
+            locked_jobs.append((key, tpath, locked))
+
+    paths = dict(entries)
+    for (key, cand), (_, tpath, locked) in zip(map_jobs(_job, locked_jobs), locked_jobs):
+        lock_key = (engine, tpath, win_wh)
+        _keep(key, cand)
+        if cand is not None and cand["score"] >= thr:
+            _scale_lock.hit(lock_key, locked)
+        elif not _scale_lock.miss(lock_key):
+            # лимит промахов исчерпан — этот ключ идёт на полный перебор
+            if debug:
+                console.log(f"[tm2] scale lock released for key={key} ({win_wh[0]}x{win_wh[1]})")
+            sweep.append((key, tpath))
+        # иначе масштаб ещё закреплён — полный перебор не делаем
+
+    # 2) полный перебор (шаблон × масштаб) — параллельно, если включён пул
+    sweep_jobs = [(key, tpath, s) for key, tpath in sweep for s in key_scales[key]]
+    for key, cand in map_jobs(_job, sweep_jobs):
+        _keep(key, cand)
+    if lock_scale:
+        for key, _ in sweep:
+            kb = key_best.get(key)
+            if kb is not None and kb["score"] >= thr:
+                _scale_lock.hit((engine, paths[key], win_wh), kb["scale"])
+
+    # лучший по всем ключам; при равенстве — первый в порядке keys
+    for key, _ in entries:
+        kb = key_best.get(key)
+        if kb is not None and (best is None or kb["score"] > best["score"]):
+            best = dict(kb, key=key)
 
     # Проверка порога и перевод координат в ЭКРАННЫЕ
-    if best and best["score"] >= float(threshold):
+    if best and best["score"] >= thr:
         zl, zt, _, _ = zone_ltrb
         cx_client = zl + best["loc"][0] + best["w"] // 2
         cy_client = zt + best["loc"][1] + best["h"] // 2
@@ -2,22 +2,17 @@
 import numpy as np
 import cv2
 
+from core.vision.utils.palette_lut import compile_palettes
+
 def mask_for_colors_bgr(img_bgr, colors_rgb, tol=2):
-    # img_bgr: HxWx3 (BGR), цвета заданы в RGB → переворачиваем
-    masks = []
-    for r, g, b in colors_rgb:
-        lower = np.array([b - tol, g - tol, r - tol], dtype=np.int16)
-        upper = np.array([b + tol, g + tol, r + tol], dtype=np.int16)
-        lower = np.clip(lower, 0, 255).astype(np.uint8)
-        upper = np.clip(upper, 0, 255).astype(np.uint8)
-        mask = cv2.inRange(img_bgr, lower, upper)
-        masks.append(mask)
-    if not masks:
+    # img_bgr: HxWx3 (BGR), цвета заданы в RGB; все цвета — один проход LUT (см. palette_lut)
+    if not colors_rgb:
         return np.zeros(img_bgr.shape[:2], dtype=np.uint8)
-    m = masks[0]
-    for extra in masks[1:]:
-        m = cv2.bitwise_or(m, extra)
-    return m
+    return compile_palettes([("colors", colors_rgb)], tol).mask(img_bgr)
+
+def masks_for_palettes_bgr(img_bgr, palettes, tol=2):
+    # {name: [(r,g,b), ...]} → {name: mask}; все палитры за один проход
+    return compile_palettes(palettes, tol).masks(img_bgr)
 
 def biggest_horizontal_band(mask):
     # Морфология и поиск самого широкого контура — прикидываем прямоугольник HP-полосы
@@ -0,0 +1,124 @@
+# core/vision/utils/palette_lut.py
+"""
+Классификатор пикселей по палитрам через таблицы поиска (один проход cv2.LUT).
+
+Палитра — список RGB-цветов с допуском tol; пиксель «её», если для какого-то
+цвета |B-b|, |G-g|, |R-r| <= tol (то же, что cv2.inRange по каждому цвету + OR).
+Условие-«коробка» раскладывается по каналам, поэтому вместо 3D-таблицы
+256³ компилируются три таблицы по 256 значений: бит i в LUT_B[v] стоит, если
+v попадает в диапазон канала B цвета i (аналогично G, R). Тогда
+  bits = LUT_B[B] & LUT_G[G] & LUT_R[R]
+и бит i в bits ⇔ пиксель попал в коробку цвета i — результат точный, без
+квантования. Один uint16 «план» вмещает 16 цветов, больше — несколько планов.
+
+Несколько палитр (alive/dead, friend/enemy/neutral) компилируются вместе и
+считаются за один проход: masks() — отдельные маски, labels() — одно
+изображение меток.
+
+Exports:
+- compile_palettes(palettes, tol=2) -> PaletteClassifier  # palettes: {name: [(r,g,b), ...]} или [(name, colors)]; кэшируется
+- PaletteClassifier.masks(img_bgr) -> {name: uint8 mask 0/255}
+- PaletteClassifier.mask(img_bgr, name=None) -> uint8 mask  # name=None — объединение всех палитр
+- PaletteClassifier.labels(img_bgr) -> uint8 HxW  # 0 — ничего, i+1 — i-я палитра (первая по порядку выигрывает)
+- PaletteClassifier.counts(img_bgr) -> {name: int}
+"""
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+import cv2
+import numpy as np
+
+RGB = Tuple[int, int, int]
+PLANE_BITS: int = 16
+
+PalettesArg = Union[Mapping[str, Sequence[RGB]], Sequence[Tuple[str, Sequence[RGB]]]]
+
+
+class PaletteClassifier:
+    def __init__(self, palettes: Sequence[Tuple[str, Sequence[RGB]]], tol: int = 2):
+        self.names: List[str] = [str(n) for n, _ in palettes]
+        self.tol = int(tol)
+        # план: (lut 1x256x3 uint16 в порядке каналов B,G,R; {name: битовая маска палитры в плане})
+        self._planes: List[Tuple[np.ndarray, Dict[str, int]]] = []
+        lut = None
+        bits: Dict[str, int] = {}
+        bit = PLANE_BITS
+        for name, colors in palettes:
+            for r, g, b in colors or []:
+                if bit >= PLANE_BITS:
+                    if lut is not None:
+                        self._planes.append((lut.reshape(1, 256, 3), bits))
+                    lut, bits, bit = np.zeros((256, 3), dtype=np.uint16), {}, 0
+                for ch, v in enumerate((b, g, r)):
+                    lo, hi = max(0, int(v) - self.tol), min(255, int(v) + self.tol)
+                    if lo <= hi:
+                        lut[lo:hi + 1, ch] |= np.uint16(1 << bit)
+                bits[str(name)] = bits.get(str(name), 0) | (1 << bit)
+                bit += 1
+        if lut is not None:
+            self._planes.append((lut.reshape(1, 256, 3), bits))
+
+    @staticmethod
+    def _bgr(img: np.ndarray) -> np.ndarray:
+        if img.ndim == 3 and img.shape[2] == 4:
+            return cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
+        return img
+
+    def _plane_bits(self, img: np.ndarray, lut: np.ndarray) -> np.ndarray:
+        b, g, r = cv2.split(cv2.LUT(img, lut))
+        return cv2.bitwise_and(cv2.bitwise_and(b, g), r)
+
+    def masks(self, img_bgr: np.ndarray) -> Dict[str, np.ndarray]:
+        if img_bgr is None or img_bgr.size == 0:
+            return {n: np.zeros((0, 0), dtype=np.uint8) for n in self.names}
+        img = self._bgr(img_bgr)
+        h, w = img.shape[:2]
+        out: Dict[str, Optional[np.ndarray]] = {n: None for n in self.names}
+        for lut, bits in self._planes:
+            plane = self._plane_bits(img, lut)
+            single = len(bits) == 1
+            for name, m in bits.items():
+                sel = plane if single else cv2.bitwise_and(plane, m)
+                mk = cv2.compare(sel, 0, cv2.CMP_GT)
+                prev = out.get(name)
+                out[name] = mk if prev is None else cv2.bitwise_or(prev, mk)
+        return {n: (m if m is not None else np.zeros((h, w), dtype=np.uint8)) for n, m in out.items()}
+
+    def mask(self, img_bgr: np.ndarray, name: Optional[str] = None) -> np.ndarray:
+        if img_bgr is None or img_bgr.size == 0:
+            return np.zeros((0, 0), dtype=np.uint8)
+        if name is not None:
+            return self.masks(img_bgr)[name]
+        img = self._bgr(img_bgr)
+        acc = None
+        for lut, _ in self._planes:
+            mk = cv2.compare(self._plane_bits(img, lut), 0, cv2.CMP_GT)
+            acc = mk if acc is None else cv2.bitwise_or(acc, mk)
+        return acc if acc is not None else np.zeros(img.shape[:2], dtype=np.uint8)
+
+    def labels(self, img_bgr: np.ndarray) -> np.ndarray:
+        masks = self.masks(img_bgr)
+        if not masks:
+            return np.zeros((0, 0), dtype=np.uint8)
+        shape = next(iter(masks.values())).shape
+        lab = np.zeros(shape, dtype=np.uint8)
+        for i in range(len(self.names) - 1, -1, -1):
+            lab[masks[self.names[i]] > 0] = i + 1
+        return lab
+
+    def counts(self, img_bgr: np.ndarray) -> Dict[str, int]:
+        return {n: int(cv2.countNonZero(m)) if m.size else 0 for n, m in self.masks(img_bgr).items()}
+
+
+@lru_cache(maxsize=128)
+def _compile(palettes: Tuple[Tuple[str, Tuple[RGB, ...]], ...], tol: int) -> PaletteClassifier:
+    return PaletteClassifier(palettes, tol)
+
+
+def compile_palettes(palettes: PalettesArg, tol: int = 2) -> PaletteClassifier:
+    """Скомпилировать (или взять из кэша) классификатор для набора палитр."""
+    items = palettes.items() if isinstance(palettes, Mapping) else palettes
+    key = tuple((str(n), tuple((int(r), int(g), int(b)) for r, g, b in (cols or []))) for n, cols in items)
+    return _compile(key, int(tol))
@@ -0,0 +1,60 @@
+# core/vision/utils/runs.py
+"""
+Длины горизонтальных серий (run-length) в бинарной маске — векторно, без цикла по строкам.
+
+Маска дополняется нулевой колонкой слева и справа и разворачивается в одну
+строку; фронты 0→1 / 1→0 дают начала и концы всех серий сразу, так что серии
+не «склеиваются» через границу строк.
+
+Exports:
+- row_max_runs(mask) -> np.ndarray[int]   # максимальная длина серии в каждой строке (h,)
+- longest_horizontal_run(mask) -> int     # максимальная длина серии по всей маске
+- longest_run_span(mask) -> (y, x, length) # где она: строка и начало (первая из равных); (-1, -1, 0) — серий нет
+"""
+from __future__ import annotations
+
+from typing import Tuple
+
+import numpy as np
+
+
+def _runs(mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray, int]:
+    """(starts, lengths, stride) для всех серий; starts — индексы в развёрнутой дополненной маске."""
+    m = np.asarray(mask)
+    if m.ndim != 2:
+        m = m.reshape(m.shape[0], -1)
+    h, w = m.shape
+    padded = np.zeros((h, w + 2), dtype=np.int8)
+    np.greater(m, 0, out=padded[:, 1:-1].view(np.bool_))
+    edges = np.diff(padded.ravel())
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    return starts, ends - starts, w + 2
+
+
+def row_max_runs(mask: np.ndarray) -> np.ndarray:
+    if mask is None or mask.size == 0:
+        return np.zeros(0 if mask is None else mask.shape[0], dtype=np.int64)
+    starts, lengths, stride = _runs(mask)
+    out = np.zeros(mask.shape[0], dtype=np.int64)
+    if lengths.size:
+        np.maximum.at(out, starts // stride, lengths)
+    return out
+
+
+def longest_horizontal_run(mask: np.ndarray) -> int:
+    if mask is None or mask.size == 0:
+        return 0
+    _, lengths, _ = _runs(mask)
+    return int(lengths.max()) if lengths.size else 0
+
+
+def longest_run_span(mask: np.ndarray) -> Tuple[int, int, int]:
+    if mask is None or mask.size == 0:
+        return (-1, -1, 0)
+    starts, lengths, stride = _runs(mask)
+    if not lengths.size:
+        return (-1, -1, 0)
+    i = int(np.argmax(lengths))
+    y, xp = divmod(int(starts[i]), stride)
+    return (y, xp, int(lengths[i]))  # xp — индекс фронта в дополненной строке = x начала серии
@@ -4,7 +4,10 @@ Win32 GDI backend: low-level screen and window helpers.
 
 Exports:
 - ensure_dpi_awareness()
-- get_screen(x1, y1, x2, y2) -> np.ndarray BGR
+- get_screen(x1, y1, x2, y2, *, out=None, bgra=False) -> np.ndarray BGR|BGRA
+- get_capture_session() -> CaptureSession (per-thread, reusable DC/DIB-section;
+  grab_view() — zero-copy view, grab(out=...) — запись в свой буфер)
+- close_capture_sessions()
 - get_client_rect(hwnd) -> (abs_x, abs_y, width, height)
 - get_window_rect(hwnd) -> (abs_x, abs_y, width, height)
 - get_window_info(hwnd, client=True) -> {"x","y","width","height"}
@@ -15,6 +18,9 @@ Exports:
 from __future__ import annotations
 
 import ctypes
+import threading
+import weakref
+from ctypes import wintypes
 from typing import Optional, Tuple
 
 import numpy as np
@@ -26,6 +32,9 @@ from core.logging import console
 __all__ = [
     "ensure_dpi_awareness",
     "get_screen",
+    "CaptureSession",
+    "get_capture_session",
+    "close_capture_sessions",
     "get_client_rect",
     "get_window_rect",
     "get_window_info",
@@ -51,63 +60,224 @@ def ensure_dpi_awareness() -> None:
             console.log("[GDI] DPI-awareness: failed")
     _dpi_ready = True
 
-def _release_gdi(hwnd, hwnd_dc, srcdc, memdc, bmp) -> None:
-    try:
-        if bmp:
-            win32gui.DeleteObject(bmp.GetHandle())
-    except Exception:
-        pass
-    try:
-        if memdc:
-            memdc.DeleteDC()
-    except Exception:
-        pass
-    try:
-        if srcdc:
-            srcdc.DeleteDC()
-    except Exception:
-        pass
-    try:
-        if hwnd_dc and hwnd:
-            win32gui.ReleaseDC(hwnd, hwnd_dc)
-    except Exception:
-        pass
+class _BITMAPINFOHEADER(ctypes.Structure):
+    _fields_ = [
+        ("biSize", wintypes.DWORD),
+        ("biWidth", wintypes.LONG),
+        ("biHeight", wintypes.LONG),
+        ("biPlanes", wintypes.WORD),
+        ("biBitCount", wintypes.WORD),
+        ("biCompression", wintypes.DWORD),
+        ("biSizeImage", wintypes.DWORD),
+        ("biXPelsPerMeter", wintypes.LONG),
+        ("biYPelsPerMeter", wintypes.LONG),
+        ("biClrUsed", wintypes.DWORD),
+        ("biClrImportant", wintypes.DWORD),
+    ]
+
+
+class _BITMAPINFO(ctypes.Structure):
+    _fields_ = [("bmiHeader", _BITMAPINFOHEADER), ("bmiColors", wintypes.DWORD * 3)]
+
+
+_BI_RGB = 0
+_DIB_RGB_COLORS = 0
+
+# свой экземпляр: argtypes на общем ctypes.windll.gdi32 поменяли бы вызовы gdi32 во всём процессе
+_gdi32 = ctypes.WinDLL("gdi32")
+_gdi32.CreateDIBSection.argtypes = [
+    wintypes.HDC, ctypes.POINTER(_BITMAPINFO), wintypes.UINT,
+    ctypes.POINTER(ctypes.c_void_p), wintypes.HANDLE, wintypes.DWORD,
+]
+_gdi32.CreateDIBSection.restype = wintypes.HBITMAP
+_gdi32.SelectObject.argtypes = [wintypes.HDC, wintypes.HGDIOBJ]
+_gdi32.SelectObject.restype = wintypes.HGDIOBJ
+_gdi32.DeleteObject.argtypes = [wintypes.HGDIOBJ]
+_gdi32.DeleteObject.restype = wintypes.BOOL
+_gdi32.GdiFlush.argtypes = []
+_gdi32.GdiFlush.restype = wintypes.BOOL
+
+
+def _deliver(view: np.ndarray, out: Optional[np.ndarray]) -> np.ndarray:
+    """Единственное копирование: view буфера сессии → out (или новый массив)."""
+    if out is None:
+        out = np.empty(view.shape, dtype=np.uint8)
+    elif out.shape != view.shape or out.dtype != np.uint8:
+        raise ValueError(f"out must be uint8 {view.shape}, got {out.dtype} {out.shape}")
+    np.copyto(out, view)
+    return out
+
+
+class CaptureSession:
+    """
+    Переиспользуемый GDI-контекст захвата экрана.
+
+    Держит DC рабочего стола, memory-DC и DIB-section размером с самый большой
+    запрошенный регион. Память DIB-section видна numpy напрямую: BitBlt пишет
+    пиксели туда, откуда их читает numpy, без GetBitmapBits/bytes.
+    Буфер только растёт; DC живут до close().
+    Сессия не потокобезопасна — берите её через get_capture_session()
+    (одна на поток).
+    """
+
+    def __init__(self):
+        self._hwnd = None
+        self._hwnd_dc = None
+        self._srcdc = None
+        self._memdc = None
+        self._hbmp = None
+        self._old_bmp = None
+        self._pixels: Optional[np.ndarray] = None  # (cap_h, cap_w, 4) BGRA поверх памяти DIB
+        self._cap_w = 0
+        self._cap_h = 0
+        self._bmi = _BITMAPINFO()
+
+    @property
+    def capacity(self) -> Tuple[int, int]:
+        return self._cap_w, self._cap_h
+
+    def _open(self) -> None:
+        self._hwnd = win32gui.GetDesktopWindow()
+        self._hwnd_dc = win32gui.GetWindowDC(self._hwnd)
+        self._srcdc = win32ui.CreateDCFromHandle(self._hwnd_dc)
+        self._memdc = self._srcdc.CreateCompatibleDC()
+
+    def _free_dib(self) -> None:
+        if self._hbmp is None:
+            return
+        # view на освобождаемую память больше не должен быть доступен
+        self._pixels = None
+        try:
+            if self._old_bmp is not None and self._memdc is not None:
+                _gdi32.SelectObject(self._memdc.GetSafeHdc(), self._old_bmp)
+        except Exception:
+            pass
+        try:
+            _gdi32.DeleteObject(self._hbmp)
+        except Exception:
+            pass
+        self._hbmp = self._old_bmp = None
+
+    def _ensure_capacity(self, w: int, h: int) -> None:
+        if self._memdc is None:
+            self._open()
+        if self._hbmp is not None and w <= self._cap_w and h <= self._cap_h:
+            return
+        new_w, new_h = max(w, self._cap_w), max(h, self._cap_h)
+
+        hdr = self._bmi.bmiHeader
+        hdr.biSize = ctypes.sizeof(_BITMAPINFOHEADER)
+        hdr.biWidth = new_w
+        hdr.biHeight = -new_h  # top-down: строка 0 — верх, как в numpy
+        hdr.biPlanes = 1
+        hdr.biBitCount = 32
+        hdr.biCompression = _BI_RGB
+
+        bits = ctypes.c_void_p()
+        hdc = self._memdc.GetSafeHdc()
+        hbmp = _gdi32.CreateDIBSection(hdc, ctypes.byref(self._bmi), _DIB_RGB_COLORS,
+                                       ctypes.byref(bits), None, 0)
+        if not hbmp or not bits.value:
+            raise OSError("CreateDIBSection failed")
+
+        self._free_dib()
+        self._old_bmp = _gdi32.SelectObject(hdc, hbmp)
+        self._hbmp = hbmp
+        size = new_w * new_h * 4
+        raw = (ctypes.c_uint8 * size).from_address(bits.value)
+        self._pixels = np.ctypeslib.as_array(raw).reshape(new_h, new_w, 4)
+        self._cap_w, self._cap_h = new_w, new_h
+
+    def grab_view(self, x1: int, y1: int, w: int, h: int, *, bgra: bool = False) -> np.ndarray:
+        """
+        BitBlt региона экрана (x1, y1, w, h) → strided view памяти DIB без копирования:
+        BGR (h, w, 3) или BGRA (h, w, 4) при bgra=True.
+        View валиден только до следующего захвата этой сессией.
+        """
+        self._ensure_capacity(w, h)
+        self._memdc.BitBlt((0, 0), (w, h), self._srcdc, (int(x1), int(y1)), win32con.SRCCOPY)
+        _gdi32.GdiFlush()  # GDI батчит вызовы — дождаться записи в DIB до чтения
+        return self._pixels[:h, :w, :] if bgra else self._pixels[:h, :w, :3]
+
+    def grab(self, x1: int, y1: int, w: int, h: int, *,
+             out: Optional[np.ndarray] = None, bgra: bool = False) -> np.ndarray:
+        """
+        Захват в собственный массив: out (uint8, (h, w, 3|4)) заполняется на месте,
+        иначе создаётся новый. Одно копирование из DIB, без bytes/frombuffer.
+        """
+        return _deliver(self.grab_view(x1, y1, w, h, bgra=bgra), out)
+
+    def close(self) -> None:
+        self._free_dib()
+        try:
+            if self._memdc is not None:
+                self._memdc.DeleteDC()
+        except Exception:
+            pass
+        try:
+            if self._srcdc is not None:
+                self._srcdc.DeleteDC()
+        except Exception:
+            pass
+        try:
+            if self._hwnd_dc and self._hwnd:
+                win32gui.ReleaseDC(self._hwnd, self._hwnd_dc)
+        except Exception:
+            pass
+        self._hwnd = self._hwnd_dc = self._srcdc = self._memdc = None
+        self._cap_w = self._cap_h = 0
+
+    def __del__(self):
+        # thread-local умирает вместе с потоком (Timer'ы оркестратора) — не копим DC
+        self.close()
+
+
+_tls = threading.local()
+_sessions: "weakref.WeakSet[CaptureSession]" = weakref.WeakSet()
+_sessions_lock = threading.Lock()
+
+
+def get_capture_session() -> CaptureSession:
+    """Сессия захвата текущего потока (создаётся лениво)."""
+    sess = getattr(_tls, "session", None)
+    if sess is None:
+        sess = CaptureSession()
+        _tls.session = sess
+        with _sessions_lock:
+            _sessions.add(sess)
+    return sess
+
+
+def close_capture_sessions() -> None:
+    """Освободить GDI-ресурсы всех сессий (вызывать при завершении приложения)."""
+    with _sessions_lock:
+        sessions = list(_sessions)
+    for sess in sessions:
+        sess.close()
+
 
-def get_screen(x1: int, y1: int, x2: int, y2: int) -> np.ndarray:
+def get_screen(x1: int, y1: int, x2: int, y2: int, *,
+               out: Optional[np.ndarray] = None, bgra: bool = False) -> np.ndarray:
+    """
+    Регион экрана → BGR (h, w, 3); bgra=True — BGRA (h, w, 4) без отбрасывания альфы.
+    out — свой/пуловый uint8-массив нужной формы: пиксели пишутся в него на месте.
+    """
     ensure_dpi_awareness()
     w = max(0, int(x2) - int(x1))
     h = max(0, int(y2) - int(y1))
     if w == 0 or h == 0:
-        return np.zeros((0, 0, 3), dtype=np.uint8)
+        return np.zeros((0, 0, 4 if bgra else 3), dtype=np.uint8)
 
-    hwnd = win32gui.GetDesktopWindow()
-    hwnd_dc = srcdc = memdc = bmp = None
+    sess = get_capture_session()
     try:
-        hwnd_dc = win32gui.GetWindowDC(hwnd)
-        srcdc = win32ui.CreateDCFromHandle(hwnd_dc)
-        memdc = srcdc.CreateCompatibleDC()
-        bmp = win32ui.CreateBitmap()
-        bmp.CreateCompatibleBitmap(srcdc, w, h)
-        memdc.SelectObject(bmp)
-        memdc.BitBlt((0, 0), (w, h), srcdc, (int(x1), int(y1)), win32con.SRCCOPY)
-
-        bmpinfo = bmp.GetInfo()
-        bmpstr = bmp.GetBitmapBits(True)
-        bpp = bmpinfo.get("bmBitsPixel", 32)
-        channels = max(1, bpp // 8)
-        stride = ((bpp * w + 31) // 32) * 4
-
-        buf = np.frombuffer(bmpstr, dtype=np.uint8)
-        buf = buf.reshape((h, stride))[:, : w * channels]
-        if channels >= 3:
-            img = buf.reshape((h, w, channels))[:, :, :3]
-        elif channels == 1:
-            img = np.repeat(buf.reshape(h, w, 1), 3, axis=2)
-        else:
-            img = np.zeros((h, w, 3), dtype=np.uint8)
-        return img.copy()
-    finally:
-        _release_gdi(hwnd, hwnd_dc, srcdc, memdc, bmp)
+        return sess.grab(int(x1), int(y1), w, h, out=out, bgra=bgra)
+    except ValueError:
+        raise
+    except Exception as e:
+        # DC мог стать невалидным (смена режима экрана и т.п.) — пересоздаём один раз
+        console.log(f"[GDI] capture session reset: {e}")
+        sess.close()
+        return sess.grab(int(x1), int(y1), w, h, out=out, bgra=bgra)
 
 def get_client_rect(hwnd: int) -> tuple[int, int, int, int]:
     l, t, r, b = win32gui.GetClientRect(hwnd)
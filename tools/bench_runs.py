@@ -0,0 +1,80 @@
+# tools/bench_runs.py
+# -*- coding: utf-8 -*-
+"""
+Микро-бенчмарк: длина самой длинной горизонтальной серии в маске HP-полосы.
+
+Сравнивает прежний построчный цикл (np.diff/np.where на каждую строку) с
+векторным core.vision.utils.runs.longest_horizontal_run на маске 350×120
+(зона player_state по умолчанию) и проверяет, что результаты совпадают.
+
+Запуск (из корня репозитория):
+    python tools/bench_runs.py
+    python tools/bench_runs.py <iterations>
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.vision.utils.runs import longest_horizontal_run  # noqa: E402
+
+
+def _longest_horizontal_run_rows(mask_bin: np.ndarray) -> int:
+    # прежняя реализация из player_state (цикл по строкам)
+    if mask_bin is None or mask_bin.size == 0:
+        return 0
+    m = (mask_bin > 0)
+    h, _ = m.shape[:2]
+    best_len = 0
+    for y in range(h):
+        row = m[y]
+        if not row.any():
+            continue
+        r = row.astype(np.int8)
+        edges = np.diff(np.concatenate(([0], r, [0])))
+        starts = np.where(edges == 1)[0]
+        ends = np.where(edges == -1)[0]
+        if starts.size and ends.size:
+            lengths = ends - starts
+            mx = int(lengths.max(initial=0))
+            if mx > best_len:
+                best_len = mx
+    return best_len
+
+
+def _masks():
+    rng = np.random.default_rng(0)
+    h, w = 350, 120
+    bar = np.zeros((h, w), dtype=np.uint8)
+    bar[200:206, 20:94] = 255                      # одна полоса HP
+    noisy = bar.copy()
+    noisy[rng.random((h, w)) < 0.05] = 255         # + шум цветов персонажа/фона
+    dense = (rng.random((h, w)) < 0.5).astype(np.uint8) * 255
+    return {"bar": bar, "bar+noise": noisy, "dense": dense}
+
+
+def _bench(fn, mask, n: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn(mask)
+    return (time.perf_counter() - t0) / n * 1e6
+
+
+def main() -> int:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    ok = True
+    for name, mask in _masks().items():
+        a, b = _longest_horizontal_run_rows(mask), longest_horizontal_run(mask)
+        ok &= (a == b)
+        t_rows = _bench(_longest_horizontal_run_rows, mask, n)
+        t_vec = _bench(longest_horizontal_run, mask, n)
+        print(f"{name:10s} run={b:3d}  rows={t_rows:8.1f} us  vectorized={t_vec:7.1f} us  x{t_rows / max(t_vec, 1e-9):.1f}"
+              + ("" if a == b else f"  MISMATCH rows={a}"))
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
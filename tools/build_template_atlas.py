@@ -0,0 +1,26 @@
+# tools/build_template_atlas.py
+# -*- coding: utf-8 -*-
+"""
+Собирает атлас шаблонов (core/engines/templates.atlas.bin + .json):
+все PNG из core/engines/*/server/*/**/templates/** в виде готовых GRAY/BGR плоскостей.
+
+Запуск (из корня репозитория):
+    python tools/build_template_atlas.py
+    python tools/build_template_atlas.py <base_path_without_ext>
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.vision.matching.template_atlas import build_atlas  # noqa: E402
+
+
+def main() -> int:
+    base = sys.argv[1] if len(sys.argv) > 1 else None
+    n = build_atlas(base)
+    return 0 if n > 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
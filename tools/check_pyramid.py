@@ -0,0 +1,82 @@
+# tools/check_pyramid.py
+# -*- coding: utf-8 -*-
+"""
+Сверка coarse-to-fine поиска (core.vision.matching.pyramid) с полным перебором.
+
+Мелкие шаблоны (тексты кнопок, города телепорта) вставляются в шумный кадр
+1920×1080 на всех смещениях 0..3 по x/y (чётных и нечётных — на нечётных
+грубый уровень смазывает штрихи) и ищутся match_template_best с порогом.
+Решение «есть/нет» по порогу обязано совпасть с cv2.matchTemplate, а найденная
+позиция — с местом вставки.
+
+Запуск (из корня репозитория):
+    python tools/check_pyramid.py
+    python tools/check_pyramid.py <template.png> [<template.png> ...]
+"""
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.vision.matching.pyramid import match_template_best, match_template_full  # noqa: E402
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DEFAULT_TEMPLATES = [
+    "core/engines/dashboard/server/boh/templates/rus/teleport/towns/Goddard.png",
+]
+THRESHOLD = 0.87
+FRAME_W, FRAME_H = 1920, 1080
+
+
+def _frame(rng: np.random.Generator) -> np.ndarray:
+    return (rng.random((FRAME_H, FRAME_W)) * 40 + 30).astype(np.uint8)
+
+
+def _check(path: str, rng: np.random.Generator) -> bool:
+    tpl = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+    if tpl is None:
+        print(f"{path}: не читается")
+        return False
+    th, tw = tpl.shape[:2]
+    ok = True
+    t_full = t_best = 0.0
+    for dx in range(4):
+        for dy in range(4):
+            img = _frame(rng)
+            x, y = 701 + dx, 333 + dy
+            img[y:y + th, x:x + tw] = tpl
+
+            t0 = time.perf_counter()
+            full = match_template_full(img, tpl)
+            t1 = time.perf_counter()
+            best = match_template_best(img, tpl, threshold=THRESHOLD)
+            t2 = time.perf_counter()
+            t_full += t1 - t0
+            t_best += t2 - t1
+
+            same = (full[0] >= THRESHOLD) == (best[0] >= THRESHOLD)
+            if best[0] >= THRESHOLD:
+                same &= best[1] == (x, y)
+            if not same:
+                ok = False
+                print(f"  MISMATCH offset=({dx},{dy}) full={full[0]:.3f}@{full[1]} best={best[0]:.3f}@{best[1]}")
+    print(f"{os.path.basename(path):20s} {tw}x{th}  full={t_full / 16 * 1e3:6.1f} ms  best={t_best / 16 * 1e3:6.1f} ms"
+          + ("" if ok else "  FAIL"))
+    return ok
+
+
+def main() -> int:
+    paths = sys.argv[1:] or [os.path.join(ROOT, p) for p in DEFAULT_TEMPLATES]
+    rng = np.random.default_rng(0)
+    ok = True
+    for p in paths:
+        ok &= _check(p, rng)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())